@@ -0,0 +1,492 @@
+"""
+IRIS - Benchmark do Storage
+Gera bancos sintéticos (anos de uso) em diretório temporário, mede cada
+função pública de storage.py e as tools ver_tarefas, ver_dashboard e
+review_semanal, e grava JSON comparável entre commits. Cada caso também
+roda uma vez com trace: as consultas executadas passam por EXPLAIN QUERY
+PLAN e varreduras completas (SCAN tabela) ficam marcadas.
+
+    python benchmark_storage.py                                # 1k e 100k linhas por tabela
+    python benchmark_storage.py --sizes 1000,100000,1000000 -o depois.json
+    python benchmark_storage.py --compare antes.json -o depois.json
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR / "src"))
+
+import storage
+from tools import execute_tool
+
+CHAT = "1"          # chat principal (90% dos dados)
+OTHER_CHAT = "2"    # segundo chat, para os filtros por chat_id pesarem
+HISTORY_KEEP = 30   # mensagens no ring buffer; o resto vai para conversation_archive
+REGRESSION = 1.25        # --compare: razão acima disso é regressão...
+REGRESSION_MIN_MS = 0.5  # ...se a diferença também passar disso (ruído em casos sub-ms)
+
+WORDS = ("hoje", "trabalho", "viagem", "praia", "projeto", "reuniao", "academia", "livro", "familia",
+         "cansado", "feliz", "codigo", "python", "entrevista", "mercado", "corrida", "estudar", "filme",
+         "jantar", "cliente", "deploy", "banco", "dados", "ferias", "musica", "treino", "sono", "cafe")
+SYLLABLES = ("ba", "ca", "da", "fe", "go", "la", "ma", "ni", "po", "ra", "se", "ti", "vo", "za", "lu", "me")
+VOCABULARY_SIZE = 5000
+
+
+# ============================================================
+# DADOS SINTÉTICOS
+# ============================================================
+
+def _vocabulary(rng):
+    """Palavras reais + pseudo-palavras, com frequência Zipf (termos de busca
+    seletivos como num texto de verdade, não presentes em toda linha)"""
+    words = list(WORDS)
+    while len(words) < VOCABULARY_SIZE:
+        words.append("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    rng.shuffle(words)
+    return words, list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+
+
+_vocab = None
+
+
+def _text(rng, n):
+    global _vocab
+    if _vocab is None:
+        _vocab = _vocabulary(random.Random(0))
+    return " ".join(rng.choices(_vocab[0], cum_weights=_vocab[1], k=n))
+
+
+def _chat(i):
+    return OTHER_CHAT if i % 10 == 9 else CHAT
+
+
+def generate(rows, years, seed=42):
+    """Popula storage.DB_PATH com `rows` linhas por tabela espalhadas em `years`
+    anos (os triggers de daily_stats e busca rodam como em produção)."""
+    rng = random.Random(seed)
+    today = datetime.now()
+    days = years * 365
+
+    def day(i):
+        return (today - timedelta(days=days - 1 - i * days // rows)).strftime("%Y-%m-%d")
+
+    def moment(i):
+        return today - timedelta(days=days - 1 - i * days // rows, seconds=rng.randint(0, 80000))
+
+    storage.ensure_db()
+    conn = sqlite3.connect(str(storage.DB_PATH), isolation_level=None)
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("BEGIN")
+
+    conn.executemany("INSERT INTO diary_entries (chat_id, date, texto) VALUES (?, ?, ?)",
+                     ((_chat(i), day(i), _text(rng, 25)) for i in range(rows)))
+    conn.executemany("INSERT INTO mood_entries (chat_id, date, nivel, nota) VALUES (?, ?, ?, ?)",
+                     ((_chat(i), day(i), rng.randint(1, 5), _text(rng, 3)) for i in range(rows)))
+    conn.executemany("INSERT INTO workouts (chat_id, date, tipo) VALUES (?, ?, ?)",
+                     ((_chat(i), day(i), rng.choice(("cardio", "musculacao", "corrida"))) for i in range(rows)))
+    conn.executemany("INSERT INTO pomodoros (chat_id, date, tarefa, minutos) VALUES (?, ?, ?, ?)",
+                     ((_chat(i), day(i), _text(rng, 3), 25) for i in range(rows)))
+    conn.executemany("INSERT INTO night_thoughts (chat_id, date, texto) VALUES (?, ?, ?)",
+                     ((_chat(i), day(i), _text(rng, 60)) for i in range(rows)))
+
+    # Tarefas: quase todas concluídas; as pendentes ficam entre as mais novas
+    pending_from = rows - max(20, rows // 100)
+
+    def task(i):
+        criada = moment(i)
+        feita = i < pending_from
+        return (_chat(i), _text(rng, 5), int(feita), criada.strftime("%Y-%m-%d %H:%M:%S"),
+                (criada + timedelta(hours=rng.randint(1, 72))).isoformat() if feita else None)
+    conn.executemany("INSERT INTO tasks (chat_id, texto, feita, criada_em, feita_em) VALUES (?, ?, ?, ?, ?)",
+                     (task(i) for i in range(rows)))
+
+    def goal(i):
+        d = today - timedelta(days=days - 1 - i * days // rows)
+        return (_chat(i), (d - timedelta(days=d.weekday())).strftime("%Y-W%W"), _text(rng, 4), int(rng.random() < 0.6))
+    conn.executemany("INSERT INTO weekly_goals (chat_id, semana, texto, concluida) VALUES (?, ?, ?, ?)",
+                     (goal(i) for i in range(rows)))
+
+    # Histórico: o arquivo guarda tudo menos as últimas HISTORY_KEEP por chat
+    conn.executemany("INSERT INTO conversation_archive (id, chat_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                     ((i + 1, _chat(i), ("user", "assistant")[i % 2],
+                       zlib.compress(_text(rng, 30).encode("utf-8")), moment(i).strftime("%Y-%m-%d %H:%M:%S"))
+                      for i in range(rows)))
+    for chat in (CHAT, OTHER_CHAT):
+        conn.executemany("INSERT INTO conversation_history (id, chat_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                         ((rows + i + 1 + (HISTORY_KEEP if chat == OTHER_CHAT else 0), chat, ("user", "assistant")[i % 2],
+                           _text(rng, 30), today.strftime("%Y-%m-%d %H:%M:%S")) for i in range(HISTORY_KEEP)))
+
+    conn.executemany("INSERT INTO reminders (tipo, hora, chat_id) VALUES (?, ?, ?)",
+                     ((rng.choice(("agua", "remedio", "pausa")), f"{h:02d}:00", _chat(h)) for h in range(6, 23)))
+    conn.execute("COMMIT")
+    conn.close()
+
+    # Arquivo de conversa não tem trigger de busca: o índice é refeito
+    storage.rebuild_memory_index()
+    storage.optimize_db()
+
+
+# ============================================================
+# CASOS
+# ============================================================
+
+def _pending_ids(n):
+    tasks, _ = storage.query_tasks("pending", limit=n, chat_id=CHAT)
+    return [t["id"] for t in tasks]
+
+
+def _done_id():
+    tasks, _ = storage.query_tasks("done", limit=1, chat_id=CHAT)
+    return tasks[0]["id"]
+
+
+def _open_goal():
+    return storage.add_weekly_goal(_week(datetime.now()), "meta do benchmark", chat_id=CHAT)
+
+
+def _week(d):
+    return (d - timedelta(days=d.weekday())).strftime("%Y-W%W")
+
+
+def _tool(name, args=None):
+    out = execute_tool(name, args or {}, chat_id=CHAT)
+    if out.startswith("ERRO em"):
+        raise RuntimeError(out)
+    return out
+
+
+def build_cases():
+    """(nome, função de storage coberta, chamada, setup, once).
+    setup() roda fora do tempo e o resultado vai como argumento da chamada;
+    once=True: caso destrutivo/lento, mede uma única execução (fica no fim)."""
+    now = datetime.now()
+    hoje = now.strftime("%Y-%m-%d")
+    semana = (now - timedelta(days=6)).strftime("%Y-%m-%d")
+    mes = (now - timedelta(days=30)).strftime("%Y-%m-%d")
+    ano = (now - timedelta(days=365)).strftime("%Y-%m-%d")
+    week = _week(now)
+
+    def first_page():
+        return storage.query_tasks("pending", limit=10, chat_id=CHAT)[1]
+
+    cases = [
+        # Histórico
+        ("get_history", "get_history", lambda _: storage.get_history(30, chat_id=CHAT)),
+        ("get_history_to_summarize", "get_history_to_summarize",
+         lambda _: storage.get_history_to_summarize(0, 16, chat_id=CHAT)),
+        ("get_archived_history", "get_archived_history", lambda _: storage.get_archived_history(CHAT, 100)),
+        ("get_summary", "get_summary", lambda _: storage.get_summary(CHAT)),
+        ("add_to_history", "add_to_history", lambda _: storage.add_to_history("user", "mensagem de teste", chat_id=CHAT)),
+        ("set_history_cap", "set_history_cap", lambda _: storage.set_history_cap(CHAT, HISTORY_KEEP)),
+        ("save_summary", "save_summary", lambda _: storage.save_summary(CHAT, "resumo", 1)),
+        # Diário
+        ("get_diary_entries", "get_diary_entries", lambda _: storage.get_diary_entries(hoje, chat_id=CHAT)),
+        ("get_diary_between[7d]", "get_diary_between", lambda _: storage.get_diary_between(semana, hoje, chat_id=CHAT)),
+        ("get_diary_between[365d]", "get_diary_between", lambda _: storage.get_diary_between(ano, hoje, chat_id=CHAT)),
+        ("add_diary_entry", "add_diary_entry", lambda _: storage.add_diary_entry(hoje, "entrada do benchmark", chat_id=CHAT)),
+        # Tarefas
+        ("get_tasks", "get_tasks", lambda _: storage.get_tasks(chat_id=CHAT)),
+        ("get_tasks[pending]", "get_tasks", lambda _: storage.get_tasks(only_pending=True, chat_id=CHAT)),
+        ("query_tasks[pending]", "query_tasks", lambda _: storage.query_tasks("pending", limit=30, chat_id=CHAT)),
+        ("query_tasks[cursor]", "query_tasks",
+         lambda cursor: storage.query_tasks("pending", limit=10, cursor=cursor, chat_id=CHAT), first_page),
+        ("query_tasks[done 30d]", "query_tasks", lambda _: storage.query_tasks(start=mes, end=hoje, chat_id=CHAT)),
+        ("query_tasks[prefix]", "query_tasks", lambda _: storage.query_tasks(prefix="viagem pr", chat_id=CHAT)),
+        ("get_tasks_completed_between", "get_tasks_completed_between",
+         lambda _: storage.get_tasks_completed_between(semana, hoje, chat_id=CHAT)),
+        ("count_pending_tasks", "count_pending_tasks", lambda _: storage.count_pending_tasks(chat_id=CHAT)),
+        ("add_task", "add_task", lambda _: storage.add_task("tarefa do benchmark", chat_id=CHAT)),
+        ("add_tasks[10]", "add_tasks", lambda _: storage.add_tasks([f"tarefa {i}" for i in range(10)], chat_id=CHAT)),
+        ("complete_task", "complete_task", lambda ids: storage.complete_task(ids[0], chat_id=CHAT), lambda: _pending_ids(1)),
+        ("complete_tasks[10]", "complete_tasks", lambda ids: storage.complete_tasks(ids, chat_id=CHAT), lambda: _pending_ids(10)),
+        ("reopen_task", "reopen_task", lambda tid: storage.reopen_task(tid, chat_id=CHAT), _done_id),
+        # Humor, treinos, pomodoros
+        ("get_mood", "get_mood", lambda _: storage.get_mood(hoje, chat_id=CHAT)),
+        ("get_mood_between", "get_mood_between", lambda _: storage.get_mood_between(semana, hoje, chat_id=CHAT)),
+        ("add_mood", "add_mood", lambda _: storage.add_mood(hoje, 4, "bem", chat_id=CHAT)),
+        ("get_workouts", "get_workouts", lambda _: storage.get_workouts(hoje, chat_id=CHAT)),
+        ("get_workouts_between", "get_workouts_between", lambda _: storage.get_workouts_between(semana, hoje, chat_id=CHAT)),
+        ("count_workouts_between", "count_workouts_between",
+         lambda _: storage.count_workouts_between(semana, hoje, chat_id=CHAT)),
+        ("add_workout", "add_workout", lambda _: storage.add_workout(hoje, "cardio", chat_id=CHAT)),
+        ("get_pomodoros", "get_pomodoros", lambda _: storage.get_pomodoros(hoje, chat_id=CHAT)),
+        ("get_pomodoros_between", "get_pomodoros_between", lambda _: storage.get_pomodoros_between(semana, hoje, chat_id=CHAT)),
+        ("add_pomodoro", "add_pomodoro", lambda _: storage.add_pomodoro(hoje, "foco", 25, chat_id=CHAT)),
+        # Estatísticas
+        ("get_daily_stats", "get_daily_stats", lambda _: storage.get_daily_stats(hoje, chat_id=CHAT)),
+        ("get_daily_stats_between[365d]", "get_daily_stats_between",
+         lambda _: storage.get_daily_stats_between(ano, hoje, chat_id=CHAT)),
+        # Metas, reflexões, lembretes
+        ("get_weekly_goals", "get_weekly_goals", lambda _: storage.get_weekly_goals(week, chat_id=CHAT)),
+        ("add_weekly_goal", "add_weekly_goal", lambda _: storage.add_weekly_goal(week, "meta", chat_id=CHAT)),
+        ("add_weekly_goals[5]", "add_weekly_goals",
+         lambda _: storage.add_weekly_goals(week, [f"meta {i}" for i in range(5)], chat_id=CHAT)),
+        ("complete_weekly_goal", "complete_weekly_goal", lambda gid: storage.complete_weekly_goal(gid, chat_id=CHAT), _open_goal),
+        ("get_last_night_thought", "get_last_night_thought", lambda _: storage.get_last_night_thought(chat_id=CHAT)),
+        ("get_night_thoughts_history", "get_night_thoughts_history",
+         lambda _: storage.get_night_thoughts_history(30, chat_id=CHAT)),
+        ("save_night_thought", "save_night_thought", lambda _: storage.save_night_thought(hoje, "reflexao", chat_id=CHAT)),
+        ("get_active_reminders[all]", "get_active_reminders", lambda _: storage.get_active_reminders()),
+        ("get_active_reminders[chat]", "get_active_reminders", lambda _: storage.get_active_reminders(CHAT)),
+        ("add_reminder", "add_reminder", lambda _: storage.add_reminder("agua", "10:00", OTHER_CHAT)),
+        ("clear_reminders", "clear_reminders", lambda _: storage.clear_reminders(OTHER_CHAT)),
+        # Busca
+        ("search_memory", "search_memory", lambda _: storage.search_memory("viagem praia", chat_id=CHAT)),
+        ("search_memory[diario]", "search_memory",
+         lambda _: storage.search_memory("entrevista", fonte="diario", chat_id=CHAT)),
+        ("db_stats", "db_stats", lambda _: storage.db_stats()),
+        ("assign_legacy_rows", "assign_legacy_rows", lambda _: storage.assign_legacy_rows(CHAT)),
+        # Tools (caminho completo que o LLM usa)
+        ("tool:ver_tarefas", None, lambda _: _tool("ver_tarefas")),
+        ("tool:ver_dashboard", None, lambda _: _tool("ver_dashboard")),
+        ("tool:review_semanal", None, lambda _: _tool("review_semanal")),
+        ("tool:buscar_memoria", None, lambda _: _tool("buscar_memoria", {"consulta": "projeto deploy"})),
+    ]
+    cases = [(name, fn, call, extra[0] if extra else None, False) for name, fn, call, *extra in cases]
+
+    # Manutenção: lentos e alteram os dados, uma execução cada, no fim
+    cutoff = (now - timedelta(days=storage.RETENTION_DAYS)).strftime("%Y-%m-%d")
+    cases += [
+        ("rebuild_daily_stats", "rebuild_daily_stats", lambda _: storage.rebuild_daily_stats(), None, True),
+        ("rebuild_memory_index", "rebuild_memory_index", lambda _: storage.rebuild_memory_index(), None, True),
+        ("fts_merge_step", "fts_merge_step", lambda _: storage.fts_merge_step(), None, True),
+        ("analyze_db", "analyze_db", lambda _: storage.analyze_db(), None, True),
+        ("optimize_db", "optimize_db", lambda _: storage.optimize_db(), None, True),
+        ("archive_batch", "archive_batch", lambda _: storage.archive_batch("diary_entries", cutoff), None, True),
+        ("run_maintenance", "run_maintenance", lambda _: storage.run_maintenance(), None, True),
+        ("incremental_vacuum", "incremental_vacuum", lambda _: storage.incremental_vacuum(), None, True),
+        ("vacuum_full", "vacuum_full", lambda _: storage.vacuum_full(), None, True),
+    ]
+    return cases
+
+
+def uncovered(cases):
+    """Funções públicas de storage sem caso (para manter o benchmark completo)"""
+    public = {name for name, fn in vars(storage).items()
+              if getattr(fn, "db_kind", None) and not name.startswith("_")}
+    public |= {"run_maintenance", "optimize_db", "analyze_db"}
+    return sorted(public - {fn for _, fn, *_ in cases})
+
+
+# ============================================================
+# EXPLAIN QUERY PLAN
+# ============================================================
+
+_SKIP_PLAN = re.compile(r"^\s*(--|BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|PRAGMA|ANALYZE|VACUUM|CREATE|DROP)", re.I)
+_FULL_SCAN = re.compile(r"^SCAN (?:main\.)?(\w+)(.*)")
+# Não são varreduras de tabela: json_each dos IN (...), tabelas internas do FTS5
+_NOT_SCANS = re.compile(r"^(json_each|CONSTANT|sqlite_master|memory_fts_\w+)$")
+
+
+class Tracer:
+    """Coleta o SQL executado nas conexões do storage (thread atual + writer)"""
+
+    def __init__(self):
+        self.statements = []
+        self.enabled = False
+        self._lock = threading.Lock()
+
+    def _callback(self, sql):
+        if self.enabled:
+            with self._lock:
+                self.statements.append(sql)
+
+    def install(self):
+        def attach():
+            with storage.get_db() as conn:
+                conn.set_trace_callback(self._callback)
+        attach()
+        storage.submit_write(attach).result()
+
+    def take(self):
+        with self._lock:
+            statements, self.statements = self.statements, []
+        return statements
+
+
+def explain(statements):
+    """EXPLAIN QUERY PLAN de cada consulta distinta. Retorna (nº de consultas, varreduras completas)."""
+    conn = sqlite3.connect(str(storage.DB_PATH))
+    scans, seen = [], set()
+    try:
+        for sql in statements:
+            if _SKIP_PLAN.match(sql) or sql in seen:
+                continue
+            seen.add(sql)
+            if sql.lstrip().upper().startswith("INSERT") and " SELECT " not in sql.upper():
+                continue
+            try:
+                plan = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+            except sqlite3.Error:
+                continue
+            for row in plan:
+                m = _FULL_SCAN.match(row[3])
+                if m and "VIRTUAL TABLE" not in m.group(2) and not _NOT_SCANS.match(m.group(1)):
+                    scans.append({"scan": row[3], "sql": sql[:200]})
+    finally:
+        conn.close()
+    return len(seen), scans
+
+
+# ============================================================
+# EXECUÇÃO
+# ============================================================
+
+def _time(call, arg):
+    t0 = time.perf_counter()
+    call(arg)
+    return (time.perf_counter() - t0) * 1000
+
+
+def run_case(name, call, setup, once, repeat, tracer):
+    result = {}
+    # Execução com trace (também serve de aquecimento); casos once só rodam essa
+    arg = setup() if setup else None
+    storage.cache_clear()
+    tracer.enabled = True
+    try:
+        first = _time(call, arg)
+    finally:
+        tracer.enabled = False
+    queries, scans = explain(tracer.take())
+
+    if once:
+        times = [first]
+    else:
+        times = []
+        for _ in range(repeat):
+            arg = setup() if setup else None
+            storage.cache_clear()  # mede o banco, não o cache
+            times.append(_time(call, arg))
+        if name.startswith(("get_", "count_", "query_")):
+            result["warm_ms"] = round(_time(call, arg), 3)  # segunda chamada: cache de leitura
+
+    result.update({
+        "median_ms": round(statistics.median(times), 3),
+        "min_ms": round(min(times), 3),
+        "max_ms": round(max(times), 3),
+        "runs": len(times),
+        "queries": queries,
+        "full_scans": scans,
+    })
+    return result
+
+
+def bench_size(rows, years, repeat, only):
+    tracer = Tracer()
+    with tempfile.TemporaryDirectory(prefix="iris-bench-") as tmp:
+        storage.close_db()
+        storage.DB_PATH = Path(tmp) / "iris.db"
+        try:
+            t0 = time.perf_counter()
+            generate(rows, years)
+            gen_s = time.perf_counter() - t0
+            size = storage.db_stats()
+            print(f"[BENCH] {rows} linhas/tabela: gerado em {gen_s:.1f}s, {size['bytes'] / 1e6:.1f}MB")
+
+            tracer.install()
+            cases = {}
+            for name, _, call, setup, once in build_cases():
+                if only and not re.search(only, name):
+                    continue
+                try:
+                    r = run_case(name, call, setup, once, repeat, tracer)
+                except Exception as e:
+                    r = {"error": f"{type(e).__name__}: {e}"}
+                    print(f"  {name:<34} ERRO {r['error']}")
+                else:
+                    flag = f"  FULL SCAN: {', '.join(sorted({s['scan'] for s in r['full_scans']}))}" if r["full_scans"] else ""
+                    print(f"  {name:<34} {r['median_ms']:>10.3f}ms{flag}")
+                cases[name] = r
+        finally:
+            storage.close_db()
+    return {"rows": rows, "years": years, "generate_s": round(gen_s, 2), "db_bytes": size["bytes"], "cases": cases}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(current, base_path):
+    """Imprime a razão atual/base por caso (mesmo tamanho de banco)"""
+    base = json.loads(Path(base_path).read_text(encoding="utf-8"))
+    print(f"\n[BENCH] Comparação com {base_path} (commit {base['meta'].get('commit')})")
+    regressions = 0
+    for rows, res in current["results"].items():
+        old = base["results"].get(rows)
+        if not old:
+            continue
+        print(f"  {rows} linhas/tabela")
+        for name, r in res["cases"].items():
+            o = old["cases"].get(name)
+            if not o or "median_ms" not in r or "median_ms" not in o or not o["median_ms"]:
+                continue
+            ratio = r["median_ms"] / o["median_ms"]
+            slower = ratio > REGRESSION and r["median_ms"] - o["median_ms"] > REGRESSION_MIN_MS
+            mark = "  REGRESSAO" if slower else ""
+            regressions += bool(mark)
+            print(f"  {name:<34} {o['median_ms']:>10.3f} -> {r['median_ms']:>10.3f}ms  x{ratio:.2f}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do storage da IRIS com bancos sintéticos")
+    parser.add_argument("--sizes", default="1000,100000", help="linhas por tabela, separadas por vírgula")
+    parser.add_argument("--years", type=int, default=3, help="anos de uso simulados")
+    parser.add_argument("--repeat", type=int, default=5, help="execuções medidas por caso")
+    parser.add_argument("--only", help="regex: só casos com nome correspondente")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="arquivo JSON de saída")
+    parser.add_argument("--compare", metavar="BASE", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    missing = uncovered(build_cases())
+    if missing:
+        print(f"[BENCH] Funções sem caso: {', '.join(missing)}")
+
+    original = storage.DB_PATH
+    results = {}
+    try:
+        for rows in (int(s) for s in args.sizes.split(",")):
+            results[str(rows)] = bench_size(rows, args.years, args.repeat, args.only)
+    finally:
+        storage.DB_PATH = original
+
+    output = {
+        "meta": {
+            "commit": _git_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "repeat": args.repeat,
+            "years": args.years,
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(output, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n[BENCH] Resultados em {args.output}")
+
+    if args.compare:
+        compare(output, args.compare)
+
+
+if __name__ == "__main__":
+    main()
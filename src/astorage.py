@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+IRIS - Async Storage
+Fachada assíncrona sobre storage.py para os handlers do Telegram:
+escritas vão para a thread de escrita, leituras para o pool de leitura,
+e o event loop só aguarda o resultado (nunca bloqueia em disco).
+
+    await astorage.add_to_history("user", texto)
+    tarefas = await astorage.get_tasks(only_pending=True)
+"""
+
+import asyncio
+import functools
+
+import storage
+
+
+def _async_write(fn):
+    @functools.wraps(fn)
+    async def call(*args, **kwargs):
+        if fn.deferred:
+            return fn(*args, **kwargs)  # modo buffered: só enfileira
+        return await asyncio.wrap_future(storage.submit_write(fn.__wrapped__, *args, **kwargs))
+    return call
+
+
+def _async_read(fn):
+    @functools.wraps(fn)
+    async def call(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(storage.reader_pool, functools.partial(fn, *args, **kwargs))
+    return call
+
+
+# Gera uma versão async de cada função marcada com @writes/@reads em storage
+__all__ = []
+for _name, _fn in list(vars(storage).items()):
+    _kind = getattr(_fn, "db_kind", None)
+    if _kind == "write":
+        globals()[_name] = _async_write(_fn)
+    elif _kind == "read":
+        globals()[_name] = _async_read(_fn)
+    else:
+        continue
+    __all__.append(_name)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+IRIS - Backup do banco
+Snapshots a quente de data/iris.db pela API de backup do SQLite, copiados
+em lotes de páginas com pausa (não disputa disco com o bot), comprimidos
+com gzip e rotacionados. Restauração só com o bot parado (CLI):
+
+    python src/bot.py --backup
+    python src/bot.py --restore                # lista os snapshots
+    python src/bot.py --restore iris-20260101-044500.db.gz
+"""
+
+import gzip
+import time
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import storage
+from config import BACKUP_KEEP
+
+# Throttle: páginas copiadas por passo e pausa entre passos (a pausa é
+# feita no callback de progresso; o `sleep` do backup() só vale em BUSY/LOCKED)
+BACKUP_PAGES = 256
+BACKUP_SLEEP = 0.02
+GZIP_LEVEL = 6
+
+_backup_lock = threading.Lock()  # um snapshot por vez
+
+
+def backup_dir():
+    return storage.DB_PATH.parent / "backups"
+
+
+def _copy_db(src_path, dst_path, pages=BACKUP_PAGES, sleep=BACKUP_SLEEP):
+    """Copia um banco SQLite página a página para dst_path"""
+    src = sqlite3.connect(str(src_path), timeout=30, isolation_level=None)
+    dst = sqlite3.connect(str(dst_path))
+    try:
+        # Transação de leitura aberta durante a cópia inteira: no WAL o
+        # snapshot fica fixo e as escritas do bot (outra conexão) não fazem
+        # o backup recomeçar do zero a cada passo
+        src.execute("BEGIN")
+        src.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        progress = (lambda status, remaining, total: time.sleep(sleep)) if sleep else None
+        src.backup(dst, pages=pages, progress=progress)
+        src.execute("COMMIT")
+    finally:
+        dst.close()
+        src.close()
+
+
+# ============================================================
+# SNAPSHOT
+# ============================================================
+
+def snapshot(keep=BACKUP_KEEP, label=""):
+    """Grava um snapshot comprimido do banco e aplica a rotação.
+    Bloqueante: chame fora do event loop. Retorna dict com caminho e tamanhos."""
+    storage.ensure_db()
+    storage.flush()
+    out_dir = backup_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    with _backup_lock:
+        t0 = time.monotonic()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        name = f"iris-{stamp}{'-' + label if label else ''}.db.gz"
+        raw = out_dir / f".{name}.tmp"
+        try:
+            _copy_db(storage.DB_PATH, raw)
+            with open(raw, "rb") as f_in, gzip.open(out_dir / name, "wb", compresslevel=GZIP_LEVEL) as f_out:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+            raw_size = raw.stat().st_size
+        finally:
+            raw.unlink(missing_ok=True)
+        removed = rotate(keep)
+
+    path = out_dir / name
+    return {
+        "path": str(path),
+        "name": name,
+        "db_bytes": raw_size,
+        "gz_bytes": path.stat().st_size,
+        "removed": removed,
+        "seconds": round(time.monotonic() - t0, 2),
+    }
+
+
+def list_snapshots():
+    """Snapshots existentes, do mais novo para o mais antigo"""
+    out_dir = backup_dir()
+    if not out_dir.exists():
+        return []
+    return sorted(out_dir.glob("iris-*.db.gz"), key=lambda p: p.name, reverse=True)
+
+
+def rotate(keep=BACKUP_KEEP):
+    """Apaga os snapshots além dos `keep` mais novos. Retorna os nomes apagados."""
+    removed = []
+    for old in list_snapshots()[keep:]:
+        old.unlink(missing_ok=True)
+        removed.append(old.name)
+    return removed
+
+
+# ============================================================
+# RESTORE
+# ============================================================
+
+def restore(name):
+    """Substitui o banco pelo snapshot `name` (nome ou caminho).
+    Antes, grava um snapshot 'pre-restore' do estado atual. Use com o bot
+    parado: conexões abertas em outros processos veriam a troca no meio."""
+    path = Path(name)
+    if not path.is_absolute() and not path.exists():
+        path = backup_dir() / name
+    if not path.exists():
+        raise FileNotFoundError(f"Snapshot não encontrado: {name}")
+
+    raw = path.with_name(f".{path.name}.restore.tmp")
+    try:
+        with gzip.open(path, "rb") as f_in, open(raw, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        conn = sqlite3.connect(str(raw))
+        try:
+            check = conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+        if check != "ok":
+            raise ValueError(f"Snapshot corrompido ({check}): {path.name}")
+
+        if storage.DB_PATH.exists():
+            pre = snapshot(keep=BACKUP_KEEP + 1, label="pre-restore")
+            print(f"[BACKUP] Estado atual salvo em {pre['name']}")
+        storage.close_db()
+        # backup() para o arquivo vivo (e não cópia por cima): WAL e locks
+        # continuam coerentes
+        _copy_db(raw, storage.DB_PATH, pages=-1, sleep=0)
+    finally:
+        raw.unlink(missing_ok=True)
+
+    # Snapshot pode ser de um schema mais antigo: close_db() zerou o
+    # ensure_db, então as migrações rodam de novo aqui
+    storage.ensure_db()
+    print(f"[BACKUP] Banco restaurado de {path.name}")
+    return path.name
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+IRIS - Bootstrap
+Inicialização explícita da aplicação. Importar os módulos não tem efeito
+colateral (diretórios, banco, imports pesados como openai/ddgs/requests);
+quem sobe o bot chama bootstrap() uma vez.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent
+
+# Módulos do projeto (destacados no relatório de import)
+LOCAL_MODULES = ("bot", "storage", "astorage", "migrations", "backup", "config", "bootstrap", "tools",
+                 "router", "intents", "context", "chat_queue")
+
+
+# ============================================================
+# BOOTSTRAP
+# ============================================================
+
+def bootstrap():
+    """Cria os diretórios de trabalho e deixa o banco pronto (migrações).
+    Retorna o tempo gasto em segundos."""
+    import config
+    import storage
+
+    t0 = time.perf_counter()
+    config.ensure_dirs()
+    storage.ensure_db()
+    elapsed = time.perf_counter() - t0
+    print(f"[BOOT] diretorios + banco em {elapsed * 1000:.0f}ms")
+    return elapsed
+
+
+# ============================================================
+# IMPORT PROFILE (-X importtime)
+# ============================================================
+
+def _parse_importtime(stderr):
+    """Linhas de -X importtime -> [(modulo, self_us, cumulativo_us, profundidade)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # cabeçalho
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return rows
+
+
+def import_profile(module="bot", top=15):
+    """Importa `module` num processo novo com -X importtime e imprime o
+    resumo: tempo total, pacotes de topo mais caros e módulos do projeto."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SRC_DIR), os.getenv("PYTHONPATH")]))}
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=SRC_DIR, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    rows = _parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        errors = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        print(f"[IMPORT] falhou ao importar {module}:\n" + "\n".join(errors[-5:]))
+        return rows
+
+    roots = sorted((r for r in rows if r[3] == 0), key=lambda r: -r[2])
+    total = sum(r[2] for r in roots)
+    print(f"[IMPORT] import {module}: {total / 1000:.0f}ms em imports, "
+          f"{len(rows)} modulos (processo: {wall * 1000:.0f}ms)")
+    print(f"{'cumulativo':>12} {'proprio':>10}  pacote")
+    for name, self_us, cum_us, _ in roots[:top]:
+        print(f"{cum_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {name}")
+
+    local = [r for r in rows if r[0].split(".")[0] in LOCAL_MODULES]
+    if local:
+        print("Projeto:")
+        for name, self_us, cum_us, _ in sorted(local, key=lambda r: -r[2])[:top]:
+            print(f"{cum_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {name}")
+    return rows
@@ -8,18 +8,20 @@ Deploy: Render.com Background Worker
 
 import os
 import re
+import time
+import asyncio
 import json
 import logging
 import warnings
 from datetime import datetime, timedelta, time as dt_time
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 
 warnings.filterwarnings("ignore")
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
-import requests as http_requests
-from openai import OpenAI
 from telegram import Update
+from telegram.error import RetryAfter
 from telegram.ext import (
     Application, CommandHandler, MessageHandler,
     ContextTypes, CallbackContext, filters,
@@ -29,33 +31,39 @@ from telegram.ext import (
 import sys
 sys.path.append("src")
 import storage
+import astorage
+import backup
+from bootstrap import bootstrap, import_profile
 from config import (
     DEEPSEEK_API_KEY, DEEPSEEK_MODEL, DEEPSEEK_BASE_URL,
     TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID,
     GITHUB_TOKEN, GMAIL_EMAIL,
     BRT, DATA_DIR, WS_UPLOADS,
     MAX_HISTORY, MAX_LLM_ROUNDS, MAX_TOKENS, TEMPERATURE,
-    MAX_FILE_SIZE
+    MAX_FILE_SIZE, LLM_TIMEOUT, LLM_MAX_RETRIES,
+    TOOL_WORKERS, TOOL_TIMEOUT,
+    LLM_STREAMING, STREAM_EDIT_INTERVAL, TELEGRAM_MAX_MSG,
+    TOOL_ROUTING, FAST_INTENTS,
+    SUMMARY_KEEP, SUMMARY_BATCH, SUMMARY_MAX_TOKENS,
+    CHAT_QUEUE_MODE, CONCURRENT_UPDATES
 )
-from tools import (
-    fn_web_search, fn_web_news, fn_reddit,
-    fn_read_emails,
-    fn_github_list_repos, fn_github_repo_info, fn_github_list_issues,
-    fn_github_create_issue, fn_github_get_file, fn_github_create_or_update_file,
-    fn_github_list_commits, fn_github_list_prs, fn_github_activity,
-    fn_generate_image,
-    fn_create_file, fn_read_file, fn_list_workspace,
-    fn_run_python, fn_run_bash,
-    fn_list_received_files, fn_read_received_file, fn_get_file_path,
-    fn_add_task, fn_list_tasks, fn_complete_task,
-    fn_add_goal, fn_list_goals,
-    fn_add_journal, fn_view_journal,
-    fn_log_exercise, fn_log_mood,
-    fn_dashboard, fn_briefing, fn_weekly_review
-)
-
-# DeepSeek client
-client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_BASE_URL)
+from tools import TOOLS, get_tool, tool_schemas, execute_tool
+from router import ToolRouter
+from intents import match_intent
+from context import ContextBuilder
+from chat_queue import ChatQueue
+
+# DeepSeek client (async: uma completion lenta nao trava o event loop do Telegram).
+# Criado no primeiro uso: importar openai pesa no cold start
+_client = None
+
+def llm_client():
+    global _client
+    if _client is None:
+        from openai import AsyncOpenAI
+        _client = AsyncOpenAI(api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_BASE_URL,
+                              timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES)
+    return _client
 
 # Funções temporárias para dados não migrados (arquivos recebidos)
 def load_data(name):
@@ -81,19 +89,89 @@ def now_str(): return datetime.now(BRT).strftime("%Y-%m-%d %H:%M")
 # LLM
 # ============================================================
 
-def chat_simple(system_prompt, user_message, max_tokens=4000):
+async def llm_complete(**kwargs):
+    """Chamada async ao DeepSeek com timeout total (cancelavel pelo event loop)."""
+    return await asyncio.wait_for(
+        llm_client().chat.completions.create(model=DEEPSEEK_MODEL, **kwargs),
+        timeout=LLM_TIMEOUT)
+
+
+async def chat_simple(system_prompt, user_message, max_tokens=4000):
     try:
-        r = client.chat.completions.create(
-            model=DEEPSEEK_MODEL,
+        r = await llm_complete(
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_message},
             ], max_tokens=max_tokens, temperature=TEMPERATURE)
         return r.choices[0].message.content.strip()
+    except asyncio.TimeoutError:
+        return "[ERRO LLM] timeout"
     except Exception as e:
         return f"[ERRO LLM] {e}"
 
 
+async def llm_stream(on_text=None, **kwargs):
+    """Completion em streaming. Chama on_text(texto_acumulado) a cada delta de conteudo
+    e remonta os tool_calls a partir dos deltas. Retorna (content, tool_calls).
+    LLM_TIMEOUT vale para a resposta inteira, nao so para abrir o stream."""
+    content, calls = "", {}
+    async with asyncio.timeout(LLM_TIMEOUT):
+        stream = await llm_client().chat.completions.create(model=DEEPSEEK_MODEL, stream=True, **kwargs)
+        async for chunk in stream:
+            if not chunk.choices: continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content += delta.content
+                if on_text: await on_text(content)
+            for tcd in delta.tool_calls or []:
+                slot = calls.setdefault(tcd.index, {"id": "", "name": "", "arguments": ""})
+                if tcd.id: slot["id"] = tcd.id
+                if tcd.function and tcd.function.name: slot["name"] += tcd.function.name
+                if tcd.function and tcd.function.arguments: slot["arguments"] += tcd.function.arguments
+    from openai.types.chat import ChatCompletionMessageToolCall
+    tool_calls = [
+        ChatCompletionMessageToolCall(id=c["id"], type="function",
+            function={"name": c["name"], "arguments": c["arguments"] or "{}"})
+        for _, c in sorted(calls.items())
+    ]
+    return content, tool_calls
+
+
+# ============================================================
+# MEMORIA (resumo continuo da conversa)
+# ============================================================
+
+SUMMARY_SYSTEM = (
+    "Voce mantem a memoria de longo prazo de um assistente pessoal. "
+    "Atualize o resumo com as novas mensagens: fatos sobre o usuario, decisoes, "
+    "pendencias e preferencias. Descarte conversa casual. Maximo de 12 linhas curtas, em portugues."
+)
+
+_summarizing = set()
+
+
+async def summarize_history(chat_id):
+    """Incorpora ao resumo do chat as mensagens que estao saindo da janela
+    (todas exceto as SUMMARY_KEEP mais recentes, inclusive as que o ring
+    buffer ja arquivou). Roda em background."""
+    if chat_id in _summarizing: return
+    _summarizing.add(chat_id)
+    try:
+        current = await astorage.get_summary(chat_id)
+        rows = await astorage.get_history_to_summarize(current["last_id"], SUMMARY_KEEP, chat_id)
+        if len(rows) < SUMMARY_BATCH: return
+        turns = "\n".join(f"{r['role']}: {r['content'][:600]}" for r in rows)
+        prompt = f"RESUMO ATUAL:\n{current['summary'] or '(vazio)'}\n\nNOVAS MENSAGENS:\n{turns}"
+        summary = await chat_simple(SUMMARY_SYSTEM, prompt, SUMMARY_MAX_TOKENS)
+        if summary.startswith("[ERRO LLM]"):
+            print(f"[MEMORIA] {summary}")
+            return
+        await astorage.save_summary(chat_id, summary, rows[-1]["id"])
+        print(f"[MEMORIA] chat {chat_id}: +{len(rows)} mensagens no resumo ({len(summary)} chars)")
+    finally:
+        _summarizing.discard(chat_id)
+
+
 # ============================================================
 # FILE HANDLING (Telegram uploads/downloads)
 # ============================================================
@@ -133,13 +211,12 @@ async def handle_file_upload(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
         caption = update.message.caption
         if caption:
-            storage.add_to_history("user", f"[Enviou arquivo: {file_name}] {caption}")
+            # iris_handle grava o turno no historico
             context_msg = f"O usuario enviou o arquivo '{file_name}' ({size_str}) e disse: {caption}"
             await update.message.reply_text(msg)
-            update.message.text = context_msg
-            await iris_handle(update, context)
+            chat_queue.submit(update.effective_chat.id, update, context, context_msg)
         else:
-            storage.add_to_history("user", f"[Enviou arquivo: {file_name} ({size_str})]")
+            await astorage.add_to_history("user", f"[Enviou arquivo: {file_name} ({size_str})]", str(update.effective_chat.id))
             await update.message.reply_text(f"{msg}\nO que deseja fazer com ele?")
 
     except Exception as e:
@@ -158,15 +235,15 @@ async def handle_photo_upload(update: Update, context: ContextTypes.DEFAULT_TYPE
         await tg_file.download_to_drive(str(file_path))
 
         size = os.path.getsize(str(file_path))
-        storage.add_to_history("user", f"[Enviou foto: {file_name}]")
 
         caption = update.message.caption
         if caption:
-            storage.add_to_history("user", f"[Foto: {file_name}] {caption}")
+            # iris_handle grava o turno no historico
             await update.message.reply_text(f"Foto recebida: {file_name}")
-            update.message.text = f"O usuario enviou uma foto '{file_name}' e disse: {caption}"
-            await iris_handle(update, context)
+            chat_queue.submit(update.effective_chat.id, update, context,
+                f"O usuario enviou uma foto '{file_name}' e disse: {caption}")
         else:
+            await astorage.add_to_history("user", f"[Enviou foto: {file_name}]", str(update.effective_chat.id))
             await update.message.reply_text(f"Foto recebida: {file_name} ({size:,}b)")
     except Exception as e:
         await update.message.reply_text(f"Erro ao receber foto: {e}")
@@ -176,277 +253,58 @@ async def handle_photo_upload(update: Update, context: ContextTypes.DEFAULT_TYPE
 # IRIS - TOOLS DEFINITION
 # ============================================================
 
-IRIS_TOOLS = [
-    # --- WEB ---
-    {"type": "function", "function": {
-        "name": "pesquisar_web",
-        "description": "Pesquisa na internet.",
-        "parameters": {"type": "object", "properties": {
-            "query": {"type": "string"}}, "required": ["query"]}}},
-    {"type": "function", "function": {
-        "name": "buscar_noticias",
-        "description": "Busca noticias recentes.",
-        "parameters": {"type": "object", "properties": {
-            "query": {"type": "string"},
-            "n": {"type": "integer"}}, "required": ["query"]}}},
-
-    # --- EMAIL ---
-    {"type": "function", "function": {
-        "name": "ler_emails",
-        "description": "Le emails recentes (gmail ou corp).",
-        "parameters": {"type": "object", "properties": {
-            "conta": {"type": "string", "enum": ["gmail", "corp"]},
-            "n": {"type": "integer"}}, "required": ["conta"]}}},
-
-    # --- REDDIT ---
-    {"type": "function", "function": {
-        "name": "ver_reddit",
-        "description": "Posts populares de um subreddit.",
-        "parameters": {"type": "object", "properties": {
-            "subreddit": {"type": "string"}}, "required": ["subreddit"]}}},
-
-    # --- IMAGE ---
-    {"type": "function", "function": {
-        "name": "gerar_imagem",
-        "description": "Gera imagem com IA. Crie prompt detalhado em INGLES.",
-        "parameters": {"type": "object", "properties": {
-            "prompt": {"type": "string", "description": "Prompt em INGLES detalhado"}},
-            "required": ["prompt"]}}},
-
-    # --- CODE ---
-    {"type": "function", "function": {
-        "name": "criar_arquivo_local",
-        "description": "Cria arquivo de codigo no workspace local.",
-        "parameters": {"type": "object", "properties": {
-            "filename": {"type": "string"}, "content": {"type": "string"}},
-            "required": ["filename", "content"]}}},
-    {"type": "function", "function": {
-        "name": "executar_codigo",
-        "description": "Executa codigo Python.",
-        "parameters": {"type": "object", "properties": {
-            "code": {"type": "string"}}, "required": ["code"]}}},
-    {"type": "function", "function": {
-        "name": "executar_comando",
-        "description": "Executa comando shell/bash.",
-        "parameters": {"type": "object", "properties": {
-            "command": {"type": "string"}}, "required": ["command"]}}},
-    {"type": "function", "function": {
-        "name": "ler_arquivo_local",
-        "description": "Le arquivo do workspace local.",
-        "parameters": {"type": "object", "properties": {
-            "filename": {"type": "string"}}, "required": ["filename"]}}},
-    {"type": "function", "function": {
-        "name": "listar_arquivos_local",
-        "description": "Lista arquivos no workspace local.",
-        "parameters": {"type": "object", "properties": {}}}},
-
-    # --- GITHUB ---
-    {"type": "function", "function": {
-        "name": "github_repos",
-        "description": "Lista repositorios do GitHub.",
-        "parameters": {"type": "object", "properties": {
-            "user": {"type": "string", "description": "Username (opcional, default: seu usuario)"}},
-            "required": []}}},
-    {"type": "function", "function": {
-        "name": "github_repo_info",
-        "description": "Informacoes detalhadas de um repositorio.",
-        "parameters": {"type": "object", "properties": {
-            "repo": {"type": "string", "description": "Nome do repo (ex: paide3 ou user/repo)"}},
-            "required": ["repo"]}}},
-    {"type": "function", "function": {
-        "name": "github_issues",
-        "description": "Lista issues de um repositorio.",
-        "parameters": {"type": "object", "properties": {
-            "repo": {"type": "string"},
-            "state": {"type": "string", "enum": ["open", "closed", "all"]}},
-            "required": ["repo"]}}},
-    {"type": "function", "function": {
-        "name": "github_criar_issue",
-        "description": "Cria nova issue em um repositorio.",
-        "parameters": {"type": "object", "properties": {
-            "repo": {"type": "string"},
-            "title": {"type": "string"},
-            "body": {"type": "string"}}, "required": ["repo", "title"]}}},
-    {"type": "function", "function": {
-        "name": "github_ler_arquivo",
-        "description": "Le arquivo ou lista diretorio de um repo GitHub.",
-        "parameters": {"type": "object", "properties": {
-            "repo": {"type": "string"},
-            "path": {"type": "string", "description": "Caminho do arquivo (ex: src/bot.py ou . para raiz)"}},
-            "required": ["repo", "path"]}}},
-    {"type": "function", "function": {
-        "name": "github_editar_arquivo",
-        "description": "Cria ou atualiza arquivo em repositorio GitHub.",
-        "parameters": {"type": "object", "properties": {
-            "repo": {"type": "string"},
-            "path": {"type": "string"},
-            "content": {"type": "string"},
-            "message": {"type": "string", "description": "Mensagem de commit"}},
-            "required": ["repo", "path", "content"]}}},
-    {"type": "function", "function": {
-        "name": "github_commits",
-        "description": "Lista commits recentes de um repositorio.",
-        "parameters": {"type": "object", "properties": {
-            "repo": {"type": "string"},
-            "n": {"type": "integer"}}, "required": ["repo"]}}},
-    {"type": "function", "function": {
-        "name": "github_pull_requests",
-        "description": "Lista pull requests de um repositorio.",
-        "parameters": {"type": "object", "properties": {
-            "repo": {"type": "string"},
-            "state": {"type": "string", "enum": ["open", "closed", "all"]}},
-            "required": ["repo"]}}},
-    {"type": "function", "function": {
-        "name": "github_atividade",
-        "description": "Atividade recente no GitHub (pushes, issues, PRs).",
-        "parameters": {"type": "object", "properties": {}}}},
-
-    # --- TASKS ---
-    {"type": "function", "function": {
-        "name": "adicionar_tarefa",
-        "description": "Adiciona nova tarefa.",
-        "parameters": {"type": "object", "properties": {
-            "texto": {"type": "string"}}, "required": ["texto"]}}},
-    {"type": "function", "function": {
-        "name": "ver_tarefas",
-        "description": "Lista tarefas pendentes e concluidas.",
-        "parameters": {"type": "object", "properties": {}}}},
-    {"type": "function", "function": {
-        "name": "completar_tarefa",
-        "description": "Marca tarefa como concluida.",
-        "parameters": {"type": "object", "properties": {
-            "task_id": {"type": "integer"}}, "required": ["task_id"]}}},
-
-    # --- GOALS ---
-    {"type": "function", "function": {
-        "name": "adicionar_meta",
-        "description": "Adiciona meta semanal.",
-        "parameters": {"type": "object", "properties": {
-            "texto": {"type": "string"}}, "required": ["texto"]}}},
-    {"type": "function", "function": {
-        "name": "ver_metas",
-        "description": "Lista metas da semana.",
-        "parameters": {"type": "object", "properties": {}}}},
-
-    # --- JOURNAL ---
-    {"type": "function", "function": {
-        "name": "registrar_diario",
-        "description": "Adiciona entrada no diario.",
-        "parameters": {"type": "object", "properties": {
-            "texto": {"type": "string"}}, "required": ["texto"]}}},
-    {"type": "function", "function": {
-        "name": "ver_diario",
-        "description": "Mostra diario de hoje.",
-        "parameters": {"type": "object", "properties": {}}}},
-
-    # --- HEALTH ---
-    {"type": "function", "function": {
-        "name": "registrar_treino",
-        "description": "Registra exercicio/treino.",
-        "parameters": {"type": "object", "properties": {
-            "tipo": {"type": "string"}}, "required": ["tipo"]}}},
-    {"type": "function", "function": {
-        "name": "registrar_humor",
-        "description": "Registra humor de 1 (pessimo) a 5 (otimo).",
-        "parameters": {"type": "object", "properties": {
-            "nivel": {"type": "integer"},
-            "nota": {"type": "string"}}, "required": ["nivel"]}}},
-
-    # --- DASHBOARD ---
-    {"type": "function", "function": {
-        "name": "ver_dashboard",
-        "description": "Dashboard completo do dia.",
-        "parameters": {"type": "object", "properties": {}}}},
-    {"type": "function", "function": {
-        "name": "briefing_matinal",
-        "description": "Briefing completo (noticias, emails, reddit, github, tarefas).",
-        "parameters": {"type": "object", "properties": {}}}},
-    {"type": "function", "function": {
-        "name": "review_semanal",
-        "description": "Review da semana com analise.",
-        "parameters": {"type": "object", "properties": {}}}},
-
-    # --- FILES ---
-    {"type": "function", "function": {
-        "name": "listar_arquivos_recebidos",
-        "description": "Lista arquivos que o usuario enviou via Telegram.",
-        "parameters": {"type": "object", "properties": {}}}},
-    {"type": "function", "function": {
-        "name": "ler_arquivo_recebido",
-        "description": "Le conteudo de um arquivo recebido via Telegram.",
-        "parameters": {"type": "object", "properties": {
-            "filename": {"type": "string", "description": "Nome do arquivo"}},
-            "required": ["filename"]}}},
-    {"type": "function", "function": {
-        "name": "enviar_arquivo",
-        "description": "Envia um arquivo do workspace para o usuario no Telegram. Use apos criar ou processar arquivos.",
-        "parameters": {"type": "object", "properties": {
-            "filename": {"type": "string", "description": "Nome do arquivo para enviar"}},
-            "required": ["filename"]}}},
-]
+# Schemas gerados pelo registry (assinatura + docstring das funcoes em src/tools).
+# Com TOOL_ROUTING, cada requisicao usa so o subconjunto escolhido pelo ToolRouter.
+IRIS_TOOLS = tool_schemas([n for n, t in TOOLS.items() if t.group != "meta"])
 
 
 # ============================================================
 # IRIS TOOL EXECUTOR
 # ============================================================
 
-def iris_execute_tool(fn_name, fn_args):
+def iris_execute_tool(fn_name, fn_args, chat_id=""):
     print(f"[IRIS] Tool: {fn_name}({json.dumps(fn_args, ensure_ascii=False)[:100]})")
+    return execute_tool(fn_name, fn_args, chat_id)
+
+
+# Pool limitado para as tools (todas sincronas/bloqueantes)
+_tool_pool = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="iris-tool")
+
+async def iris_run_tool(fn_name, fn_args, chat_id=""):
+    """Executa uma tool no pool com o timeout definido no registry."""
+    t = get_tool(fn_name)
+    timeout = (t.timeout if t else None) or TOOL_TIMEOUT
+    loop = asyncio.get_running_loop()
     try:
-        # Web
-        if fn_name == "pesquisar_web": return fn_web_search(fn_args.get("query", ""))
-        if fn_name == "buscar_noticias": return fn_web_news(fn_args.get("query", ""), fn_args.get("n", 5))
-        # Email
-        if fn_name == "ler_emails": return fn_read_emails(fn_args.get("conta", "gmail"), fn_args.get("n", 5))
-        # Reddit
-        if fn_name == "ver_reddit": return fn_reddit(fn_args.get("subreddit", "technology"))
-        # Image
-        if fn_name == "gerar_imagem":
-            path, url = fn_generate_image(fn_args.get("prompt", ""))
-            return f"IMAGE_PATH={path} IMAGE_URL={url}" if path else f"ERRO: {url}"
-        # Local code
-        if fn_name == "criar_arquivo_local": return fn_create_file(fn_args.get("filename","out.py"), fn_args.get("content",""))
-        if fn_name == "executar_codigo": return fn_run_python(fn_args.get("code", ""))
-        if fn_name == "executar_comando": return fn_run_bash(fn_args.get("command", ""))
-        if fn_name == "ler_arquivo_local": return fn_read_file(fn_args.get("filename", ""))
-        if fn_name == "listar_arquivos_local": return fn_list_workspace()
-        # GitHub
-        if fn_name == "github_repos": return fn_github_list_repos(fn_args.get("user"))
-        if fn_name == "github_repo_info": return fn_github_repo_info(fn_args.get("repo", ""))
-        if fn_name == "github_issues": return fn_github_list_issues(fn_args.get("repo",""), fn_args.get("state","open"))
-        if fn_name == "github_criar_issue": return fn_github_create_issue(fn_args.get("repo",""), fn_args.get("title",""), fn_args.get("body",""))
-        if fn_name == "github_ler_arquivo": return fn_github_get_file(fn_args.get("repo",""), fn_args.get("path","."))
-        if fn_name == "github_editar_arquivo": return fn_github_create_or_update_file(fn_args.get("repo",""), fn_args.get("path",""), fn_args.get("content",""), fn_args.get("message","Update via IRIS"))
-        if fn_name == "github_commits": return fn_github_list_commits(fn_args.get("repo",""), fn_args.get("n",10))
-        if fn_name == "github_pull_requests": return fn_github_list_prs(fn_args.get("repo",""), fn_args.get("state","open"))
-        if fn_name == "github_atividade": return fn_github_activity()
-        # Tasks
-        if fn_name == "adicionar_tarefa": return fn_add_task(fn_args.get("texto", ""))
-        if fn_name == "ver_tarefas": return fn_list_tasks()
-        if fn_name == "completar_tarefa": return fn_complete_task(fn_args.get("task_id", 0))
-        # Goals
-        if fn_name == "adicionar_meta": return fn_add_goal(fn_args.get("texto", ""))
-        if fn_name == "ver_metas": return fn_list_goals()
-        # Journal
-        if fn_name == "registrar_diario": return fn_add_journal(fn_args.get("texto", ""))
-        if fn_name == "ver_diario": return fn_view_journal()
-        # Health
-        if fn_name == "registrar_treino": return fn_log_exercise(fn_args.get("tipo", ""))
-        if fn_name == "registrar_humor": return fn_log_mood(fn_args.get("nivel", 3), fn_args.get("nota", ""))
-        # Dashboard
-        if fn_name == "ver_dashboard": return fn_dashboard()
-        if fn_name == "briefing_matinal": return fn_briefing()
-        if fn_name == "review_semanal": return fn_weekly_review()
-        # Files
-        if fn_name == "listar_arquivos_recebidos": return fn_list_received_files()
-        if fn_name == "ler_arquivo_recebido": return fn_read_received_file(fn_args.get("filename", ""))
-        if fn_name == "enviar_arquivo":
-            path = fn_get_file_path(fn_args.get("filename", ""))
-            if path: return f"SEND_FILE={path}"
-            return f"Arquivo nao encontrado: {fn_args.get('filename', '')}"
-        return f"Funcao desconhecida: {fn_name}"
-    except Exception as e:
-        return f"ERRO em {fn_name}: {e}"
+        return await asyncio.wait_for(
+            loop.run_in_executor(_tool_pool, iris_execute_tool, fn_name, fn_args, chat_id),
+            timeout=timeout)
+    except asyncio.TimeoutError:
+        print(f"[IRIS] Tool timeout: {fn_name} ({timeout}s)")
+        return f"ERRO em {fn_name}: timeout ({timeout}s)"
+
+
+async def iris_run_tool_calls(tool_calls, chat_id=""):
+    """Executa os tool_calls de uma rodada em paralelo.
+    Tools nao concorrentes (escrita) rodam em sequencia, na ordem pedida.
+    Retorna [(tool_call, resultado)] na mesma ordem dos tool_calls."""
+    calls = []
+    for tc in tool_calls:
+        try: fn_args = json.loads(tc.function.arguments)
+        except: fn_args = {}
+        calls.append((tc.function.name, fn_args))
+
+    results = [None] * len(calls)
+    serial = [i for i, (n, _) in enumerate(calls) if get_tool(n) and not get_tool(n).concurrent]
+
+    async def run_one(i):
+        results[i] = await iris_run_tool(*calls[i], chat_id)
+
+    async def run_serial():
+        for i in serial: await run_one(i)
+
+    await asyncio.gather(run_serial(), *(run_one(i) for i in range(len(calls)) if i not in serial))
+    return list(zip(tool_calls, results))
 
 
 # ============================================================
@@ -465,7 +323,7 @@ IRIS_SYSTEM = (
     "- Pesquisa/informacao: use pesquisar_web ou buscar_noticias\n"
     "- Codigo/programa: use criar_arquivo_local + executar_codigo\n"
     "- Imagem: crie prompt DETALHADO em INGLES e use gerar_imagem\n"
-    "- Tarefa/lembrete: use adicionar_tarefa\n"
+    "- Tarefa/lembrete: use adicionar_tarefa (varias de uma vez: adicionar_tarefas; concluir varias: completar_tarefas)\n"
     "- Treino/academia: use registrar_treino\n"
     "- Humor/sentimento: use registrar_humor\n"
     "- Emails: use ler_emails\n"
@@ -473,12 +331,14 @@ IRIS_SYSTEM = (
     "- GitHub repos/codigo: use github_repos, github_ler_arquivo, github_editar_arquivo etc\n"
     "- Review semanal: use review_semanal\n"
     "- Dashboard: use ver_dashboard\n"
+    "- Lembrar algo do passado (diario, conversas antigas, reflexoes): use buscar_memoria\n"
     "- Conversa casual: responda sem ferramentas\n"
     "\n"
     "Para GitHub: o usuario tem repos no GitHub. Use as ferramentas github_* para interagir.\n"
     "Para arquivos: o usuario pode enviar arquivos pelo Telegram. Use listar_arquivos_recebidos "
     "para ver, ler_arquivo_recebido para ler, e enviar_arquivo para enviar de volta.\n"
     "Apos criar arquivos com codigo, SEMPRE use enviar_arquivo para enviar ao usuario.\n"
+    "Se a ferramenta que voce precisa nao estiver disponivel, use mais_ferramentas com o grupo dela.\n"
     "Responda SEMPRE em portugues, conciso e util."
 )
 
@@ -487,48 +347,65 @@ IRIS_SYSTEM = (
 # IRIS MAIN HANDLER
 # ============================================================
 
-async def iris_handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_msg = update.message.text.strip()
+async def iris_handle(update: Update, context: ContextTypes.DEFAULT_TYPE, text=None):
+    user_msg = (update.message.text if text is None else text or "").strip()
     if not user_msg: return
 
-    storage.add_to_history("user", user_msg)
+    chat_id = str(update.effective_chat.id)
+    await astorage.add_to_history("user", user_msg, chat_id)
+
+    # Fast-path: comandos triviais respondidos localmente, sem LLM
+    intent = match_intent(user_msg) if FAST_INTENTS else None
+    if intent:
+        fn_name, fn_args = intent
+        print(f"[INTENT] {user_msg[:60]!r} -> {fn_name}")
+        result = str(await iris_run_tool(fn_name, fn_args, chat_id))
+        await astorage.add_to_history("assistant", result, chat_id)
+        for chunk in split_msg(result):
+            await update.message.reply_text(chunk)
+        return
 
-    history = storage.get_history()
-    messages = [{"role": "system", "content": IRIS_SYSTEM}]
-    for h in history[-10:]:
-        messages.append({"role": h["role"], "content": h["content"]})
-    if not history or history[-1]["content"] != user_msg:
-        messages.append({"role": "user", "content": user_msg})
+    history = await astorage.get_history(MAX_HISTORY, chat_id)
+    ctx = ContextBuilder(IRIS_SYSTEM, history, user_msg, summary=await astorage.get_summary(chat_id))
 
     images_to_send = []
     files_to_send = []
+    streamer = TelegramStreamer(update.message) if LLM_STREAMING else None
+    router = ToolRouter(user_msg, [h["content"] for h in history[-5:-1] if h["role"] == "user"]) \
+        if TOOL_ROUTING else None
 
     for round_n in range(MAX_LLM_ROUNDS):
+        tools = router.schemas() if router else IRIS_TOOLS
+        ctx.reserve_tools(tools)
+        print(f"[CONTEXT] rodada {round_n + 1}: {ctx.stats()}")
+        llm_args = dict(messages=ctx.messages(), tools=tools, tool_choice="auto",
+                        max_tokens=MAX_TOKENS, temperature=TEMPERATURE)
         try:
-            resp = client.chat.completions.create(
-                model=DEEPSEEK_MODEL,
-                messages=messages,
-                tools=IRIS_TOOLS,
-                tool_choice="auto",
-                max_tokens=MAX_TOKENS,
-                temperature=TEMPERATURE,
-            )
+            if streamer:
+                content, tool_calls = await llm_stream(streamer.push, **llm_args)
+            else:
+                resp = await llm_complete(**llm_args)
+                content, tool_calls = resp.choices[0].message.content, resp.choices[0].message.tool_calls
+        except asyncio.TimeoutError:
+            await update.message.reply_text("Erro: o modelo demorou demais para responder, tente novamente.")
+            return
         except Exception as e:
             await update.message.reply_text(f"Erro: {e}")
             return
 
-        msg = resp.choices[0].message
-        if not msg.tool_calls:
-            response = msg.content.strip() if msg.content else ""
+        if not tool_calls:
+            response = content.strip() if content else ""
             if response:
-                storage.add_to_history("assistant", response)
+                await astorage.add_to_history("assistant", response, chat_id)
+                if streamer: await streamer.finish(response)
                 for img_path, img_url in images_to_send:
                     try:
                         if img_path and os.path.exists(img_path):
                             with open(img_path, "rb") as f:
                                 await update.message.reply_photo(photo=f)
                         elif img_url:
-                            r = http_requests.get(img_url, timeout=90)
+                            import requests
+                            r = await asyncio.to_thread(requests.get, img_url, timeout=90)
                             if r.status_code == 200:
                                 await update.message.reply_photo(photo=BytesIO(r.content))
                     except: pass
@@ -543,28 +420,39 @@ async def iris_handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
                                     caption=f"Arquivo: {fname}")
                     except Exception as ef:
                         await update.message.reply_text(f"Erro ao enviar {fpath}: {ef}")
-                for chunk in split_msg(response):
-                    try: await update.message.reply_text(chunk)
-                    except: pass
+                if not streamer:
+                    for chunk in split_msg(response):
+                        try: await update.message.reply_text(chunk)
+                        except: pass
+                context.application.create_task(summarize_history(chat_id))
             return
 
-        messages.append(msg)
-        for tc in msg.tool_calls:
-            fn_name = tc.function.name
-            try: fn_args = json.loads(tc.function.arguments)
-            except: fn_args = {}
-            result = iris_execute_tool(fn_name, fn_args)
+        if streamer: await streamer.finish(content)
+        ctx.add({"role": "assistant", "content": content or "",
+                 "tool_calls": [tc.model_dump() for tc in tool_calls]})
+        if router: router.expand(tool_calls)
+        results = await iris_run_tool_calls(tool_calls, chat_id)
+        for tc, result in results:
             if "IMAGE_PATH=" in str(result):
                 m = re.search(r'IMAGE_PATH=(\S+)\s+IMAGE_URL=(\S+)', str(result))
                 if m: images_to_send.append((m.group(1), m.group(2)))
             if "SEND_FILE=" in str(result):
                 m2 = re.search(r'SEND_FILE=(\S+)', str(result))
                 if m2: files_to_send.append(m2.group(1))
-            messages.append({"role": "tool", "tool_call_id": tc.id, "content": str(result)[:3000]})
+        ctx.add_tool_results([(tc.id, str(result)) for tc, result in results])
 
     await update.message.reply_text("(processamento longo, tente novamente)")
 
 
+# Mensagens do mesmo chat em serie; chats diferentes em paralelo
+chat_queue = ChatQueue(iris_handle, CHAT_QUEUE_MODE)
+
+
+async def iris_enqueue(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not update.message or not update.message.text: return
+    chat_queue.submit(update.effective_chat.id, update, context, update.message.text)
+
+
 # ============================================================
 # POMODORO
 # ============================================================
@@ -572,8 +460,9 @@ async def iris_handle(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def pomodoro_done(context: CallbackContext):
     hoje = today_str()
     task_name = context.job.data or "Foco"
-    storage.add_pomodoro(hoje, task_name, 25)
-    pomodoros_hoje = storage.get_pomodoros(hoje)
+    chat_id = str(context.job.chat_id)
+    await astorage.add_pomodoro(hoje, task_name, 25, chat_id)
+    pomodoros_hoje = await astorage.get_pomodoros(hoje, chat_id)
     await context.bot.send_message(chat_id=context.job.chat_id,
         text=f"POMODORO COMPLETO! Tarefa: {task_name}\nPomodoros hoje: {len(pomodoros_hoje)}")
 
@@ -606,12 +495,12 @@ async def night_thinking(context: CallbackContext):
 - Insights e aprendizados
 Seja breve (3-4 frases), filosófico e construtivo."""
     
-    reflexao = chat_simple("Você é um assistente reflexivo.", prompt, 500)
+    reflexao = await chat_simple("Você é um assistente reflexivo.", prompt, 500)
     
     # Salvar pensamento
-    storage.save_night_thought(hoje, reflexao)
-    
     chat_id = context.job.data
+    await astorage.save_night_thought(hoje, reflexao, str(chat_id))
+    
     await context.bot.send_message(chat_id=chat_id, text=f"🌙 REFLEXÃO NOTURNA\n\n{reflexao}")
 
 
@@ -626,16 +515,16 @@ async def cmd_lembretes(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = str(update.effective_chat.id)
     
     if not context.args:
-        rems = storage.get_active_reminders()
+        rems = await astorage.get_active_reminders(chat_id)
         if not rems:
             await update.message.reply_text("Sem lembretes.\n/lembretes treino 07:00\n/lembretes briefing 07:30\n/lembretes limpar"); return
         msg = "LEMBRETES:\n" + "\n".join(f"  {i}. {r['tipo']} as {r['hora']}" for i, r in enumerate(rems, 1))
         await update.message.reply_text(msg); return
     
     if context.args[0] == "limpar":
-        storage.clear_reminders()
+        await astorage.clear_reminders(chat_id)
         for j in context.job_queue.jobs():
-            if j.name.startswith("rem_"): j.schedule_removal()
+            if j.name.startswith("rem_") and str(j.chat_id) == chat_id: j.schedule_removal()
         await update.message.reply_text("Lembretes removidos."); return
     
     if len(context.args) < 2: await update.message.reply_text("/lembretes [tipo] [HH:MM]"); return
@@ -649,7 +538,7 @@ async def cmd_lembretes(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "briefing": "Bom dia! Diga 'briefing'.", "email": "Confira emails!",
         "noticias": "Noticias disponiveis!"}
     
-    storage.add_reminder(tipo, hora_str, chat_id)
+    await astorage.add_reminder(tipo, hora_str, chat_id)
     context.job_queue.run_daily(send_reminder, time=dt_time(hour=h, minute=m, tzinfo=BRT),
         chat_id=chat_id, name=f"rem_{tipo}_{hora_str}",
         data=msgs.get(tipo, f"Lembrete: {tipo}"))
@@ -671,6 +560,90 @@ def setup_saved_reminders(app):
         except Exception as e: print(f"[LEMBRETE ERRO] {e}")
 
 
+# ============================================================
+# MANUTENCAO
+# ============================================================
+
+async def owner_only(update: Update):
+    """Comandos que mexem no banco inteiro: so o chat do dono (TELEGRAM_CHAT_ID)."""
+    if TELEGRAM_CHAT_ID and str(update.effective_chat.id) == str(TELEGRAM_CHAT_ID):
+        return True
+    await update.message.reply_text("Comando restrito ao dono da IRIS.")
+    return False
+
+
+async def cmd_recalcular(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Recalcula daily_stats e o indice de busca a partir das tabelas brutas."""
+    if not await owner_only(update): return
+    try:
+        dias = await astorage.rebuild_daily_stats()
+        docs = await astorage.rebuild_memory_index()
+        print(f"[STATS] daily_stats recalculada: {dias} dias, indice de busca: {docs} documentos")
+        await update.message.reply_text(f"Recalculado: {dias} dias de estatisticas, {docs} documentos no indice de busca.")
+    except Exception as e:
+        print(f"[STATS] Erro ao recalcular: {e}")
+        await update.message.reply_text(f"Erro ao recalcular: {e}")
+
+
+def fmt_maintenance(rel):
+    arq = ", ".join(f"{t} {n}" for t, n in rel["archived"].items()) or "nada"
+    return (f"Arquivado (antes de {rel['cutoff']}): {arq}\n"
+            f"Banco: {rel['bytes_before'] / 1024:.0f}KB -> {rel['bytes_after'] / 1024:.0f}KB "
+            f"({rel['reclaimed_bytes'] / 1024:+.0f}KB recuperados, vacuum {rel['auto_vacuum']}) "
+            f"em {rel['seconds']}s")
+
+
+async def db_maintenance(context: CallbackContext):
+    """Job diario: retencao, incremental_vacuum e ANALYZE (fora do event loop)."""
+    try:
+        rel = await asyncio.to_thread(storage.run_maintenance)
+        print(f"[MANUT] {fmt_maintenance(rel)}")
+    except Exception as e:
+        print(f"[MANUT] Erro: {e}")
+
+
+async def cmd_manutencao(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Roda a manutencao agora. '/manutencao completa' faz VACUUM completo
+    (necessario uma vez em bancos antigos para ativar o incremental_vacuum)."""
+    if not await owner_only(update): return
+    try:
+        completa = bool(context.args) and context.args[0].lower() == "completa"
+        await update.message.reply_text("Rodando manutencao do banco...")
+        rel = await asyncio.to_thread(storage.run_maintenance, full_vacuum=completa)
+        print(f"[MANUT] {fmt_maintenance(rel)}")
+        await update.message.reply_text(fmt_maintenance(rel))
+    except Exception as e:
+        print(f"[MANUT] Erro: {e}")
+        await update.message.reply_text(f"Erro na manutencao: {e}")
+
+
+def fmt_snapshot(snap):
+    return (f"Snapshot {snap['name']}: {snap['db_bytes'] / 1024:.0f}KB -> {snap['gz_bytes'] / 1024:.0f}KB "
+            f"em {snap['seconds']}s" + (f" ({len(snap['removed'])} antigos apagados)" if snap["removed"] else ""))
+
+
+async def db_backup(context: CallbackContext):
+    """Job diario: snapshot comprimido do banco (copia em lotes, fora do event loop)."""
+    try:
+        snap = await asyncio.to_thread(backup.snapshot)
+        print(f"[BACKUP] {fmt_snapshot(snap)}")
+    except Exception as e:
+        print(f"[BACKUP] Erro: {e}")
+
+
+async def cmd_backup(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Grava um snapshot agora e lista os existentes (restaurar: bot.py --restore)."""
+    if not await owner_only(update): return
+    try:
+        snap = await asyncio.to_thread(backup.snapshot)
+        print(f"[BACKUP] {fmt_snapshot(snap)}")
+        nomes = [p.name for p in backup.list_snapshots()]
+        await update.message.reply_text(fmt_snapshot(snap) + "\n\nSnapshots:\n" + "\n".join(nomes))
+    except Exception as e:
+        print(f"[BACKUP] Erro: {e}")
+        await update.message.reply_text(f"Erro no backup: {e}")
+
+
 # ============================================================
 # TELEGRAM HELPERS
 # ============================================================
@@ -692,6 +665,64 @@ def split_msg(text, max_len=4000):
     return chunks if chunks else [text[:max_len]]
 
 
+class TelegramStreamer:
+    """Mostra uma resposta em streaming editando mensagens do Telegram.
+    Edicoes limitadas a 1 a cada STREAM_EDIT_INTERVAL s; ao passar de max_len
+    a mensagem atual e fechada e o restante continua em uma nova."""
+
+    def __init__(self, message, max_len=TELEGRAM_MAX_MSG, interval=STREAM_EDIT_INTERVAL):
+        self.message = message
+        self.max_len = max_len
+        self.interval = interval
+        self._reset()
+
+    def _reset(self):
+        self.current = None      # mensagem sendo editada
+        self.offset = 0          # caracteres ja fechados em mensagens anteriores
+        self.shown = ""          # texto exibido em self.current
+        self.next_edit = 0.0
+
+    async def push(self, text):
+        if self.current is None:
+            self.current = await self.message.reply_text("...")
+        body = text[self.offset:]
+        while len(body) > self.max_len:
+            cut = self._cut_point(body)
+            await self._edit(body[:cut].strip(), force=True)
+            self.offset += cut
+            body = text[self.offset:]
+            self.current = await self.message.reply_text("...")
+            self.shown = ""
+        await self._edit(body.strip())
+
+    async def finish(self, text):
+        """Exibe o texto completo (sem throttle) e libera o streamer para a proxima rodada."""
+        if text and self.current is not None:
+            await self.push(text)
+            await self._edit(text[self.offset:].strip(), force=True)
+        self._reset()
+
+    def _cut_point(self, body):
+        for sep in ("\n\n", "\n", " "):
+            i = body.rfind(sep, 0, self.max_len)
+            if i > self.max_len // 2: return i + len(sep)
+        return self.max_len
+
+    async def _edit(self, body, force=False):
+        now = time.monotonic()
+        if not body or body == self.shown: return
+        if not force and now < self.next_edit: return
+        try:
+            await self.current.edit_text(body)
+            self.shown = body
+            self.next_edit = now + self.interval
+        except RetryAfter as e:
+            wait = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+            self.next_edit = now + float(wait)
+        except Exception:
+            self.next_edit = now + self.interval
+
+
 # ============================================================
 # MAIN
 # ============================================================
@@ -710,7 +741,8 @@ def main():
     print(f"{datetime.now(BRT):%d/%m/%Y %H:%M:%S}")
     print("=" * 50)
 
-    app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    bootstrap()
+    app = Application.builder().token(TELEGRAM_BOT_TOKEN).concurrent_updates(CONCURRENT_UPDATES).build()
 
     app.add_handler(CommandHandler("start", lambda u, c: u.message.reply_text(
         "=== IRIS v9.1 ===\n"
@@ -729,6 +761,9 @@ def main():
     )))
     app.add_handler(CommandHandler("foco", cmd_foco))
     app.add_handler(CommandHandler("lembretes", cmd_lembretes))
+    app.add_handler(CommandHandler("recalcular", cmd_recalcular))
+    app.add_handler(CommandHandler("manutencao", cmd_manutencao))
+    app.add_handler(CommandHandler("backup", cmd_backup))
     app.add_handler(CommandHandler("status", lambda u, c: u.message.reply_text(
         f"=== IRIS v9.1 (Modular) ===\n{datetime.now(BRT):%d/%m/%Y %H:%M}\n"
         f"LLM: {DEEPSEEK_MODEL}\nImage: FLUX/Pollinations\n"
@@ -736,12 +771,25 @@ def main():
         f"GitHub: {'OK' if GITHUB_TOKEN else 'N/A'}\n"
         f"Chat ID: {u.effective_chat.id}\nOperacional.")))
 
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, iris_handle))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, iris_enqueue))
     app.add_handler(MessageHandler(filters.Document.ALL, handle_file_upload))
     app.add_handler(MessageHandler(filters.PHOTO, handle_photo_upload))
     app.add_error_handler(error_handler)
     setup_saved_reminders(app)
 
+    # Dados de antes do multi-usuario pertencem ao dono do bot
+    if TELEGRAM_CHAT_ID:
+        moved = storage.assign_legacy_rows(TELEGRAM_CHAT_ID)
+        if moved: print(f"[STORAGE] {moved} registros antigos atribuidos ao chat {TELEGRAM_CHAT_ID}")
+
+    # Manutencao do banco depois da reflexao noturna
+    app.job_queue.run_daily(db_maintenance, time=dt_time(hour=4, minute=30, tzinfo=BRT),
+        name="db_maintenance")
+    print(f"[MANUT] Manutencao diaria 4:30 (retencao: {storage.RETENTION_DAYS} dias)")
+    app.job_queue.run_daily(db_backup, time=dt_time(hour=4, minute=45, tzinfo=BRT),
+        name="db_backup")
+    print(f"[BACKUP] Snapshot diario 4:45 (mantem {backup.BACKUP_KEEP})")
+
     target_chat = TELEGRAM_CHAT_ID or None
     if target_chat:
         app.job_queue.run_daily(night_thinking, time=dt_time(hour=3, minute=0, tzinfo=BRT),
@@ -752,6 +800,26 @@ def main():
 
     print(f"\nIRIS v9.1 (Modular) pronta.\n")
     app.run_polling(drop_pending_updates=True)
+    storage.close_db()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="IRIS - bot do Telegram")
+    parser.add_argument("--import-profile", nargs="?", type=int, const=15, metavar="N",
+                        help="mostra o custo de import (-X importtime) dos N pacotes mais caros e sai")
+    parser.add_argument("--backup", action="store_true", help="grava um snapshot do banco e sai")
+    parser.add_argument("--restore", nargs="?", const="", metavar="SNAPSHOT",
+                        help="restaura o banco de um snapshot (sem nome: lista) - com o bot parado")
+    args = parser.parse_args()
+    if args.import_profile:
+        import_profile("bot", args.import_profile)
+    elif args.backup:
+        print(fmt_snapshot(backup.snapshot()))
+    elif args.restore is not None:
+        if args.restore:
+            backup.restore(args.restore)
+        else:
+            print("\n".join(p.name for p in backup.list_snapshots()) or "Nenhum snapshot.")
+        storage.close_db()
+    else:
+        main()
\ No newline at end of file
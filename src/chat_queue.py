@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+IRIS - Chat Queue
+Fila de trabalho por chat: mensagens do mesmo chat sao processadas em serie,
+chats diferentes rodam em paralelo. Mensagem nova pode substituir a anterior.
+"""
+
+import asyncio
+
+# ============================================================
+# MODOS
+# ============================================================
+# queue  - processa todas as mensagens, uma por vez, na ordem
+# cancel - mensagem nova cancela a requisicao em andamento e descarta as
+#          que ainda nao comecaram (so a ultima e respondida)
+# merge  - espera a requisicao atual; as mensagens que chegaram nesse meio
+#          tempo viram uma unica requisicao (textos unidos)
+
+MODES = ("queue", "cancel", "merge")
+
+
+class ChatQueue:
+    def __init__(self, handler, mode="merge"):
+        if mode not in MODES:
+            raise ValueError(f"Modo invalido: {mode} (use {', '.join(MODES)})")
+        self.handler = handler     # async handler(update, context, text)
+        self.mode = mode
+        self._pending = {}         # chat_id -> [(update, context, text)]
+        self._workers = {}         # chat_id -> task do worker
+        self._running = {}         # chat_id -> task da requisicao atual
+
+    def submit(self, chat_id, update, context, text):
+        """Enfileira a mensagem e retorna imediatamente."""
+        self._pending.setdefault(chat_id, []).append((update, context, text))
+        running = self._running.get(chat_id)
+        if self.mode == "cancel" and running and not running.done():
+            print(f"[FILA] chat {chat_id}: requisicao anterior substituida")
+            running.cancel()
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._worker(chat_id))
+
+    def _next(self, chat_id):
+        pending = self._pending[chat_id]
+        if self.mode == "queue" or len(pending) == 1:
+            return pending.pop(0)
+        items, self._pending[chat_id] = pending, []
+        update, context, text = items[-1]
+        if self.mode == "merge":
+            text = "\n".join(t for _, _, t in items)
+            print(f"[FILA] chat {chat_id}: {len(items)} mensagens unidas")
+        return update, context, text
+
+    async def _worker(self, chat_id):
+        try:
+            while self._pending.get(chat_id):
+                update, context, text = self._next(chat_id)
+                task = asyncio.create_task(self.handler(update, context, text))
+                self._running[chat_id] = task
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    if asyncio.current_task().cancelling():
+                        raise  # o proprio worker foi cancelado
+                except Exception as e:
+                    print(f"[FILA ERRO] chat {chat_id}: {e}")
+                finally:
+                    self._running.pop(chat_id, None)
+        finally:
+            self._workers.pop(chat_id, None)
+            self._pending.pop(chat_id, None)
@@ -47,9 +47,11 @@ WS_MARLEY = BASE_DIR / "workspace" / "marley"
 WS_UPLOADS = BASE_DIR / "workspace" / "uploads"
 DATA_DIR = BASE_DIR / "data"
 
-# Criar diretórios se não existirem
-for d in (WS_ROBERTO, WS_CURIOSO, WS_MARLEY, WS_UPLOADS, DATA_DIR):
-    d.mkdir(parents=True, exist_ok=True)
+
+def ensure_dirs():
+    """Cria os diretórios de trabalho (chamado no bootstrap, não no import)"""
+    for d in (WS_ROBERTO, WS_CURIOSO, WS_MARLEY, WS_UPLOADS, DATA_DIR):
+        d.mkdir(parents=True, exist_ok=True)
 
 # ============================================================
 # GITHUB API
@@ -68,11 +70,36 @@ if GITHUB_TOKEN:
 # CONVERSATION SETTINGS
 # ============================================================
 
-MAX_HISTORY = 30
+# Mensagens guardadas por chat (ring buffer do storage; set_history_cap muda por chat)
+# e lidas para o contexto
+MAX_HISTORY = int(os.getenv("IRIS_MAX_HISTORY", "30"))
+HISTORY_MSG_MAX_CHARS = 1000  # cada mensagem e gravada no historico cortada aqui
+SUMMARY_KEEP = 16       # mensagens recentes que ficam fora do resumo
+SUMMARY_BATCH = 6       # minimo de mensagens novas para atualizar o resumo
+SUMMARY_MAX_TOKENS = 400
+
+# Fila por chat (src/chat_queue.py): queue | cancel | merge
+CHAT_QUEUE_MODE = os.getenv("IRIS_CHAT_QUEUE_MODE", "merge")
+CONCURRENT_UPDATES = 16  # updates do Telegram processados em paralelo (chats diferentes)
 MAX_LLM_ROUNDS = 8
 MAX_TOKENS = 4000
 TEMPERATURE = 0.3
 
+# Orcamento do prompt (system + tools + historico + turno), estimado localmente
+PROMPT_BUDGET = int(os.getenv("IRIS_PROMPT_BUDGET", "12000"))
+TOOL_RESULT_MAX_TOKENS = 2500  # teto por resultado de tool
+
+# Streaming da resposta final (edita a mensagem conforme os tokens chegam)
+LLM_STREAMING = os.getenv("IRIS_STREAMING", "1") == "1"
+STREAM_EDIT_INTERVAL = 1.2  # segundos entre edicoes (limite do Telegram)
+TELEGRAM_MAX_MSG = 4000
+
+# Envia ao LLM so os grupos de tools relevantes para a mensagem (src/router.py)
+TOOL_ROUTING = os.getenv("IRIS_TOOL_ROUTING", "1") == "1"
+
+# Comandos triviais ("ver tarefas", "humor 4") resolvidos sem LLM (src/intents.py)
+FAST_INTENTS = os.getenv("IRIS_FAST_INTENTS", "1") == "1"
+
 # ============================================================
 # FILE UPLOAD LIMITS
 # ============================================================
@@ -86,3 +113,25 @@ MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB
 HTTP_TIMEOUT = 15
 IMAGE_TIMEOUT = 120
 CODE_TIMEOUT = 30
+LLM_TIMEOUT = 90  # segundos por completion do DeepSeek
+LLM_MAX_RETRIES = 2
+TOOL_TIMEOUT = 45  # timeout padrao por tool call
+TOOL_WORKERS = 6   # tool calls simultaneas (pool compartilhado)
+
+# ============================================================
+# DATABASE (src/storage.py)
+# ============================================================
+
+# Durabilidade das escritas:
+#   full     - synchronous=FULL, quem escreve espera o commit
+#   normal   - synchronous=NORMAL, quem escreve espera o commit (padrão)
+#   buffered - synchronous=NORMAL; inserts de histórico/eventos não esperam
+#              o commit (podem se perder num crash dentro da janela de flush)
+DB_DURABILITY = os.getenv("IRIS_DB_DURABILITY", "normal")
+
+# Diário, humor, treinos, pomodoros e reflexões mais velhos que isso vão
+# para as tabelas de arquivo na manutenção (storage.run_maintenance)
+RETENTION_DAYS = int(os.getenv("IRIS_RETENTION_DAYS", "365"))
+
+# Snapshots do banco mantidos em data/backups (os mais antigos são apagados)
+BACKUP_KEEP = int(os.getenv("IRIS_BACKUP_KEEP", "14"))
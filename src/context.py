@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+IRIS - Context Builder
+Monta as mensagens do LLM dentro de um orcamento de tokens, por prioridade:
+system prompt > turno atual > resultados de tools > historico recente > antigo
+"""
+
+import json
+import re
+
+from config import PROMPT_BUDGET, TOOL_RESULT_MAX_TOKENS, HISTORY_MSG_MAX_CHARS
+
+# ============================================================
+# TOKEN ESTIMATOR
+# ============================================================
+# Estimativa local (sem tokenizer): cada palavra vale 1 token + 1 a cada
+# 5 caracteres extras, cada pontuacao/simbolo vale 1. Para portugues e
+# codigo fica dentro de ~15% do tokenizer do DeepSeek.
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+MSG_OVERHEAD = 4
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_tokens(text):
+    if not text:
+        return 0
+    return sum(1 + len(p) // 5 if p[0].isalnum() or p[0] == "_" else 1
+               for p in _PIECES.findall(str(text)))
+
+
+def message_tokens(msg):
+    n = MSG_OVERHEAD + estimate_tokens(msg.get("content"))
+    for tc in msg.get("tool_calls") or []:
+        n += estimate_tokens(json.dumps(tc, ensure_ascii=False))
+    return n
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Corta o texto para caber em max_tokens (aproximado)."""
+    text = str(text)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = int(max_tokens * CHARS_PER_TOKEN)
+    while cut > 0 and estimate_tokens(text[:cut]) > max_tokens:
+        cut = int(cut * 0.9)
+    return text[:cut] + "\n[...cortado]"
+
+
+# ============================================================
+# CONTEXT BUILDER
+# ============================================================
+
+class ContextBuilder:
+    """Mantem system prompt, historico e turno atual e gera a lista de
+    mensagens que cabe em `budget` tokens a cada rodada do LLM."""
+
+    def __init__(self, system, history, user_msg, budget=PROMPT_BUDGET, summary=None):
+        self.budget = budget
+        self.system = {"role": "system", "content": system}
+        # Resumo das mensagens antigas; as ja resumidas saem do historico
+        summary = summary or {}
+        self.summary = None
+        if summary.get("summary"):
+            self.summary = {"role": "system",
+                            "content": f"Resumo da conversa anterior: {summary['summary']}"}
+        folded = summary.get("last_id") or 0
+        self.history = [{"role": h["role"], "content": h["content"]} for h in history
+                        if not self.summary or h.get("id", folded + 1) > folded]
+        # O turno atual ja foi gravado no historico (cortado): nao repete
+        last = self.history[-1] if self.history else None
+        if last and last["role"] == "user" and last["content"] == user_msg[:HISTORY_MSG_MAX_CHARS]:
+            self.history.pop()
+        self.turn = [{"role": "user", "content": user_msg}]
+        self.reserve = 0  # tokens ja usados fora das mensagens (schemas das tools)
+
+    def reserve_tools(self, tools):
+        self.reserve = estimate_tokens(json.dumps(tools, ensure_ascii=False)) if tools else 0
+
+    def _fixed_tokens(self):
+        return (self.reserve + message_tokens(self.system)
+                + (message_tokens(self.summary) if self.summary else 0)
+                + sum(message_tokens(m) for m in self.turn))
+
+    def add(self, msg):
+        """Adiciona mensagem do turno atual (assistant com tool_calls, tool...)."""
+        self.turn.append(msg)
+
+    def add_tool_results(self, results):
+        """Adiciona [(tool_call_id, texto)] dividindo o espaco livre entre eles.
+        Resultados tem prioridade sobre o historico."""
+        if not results:
+            return
+        free = self.budget - self._fixed_tokens() - MSG_OVERHEAD * len(results)
+        share = max(200, min(TOOL_RESULT_MAX_TOKENS, free // len(results)))
+        for tc_id, text in results:
+            self.turn.append({"role": "tool", "tool_call_id": tc_id,
+                              "content": truncate_to_tokens(text, share)})
+
+    def messages(self):
+        """system + resumo + historico (mais recente primeiro, ate esgotar) + turno atual."""
+        free = self.budget - self._fixed_tokens()
+        kept = []
+        for msg in reversed(self.history):
+            cost = message_tokens(msg)
+            if cost > free:
+                break
+            kept.append(msg)
+            free -= cost
+        head = [self.system, self.summary] if self.summary else [self.system]
+        return head + kept[::-1] + self.turn
+
+    def stats(self):
+        msgs = self.messages()
+        return (f"{self.reserve + sum(message_tokens(m) for m in msgs)}/{self.budget} tokens, "
+                f"historico {len(msgs) - (2 if self.summary else 1) - len(self.turn)}/{len(self.history)}")
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+IRIS - Fast-path Intents
+Parser local e deterministico para comandos triviais de produtividade
+("ver tarefas", "fiz academia", "humor 4"...). So reconhece a mensagem
+inteira com alta confianca; qualquer outra coisa segue para o LLM.
+"""
+
+import re
+import unicodedata
+
+# ============================================================
+# PADROES
+# ============================================================
+# Casam contra a mensagem normalizada (minusculas, sem acento, sem
+# pontuacao final). Cada padrao -> (tool, funcao que monta os args).
+
+_NUM = r"#?(\d{1,6})"
+
+INTENTS = [
+    # Listagens
+    (r"(ver|mostra|mostrar|listar|lista|minhas)? ?tarefas( pendentes)?", "ver_tarefas", lambda m, raw: {}),
+    (r"(ver|mostra|mostrar|listar|lista|minhas)? ?metas( da semana)?", "ver_metas", lambda m, raw: {}),
+    (r"(ver|mostra|mostrar) (o |meu )?diario( de hoje)?|diario de hoje", "ver_diario", lambda m, raw: {}),
+    (r"(ver |mostra |mostrar |abre |abrir )?(o |meu )?(dashboard|painel)( do dia| de hoje)?", "ver_dashboard", lambda m, raw: {}),
+
+    # Tarefas
+    (r"(nova tarefa|adicionar tarefa|adiciona tarefa|add tarefa)\s*:?\s*(?P<texto>.+)|tarefa\s*:\s*(?P<texto2>.+)",
+     "adicionar_tarefa", lambda m, raw: {"texto": _original(raw, m, "texto" if m.group("texto") else "texto2")}),
+    (r"(concluir|conclui|completar|completei|finalizar|finalizei|feito|feita|fiz a)( a)?( tarefa)? " + _NUM,
+     "completar_tarefa", lambda m, raw: {"task_id": int(m.group(m.lastindex))}),
+
+    # Metas e diario (exigem ':' para nao confundir com conversa)
+    (r"(nova meta|adicionar meta|meta)\s*:\s*(?P<texto>.+)", "adicionar_meta",
+     lambda m, raw: {"texto": _original(raw, m, "texto")}),
+    (r"diario\s*:\s*(?P<texto>.+)", "registrar_diario",
+     lambda m, raw: {"texto": _original(raw, m, "texto")}),
+
+    # Saude
+    (r"(fiz|fui (na|pra|para a)) academia|treinei|malhei", "registrar_treino", lambda m, raw: {"tipo": "academia"}),
+    (r"(fiz|treino( de)?:?|treinei) (?P<tipo>corrida|musculacao|natacao|yoga|pilates|funcional|crossfit|bike|cardio|luta)",
+     "registrar_treino", lambda m, raw: {"tipo": _original(raw, m, "tipo")}),
+    (r"humor\s*:?\s*(?P<nivel>[1-5])(\s*/\s*5)?(\s*[-,:]?\s*(?P<nota>.+))?", "registrar_humor",
+     lambda m, raw: {"nivel": int(m.group("nivel")), "nota": _original(raw, m, "nota") if m.group("nota") else ""}),
+]
+
+_COMPILED = [(re.compile(p), tool_name, build) for p, tool_name, build in INTENTS]
+
+
+# ============================================================
+# MATCH
+# ============================================================
+
+def _normalize(text):
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return re.sub(r"[\s.!]+$", "", text.lower().strip())
+
+
+def _original(raw, m, group):
+    """Texto capturado com acentos/maiusculas da mensagem original."""
+    start, end = m.span(group)
+    return raw[start:end].strip() if len(raw) == len(m.string) else m.group(group).strip()
+
+
+def match_intent(text):
+    """Retorna (tool, args) se a mensagem inteira for um comando trivial, senao None."""
+    if not text or len(text) > 200 or "\n" in text:
+        return None
+    raw = re.sub(r"[\s.!]+$", "", text.strip())
+    norm = _normalize(text)
+    for rx, tool_name, build in _COMPILED:
+        m = rx.fullmatch(norm)
+        if m:
+            return tool_name, build(m, raw)
+    return None
@@ -0,0 +1,665 @@
+# -*- coding: utf-8 -*-
+"""
+IRIS - Migrações do banco
+Schema versionado por PRAGMA user_version: cada migração numerada roda uma
+única vez, e as pendentes são aplicadas juntas numa só transação.
+Para mudar o schema, adicione uma migração no fim de MIGRATIONS (nunca
+edite uma já publicada).
+"""
+
+import sqlite3
+import zlib
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def split_statements(sql):
+    """Separa o script em comandos completos (triggers têm ';' no corpo)"""
+    buf = ""
+    for line in sql.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            if buf.strip().strip(";").strip():
+                yield buf.strip()
+            buf = ""
+    if buf.strip():
+        yield buf.strip()
+
+
+def has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def ensure_column(conn, table, column, decl):
+    """ALTER TABLE ADD COLUMN se a tabela existir e a coluna não. True se alterou."""
+    cols = [r[1] for r in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+    if cols and column not in cols:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+        return True
+    return False
+
+
+# Tabelas particionadas por chat (reminders, summary e settings já nasceram com chat_id)
+CHAT_TABLES = ("conversation_history", "conversation_archive", "diary_entries", "tasks",
+               "mood_entries", "workouts", "pomodoros", "weekly_goals", "night_thoughts")
+
+# Índices substituídos pelos compostos (chat_id, ...)
+_LEGACY_INDEXES = ("idx_diary_date", "idx_tasks_feita", "idx_mood_date", "idx_workouts_date",
+                   "idx_pomodoros_date", "idx_weekly_goals_semana", "idx_night_thoughts_date")
+
+
+# ============================================================
+# 0001 - SCHEMA BASE
+# ============================================================
+# Bancos criados antes do versionamento (user_version 0) podem estar em
+# qualquer estado intermediário: tudo aqui é idempotente.
+
+BASELINE_SQL = """
+-- ============================================================
+-- CONVERSAS (historico.json)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS conversation_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL DEFAULT '',
+    role TEXT NOT NULL,  -- 'user' ou 'assistant'
+    content TEXT NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversation_timestamp ON conversation_history(timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_conversation_chat ON conversation_history(chat_id, id);
+
+-- Mensagens que sairam do ring buffer (conteudo comprimido com zlib)
+CREATE TABLE IF NOT EXISTS conversation_archive (
+    id INTEGER PRIMARY KEY,  -- mesmo id de conversation_history
+    chat_id TEXT NOT NULL DEFAULT '',
+    role TEXT NOT NULL,
+    content BLOB NOT NULL,
+    timestamp DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversation_archive_chat ON conversation_archive(chat_id, id);
+
+-- Tamanho do ring buffer por chat (padrao: config.MAX_HISTORY)
+CREATE TABLE IF NOT EXISTS history_settings (
+    chat_id TEXT PRIMARY KEY,
+    cap INTEGER NOT NULL
+);
+
+-- ============================================================
+-- DIÁRIO (diario.json)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS diary_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,  -- YYYY-MM-DD
+    texto TEXT NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_diary_chat_date ON diary_entries(chat_id, date);
+
+-- ============================================================
+-- TAREFAS (tarefas.json)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL DEFAULT '',
+    texto TEXT NOT NULL,
+    feita BOOLEAN DEFAULT 0,
+    criada_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+    feita_em DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_chat ON tasks(chat_id, feita, criada_em DESC);
+
+-- ============================================================
+-- HUMOR (humor.json)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS mood_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,  -- YYYY-MM-DD
+    nivel INTEGER NOT NULL,  -- 1-5
+    nota TEXT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_mood_chat_date ON mood_entries(chat_id, date);
+
+-- ============================================================
+-- TREINOS (treinos.json)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS workouts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,  -- YYYY-MM-DD
+    tipo TEXT NOT NULL,  -- 'musculação', 'cardio', etc
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_workouts_chat_date ON workouts(chat_id, date);
+
+-- ============================================================
+-- POMODOROS (pomodoros.json)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS pomodoros (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,  -- YYYY-MM-DD
+    tarefa TEXT NOT NULL,
+    minutos INTEGER NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_pomodoros_chat_date ON pomodoros(chat_id, date);
+
+-- ============================================================
+-- METAS SEMANAIS (metas.json)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS weekly_goals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL DEFAULT '',
+    semana TEXT NOT NULL,  -- 'YYYY-WXX' formato ISO
+    texto TEXT NOT NULL,
+    concluida BOOLEAN DEFAULT 0,
+    criada_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+    concluida_em DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_weekly_goals_chat ON weekly_goals(chat_id, semana);
+
+-- ============================================================
+-- PENSAMENTOS NOTURNOS (pensamentos_noturnos.json)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS night_thoughts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,  -- YYYY-MM-DD
+    texto TEXT NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_night_thoughts_chat_date ON night_thoughts(chat_id, date);
+
+-- ============================================================
+-- LEMBRETES (lembretes.json)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo TEXT NOT NULL,
+    hora TEXT NOT NULL,  -- 'HH:MM'
+    chat_id TEXT NOT NULL,
+    ativo BOOLEAN DEFAULT 1,
+    criado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_reminders_ativo ON reminders(ativo, hora);
+
+CREATE INDEX IF NOT EXISTS idx_reminders_chat ON reminders(chat_id, ativo);
+
+-- ============================================================
+-- RESUMO DA CONVERSA (memoria de longo prazo)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS conversation_summary (
+    chat_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    last_id INTEGER NOT NULL,  -- ultimo conversation_history.id incorporado
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================================
+-- ESTATISTICAS DIARIAS (materializada, mantida por triggers)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS daily_stats (
+    date TEXT NOT NULL,
+    chat_id TEXT NOT NULL DEFAULT '',
+    diario INTEGER NOT NULL DEFAULT 0,
+    tarefas_criadas INTEGER NOT NULL DEFAULT 0,
+    tarefas_feitas INTEGER NOT NULL DEFAULT 0,
+    pomodoros INTEGER NOT NULL DEFAULT 0,
+    pomodoro_minutos INTEGER NOT NULL DEFAULT 0,
+    treinos INTEGER NOT NULL DEFAULT 0,
+    ultimo_humor INTEGER,
+    ultimo_humor_nota TEXT,
+    PRIMARY KEY (date, chat_id)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_diary_ins AFTER INSERT ON diary_entries BEGIN
+    INSERT INTO daily_stats (date, chat_id, diario) VALUES (NEW.date, NEW.chat_id, 1)
+    ON CONFLICT(date, chat_id) DO UPDATE SET diario = diario + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_diary_del AFTER DELETE ON diary_entries BEGIN
+    UPDATE daily_stats SET diario = diario - 1 WHERE date = OLD.date AND chat_id = OLD.chat_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_pomodoro_ins AFTER INSERT ON pomodoros BEGIN
+    INSERT INTO daily_stats (date, chat_id, pomodoros, pomodoro_minutos) VALUES (NEW.date, NEW.chat_id, 1, NEW.minutos)
+    ON CONFLICT(date, chat_id) DO UPDATE SET pomodoros = pomodoros + 1,
+        pomodoro_minutos = pomodoro_minutos + NEW.minutos;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_pomodoro_del AFTER DELETE ON pomodoros BEGIN
+    UPDATE daily_stats SET pomodoros = pomodoros - 1, pomodoro_minutos = pomodoro_minutos - OLD.minutos
+    WHERE date = OLD.date AND chat_id = OLD.chat_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_workout_ins AFTER INSERT ON workouts BEGIN
+    INSERT INTO daily_stats (date, chat_id, treinos) VALUES (NEW.date, NEW.chat_id, 1)
+    ON CONFLICT(date, chat_id) DO UPDATE SET treinos = treinos + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_workout_del AFTER DELETE ON workouts BEGIN
+    UPDATE daily_stats SET treinos = treinos - 1 WHERE date = OLD.date AND chat_id = OLD.chat_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_mood_ins AFTER INSERT ON mood_entries BEGIN
+    INSERT INTO daily_stats (date, chat_id, ultimo_humor, ultimo_humor_nota) VALUES (NEW.date, NEW.chat_id, NEW.nivel, NEW.nota)
+    ON CONFLICT(date, chat_id) DO UPDATE SET ultimo_humor = NEW.nivel, ultimo_humor_nota = NEW.nota;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_mood_del AFTER DELETE ON mood_entries BEGIN
+    UPDATE daily_stats SET
+        ultimo_humor = (SELECT nivel FROM mood_entries WHERE chat_id = OLD.chat_id AND date = OLD.date ORDER BY id DESC LIMIT 1),
+        ultimo_humor_nota = (SELECT nota FROM mood_entries WHERE chat_id = OLD.chat_id AND date = OLD.date ORDER BY id DESC LIMIT 1)
+    WHERE date = OLD.date AND chat_id = OLD.chat_id;
+END;
+
+-- Tarefas: criada_em e UTC (CURRENT_TIMESTAMP), feita_em e hora local (isoformat)
+CREATE TRIGGER IF NOT EXISTS trg_stats_task_ins AFTER INSERT ON tasks BEGIN
+    INSERT INTO daily_stats (date, chat_id, tarefas_criadas) VALUES (date(NEW.criada_em, 'localtime'), NEW.chat_id, 1)
+    ON CONFLICT(date, chat_id) DO UPDATE SET tarefas_criadas = tarefas_criadas + 1;
+    INSERT INTO daily_stats (date, chat_id, tarefas_feitas)
+    SELECT substr(NEW.feita_em, 1, 10), NEW.chat_id, 1 WHERE NEW.feita AND NEW.feita_em IS NOT NULL
+    ON CONFLICT(date, chat_id) DO UPDATE SET tarefas_feitas = tarefas_feitas + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_task_upd AFTER UPDATE OF feita, feita_em ON tasks BEGIN
+    UPDATE daily_stats SET tarefas_feitas = tarefas_feitas - 1
+    WHERE OLD.feita AND OLD.feita_em IS NOT NULL AND date = substr(OLD.feita_em, 1, 10) AND chat_id = OLD.chat_id;
+    INSERT INTO daily_stats (date, chat_id, tarefas_feitas)
+    SELECT substr(NEW.feita_em, 1, 10), NEW.chat_id, 1 WHERE NEW.feita AND NEW.feita_em IS NOT NULL
+    ON CONFLICT(date, chat_id) DO UPDATE SET tarefas_feitas = tarefas_feitas + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_task_del AFTER DELETE ON tasks BEGIN
+    UPDATE daily_stats SET tarefas_criadas = tarefas_criadas - 1
+    WHERE date = date(OLD.criada_em, 'localtime') AND chat_id = OLD.chat_id;
+    UPDATE daily_stats SET tarefas_feitas = tarefas_feitas - 1
+    WHERE OLD.feita AND OLD.feita_em IS NOT NULL AND date = substr(OLD.feita_em, 1, 10) AND chat_id = OLD.chat_id;
+END;
+
+-- ============================================================
+-- BUSCA NA MEMORIA (FTS5)
+-- ============================================================
+-- Um indice para todas as fontes. rowid = id * 4 + fonte
+-- (0 diario, 1 conversa, 2 reflexao, 3 tarefa), para os triggers
+-- acharem a linha sem varrer o indice.
+CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(
+    texto,
+    fonte UNINDEXED,
+    ref_id UNINDEXED,
+    date UNINDEXED,
+    chat_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_diary_ins AFTER INSERT ON diary_entries BEGIN
+    INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id)
+    VALUES (NEW.id * 4, NEW.texto, 'diario', NEW.id, NEW.date, NEW.chat_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_diary_upd AFTER UPDATE OF texto ON diary_entries BEGIN
+    UPDATE memory_fts SET texto = NEW.texto WHERE rowid = NEW.id * 4;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_diary_del AFTER DELETE ON diary_entries BEGIN
+    DELETE FROM memory_fts WHERE rowid = OLD.id * 4;
+END;
+
+-- Conversa: a linha continua no indice quando vai para conversation_archive
+CREATE TRIGGER IF NOT EXISTS trg_fts_history_ins AFTER INSERT ON conversation_history BEGIN
+    INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id)
+    VALUES (NEW.id * 4 + 1, NEW.content, 'conversa', NEW.id, date(NEW.timestamp, 'localtime'), NEW.chat_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_history_del AFTER DELETE ON conversation_history
+WHEN NOT EXISTS (SELECT 1 FROM conversation_archive WHERE id = OLD.id) BEGIN
+    DELETE FROM memory_fts WHERE rowid = OLD.id * 4 + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_archive_del AFTER DELETE ON conversation_archive BEGIN
+    DELETE FROM memory_fts WHERE rowid = OLD.id * 4 + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_night_ins AFTER INSERT ON night_thoughts BEGIN
+    INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id)
+    VALUES (NEW.id * 4 + 2, NEW.texto, 'reflexao', NEW.id, NEW.date, NEW.chat_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_night_del AFTER DELETE ON night_thoughts BEGIN
+    DELETE FROM memory_fts WHERE rowid = OLD.id * 4 + 2;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_task_ins AFTER INSERT ON tasks BEGIN
+    INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id)
+    VALUES (NEW.id * 4 + 3, NEW.texto, 'tarefa', NEW.id, date(NEW.criada_em, 'localtime'), NEW.chat_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_task_upd AFTER UPDATE OF texto ON tasks BEGIN
+    UPDATE memory_fts SET texto = NEW.texto WHERE rowid = NEW.id * 4 + 3;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_task_del AFTER DELETE ON tasks BEGIN
+    DELETE FROM memory_fts WHERE rowid = OLD.id * 4 + 3;
+END;
+"""
+
+
+BASELINE_DERIVED_SQL = """
+DELETE FROM daily_stats;
+
+INSERT INTO daily_stats (date, chat_id, diario)
+SELECT date, chat_id, COUNT(*) FROM diary_entries GROUP BY date, chat_id;
+
+INSERT INTO daily_stats (date, chat_id, treinos)
+SELECT date, chat_id, COUNT(*) FROM workouts GROUP BY date, chat_id
+ON CONFLICT(date, chat_id) DO UPDATE SET treinos = excluded.treinos;
+
+INSERT INTO daily_stats (date, chat_id, tarefas_criadas)
+SELECT date(criada_em, 'localtime') AS d, chat_id, COUNT(*) FROM tasks GROUP BY d, chat_id
+ON CONFLICT(date, chat_id) DO UPDATE SET tarefas_criadas = excluded.tarefas_criadas;
+
+INSERT INTO daily_stats (date, chat_id, tarefas_feitas)
+SELECT substr(feita_em, 1, 10) AS d, chat_id, COUNT(*) FROM tasks
+WHERE feita AND feita_em IS NOT NULL GROUP BY d, chat_id
+ON CONFLICT(date, chat_id) DO UPDATE SET tarefas_feitas = excluded.tarefas_feitas;
+
+INSERT INTO daily_stats (date, chat_id, pomodoros, pomodoro_minutos)
+SELECT date, chat_id, COUNT(*), SUM(minutos) FROM pomodoros GROUP BY date, chat_id
+ON CONFLICT(date, chat_id) DO UPDATE SET
+    pomodoros = excluded.pomodoros, pomodoro_minutos = excluded.pomodoro_minutos;
+
+INSERT INTO daily_stats (date, chat_id, ultimo_humor, ultimo_humor_nota)
+SELECT date, chat_id, nivel, nota FROM mood_entries
+WHERE id IN (SELECT MAX(id) FROM mood_entries GROUP BY date, chat_id)
+ON CONFLICT(date, chat_id) DO UPDATE SET
+    ultimo_humor = excluded.ultimo_humor, ultimo_humor_nota = excluded.ultimo_humor_nota;
+
+DELETE FROM memory_fts;
+
+INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id)
+SELECT id * 4, texto, 'diario', id, date, chat_id FROM diary_entries;
+
+INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id)
+SELECT id * 4 + 1, content, 'conversa', id, date(timestamp, 'localtime'), chat_id FROM conversation_history;
+
+INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id)
+SELECT id * 4 + 2, texto, 'reflexao', id, date, chat_id FROM night_thoughts;
+
+INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id)
+SELECT id * 4 + 3, texto, 'tarefa', id, date(criada_em, 'localtime'), chat_id FROM tasks;
+"""
+
+
+def _m0001_baseline(conn):
+    # Colunas novas em tabelas antigas (CREATE TABLE IF NOT EXISTS não altera).
+    # Se alguma tabela ganhou chat_id, índices antigos saem e os triggers
+    # são recriados abaixo já usando chat_id.
+    added = [t for t in CHAT_TABLES if ensure_column(conn, t, "chat_id", "TEXT NOT NULL DEFAULT ''")]
+    if added:
+        for name in _LEGACY_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        print(f"[MIGRACAO] chat_id adicionado em: {', '.join(added)}")
+    
+    for statement in split_statements(BASELINE_SQL):
+        conn.execute(statement)
+    
+    # Tabelas derivadas em banco que já tinha dados. SQL próprio, congelado
+    # no schema desta versão (não usa os rebuilds do storage, que evoluem)
+    for statement in split_statements(BASELINE_DERIVED_SQL):
+        conn.execute(statement)
+    archived = conn.execute(
+        "SELECT id, chat_id, content, date(timestamp, 'localtime') FROM conversation_archive"
+    ).fetchall()
+    conn.executemany(
+        "INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id) VALUES (?, ?, 'conversa', ?, ?, ?)",
+        [(i * 4 + 1, zlib.decompress(content).decode("utf-8"), i, d, chat) for i, chat, content, d in archived]
+    )
+    conn.execute("INSERT INTO memory_fts (memory_fts) VALUES ('optimize')")
+
+
+# ============================================================
+# ARQUIVO (retenção)
+# ============================================================
+# Linhas antigas saem das tabelas quentes para <nome>_archive (mesmo id;
+# texto livre comprimido com zlib). Os triggers de DELETE das tabelas
+# quentes ignoram linhas já arquivadas, então daily_stats e memory_fts
+# continuam cobrindo o histórico inteiro.
+
+ARCHIVE_SQL = """
+CREATE TABLE IF NOT EXISTS diary_archive (
+    id INTEGER PRIMARY KEY,  -- mesmo id de diary_entries
+    chat_id TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    texto BLOB NOT NULL,     -- zlib
+    timestamp DATETIME
+);
+
+CREATE TABLE IF NOT EXISTS mood_archive (
+    id INTEGER PRIMARY KEY,
+    chat_id TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    nivel INTEGER NOT NULL,
+    nota TEXT,
+    timestamp DATETIME
+);
+
+CREATE TABLE IF NOT EXISTS workouts_archive (
+    id INTEGER PRIMARY KEY,
+    chat_id TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    timestamp DATETIME
+);
+
+CREATE TABLE IF NOT EXISTS pomodoros_archive (
+    id INTEGER PRIMARY KEY,
+    chat_id TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    tarefa TEXT NOT NULL,
+    minutos INTEGER NOT NULL,
+    timestamp DATETIME
+);
+
+CREATE TABLE IF NOT EXISTS night_thoughts_archive (
+    id INTEGER PRIMARY KEY,
+    chat_id TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    texto BLOB NOT NULL,     -- zlib
+    timestamp DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_diary_archive_chat_date ON diary_archive(chat_id, date);
+CREATE INDEX IF NOT EXISTS idx_mood_archive_chat_date ON mood_archive(chat_id, date);
+CREATE INDEX IF NOT EXISTS idx_workouts_archive_chat_date ON workouts_archive(chat_id, date);
+CREATE INDEX IF NOT EXISTS idx_pomodoros_archive_chat_date ON pomodoros_archive(chat_id, date);
+CREATE INDEX IF NOT EXISTS idx_night_thoughts_archive_chat_date ON night_thoughts_archive(chat_id, date);
+
+DROP TRIGGER IF EXISTS trg_stats_diary_del;
+CREATE TRIGGER trg_stats_diary_del AFTER DELETE ON diary_entries
+WHEN NOT EXISTS (SELECT 1 FROM diary_archive WHERE id = OLD.id) BEGIN
+    UPDATE daily_stats SET diario = diario - 1 WHERE date = OLD.date AND chat_id = OLD.chat_id;
+END;
+
+DROP TRIGGER IF EXISTS trg_stats_pomodoro_del;
+CREATE TRIGGER trg_stats_pomodoro_del AFTER DELETE ON pomodoros
+WHEN NOT EXISTS (SELECT 1 FROM pomodoros_archive WHERE id = OLD.id) BEGIN
+    UPDATE daily_stats SET pomodoros = pomodoros - 1, pomodoro_minutos = pomodoro_minutos - OLD.minutos
+    WHERE date = OLD.date AND chat_id = OLD.chat_id;
+END;
+
+DROP TRIGGER IF EXISTS trg_stats_workout_del;
+CREATE TRIGGER trg_stats_workout_del AFTER DELETE ON workouts
+WHEN NOT EXISTS (SELECT 1 FROM workouts_archive WHERE id = OLD.id) BEGIN
+    UPDATE daily_stats SET treinos = treinos - 1 WHERE date = OLD.date AND chat_id = OLD.chat_id;
+END;
+
+DROP TRIGGER IF EXISTS trg_stats_mood_del;
+CREATE TRIGGER trg_stats_mood_del AFTER DELETE ON mood_entries
+WHEN NOT EXISTS (SELECT 1 FROM mood_archive WHERE id = OLD.id) BEGIN
+    UPDATE daily_stats SET
+        ultimo_humor = (SELECT nivel FROM mood_entries WHERE chat_id = OLD.chat_id AND date = OLD.date ORDER BY id DESC LIMIT 1),
+        ultimo_humor_nota = (SELECT nota FROM mood_entries WHERE chat_id = OLD.chat_id AND date = OLD.date ORDER BY id DESC LIMIT 1)
+    WHERE date = OLD.date AND chat_id = OLD.chat_id;
+END;
+
+DROP TRIGGER IF EXISTS trg_fts_diary_del;
+CREATE TRIGGER trg_fts_diary_del AFTER DELETE ON diary_entries
+WHEN NOT EXISTS (SELECT 1 FROM diary_archive WHERE id = OLD.id) BEGIN
+    DELETE FROM memory_fts WHERE rowid = OLD.id * 4;
+END;
+
+DROP TRIGGER IF EXISTS trg_fts_night_del;
+CREATE TRIGGER trg_fts_night_del AFTER DELETE ON night_thoughts
+WHEN NOT EXISTS (SELECT 1 FROM night_thoughts_archive WHERE id = OLD.id) BEGIN
+    DELETE FROM memory_fts WHERE rowid = OLD.id * 4 + 2;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_diary_archive_del AFTER DELETE ON diary_archive BEGIN
+    DELETE FROM memory_fts WHERE rowid = OLD.id * 4;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_night_archive_del AFTER DELETE ON night_thoughts_archive BEGIN
+    DELETE FROM memory_fts WHERE rowid = OLD.id * 4 + 2;
+END;
+"""
+
+
+# ============================================================
+# BUSCA POR CHAT
+# ============================================================
+# chat_id é UNINDEXED no FTS: o MATCH percorria os resultados de todos os
+# chats e o filtro vinha depois. chat_key guarda um token por chat
+# ('c' + chat_id, '-' vira 'n': "-100" e "100" não colidem) e a busca casa
+# esse token junto com os termos, dentro do índice.
+
+FTS_CHAT_SQL = """
+CREATE VIRTUAL TABLE memory_fts USING fts5(
+    texto,
+    fonte UNINDEXED,
+    ref_id UNINDEXED,
+    date UNINDEXED,
+    chat_id UNINDEXED,
+    chat_key,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id, chat_key)
+SELECT rowid, texto, fonte, ref_id, date, chat_id, 'c' || replace(chat_id, '-', 'n') FROM memory_fts_old;
+
+DROP TABLE memory_fts_old;
+
+DROP TRIGGER IF EXISTS trg_fts_diary_ins;
+CREATE TRIGGER trg_fts_diary_ins AFTER INSERT ON diary_entries BEGIN
+    INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id, chat_key)
+    VALUES (NEW.id * 4, NEW.texto, 'diario', NEW.id, NEW.date, NEW.chat_id, 'c' || replace(NEW.chat_id, '-', 'n'));
+END;
+
+DROP TRIGGER IF EXISTS trg_fts_history_ins;
+CREATE TRIGGER trg_fts_history_ins AFTER INSERT ON conversation_history BEGIN
+    INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id, chat_key)
+    VALUES (NEW.id * 4 + 1, NEW.content, 'conversa', NEW.id, date(NEW.timestamp, 'localtime'), NEW.chat_id,
+            'c' || replace(NEW.chat_id, '-', 'n'));
+END;
+
+DROP TRIGGER IF EXISTS trg_fts_night_ins;
+CREATE TRIGGER trg_fts_night_ins AFTER INSERT ON night_thoughts BEGIN
+    INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id, chat_key)
+    VALUES (NEW.id * 4 + 2, NEW.texto, 'reflexao', NEW.id, NEW.date, NEW.chat_id, 'c' || replace(NEW.chat_id, '-', 'n'));
+END;
+
+DROP TRIGGER IF EXISTS trg_fts_task_ins;
+CREATE TRIGGER trg_fts_task_ins AFTER INSERT ON tasks BEGIN
+    INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id, chat_key)
+    VALUES (NEW.id * 4 + 3, NEW.texto, 'tarefa', NEW.id, date(NEW.criada_em, 'localtime'), NEW.chat_id,
+            'c' || replace(NEW.chat_id, '-', 'n'));
+END;
+"""
+
+
+def _m0006_fts_chat_key(conn):
+    # legacy_alter_table: o rename não reescreve os triggers que citam
+    # memory_fts (continuam valendo para a tabela nova)
+    conn.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        conn.execute("ALTER TABLE memory_fts RENAME TO memory_fts_old")
+    finally:
+        conn.execute("PRAGMA legacy_alter_table = OFF")
+    for statement in split_statements(FTS_CHAT_SQL):
+        conn.execute(statement)
+
+
+# ============================================================
+# MIGRAÇÕES
+# ============================================================
+# (versão, descrição, SQL ou função(conn))
+
+MIGRATIONS = [
+    (1, "schema base", _m0001_baseline),
+    (2, "remove idx_conversation_timestamp (histórico é lido por id)",
+     "DROP INDEX IF EXISTS idx_conversation_timestamp;"),
+    (3, "índices parciais de tarefas (pendentes, concluídas, prefixo)", """
+DROP INDEX IF EXISTS idx_tasks_chat;
+CREATE INDEX IF NOT EXISTS idx_tasks_chat_criada ON tasks(chat_id, criada_em DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_tasks_pendentes ON tasks(chat_id, criada_em DESC, id DESC) WHERE feita = 0;
+CREATE INDEX IF NOT EXISTS idx_tasks_feitas ON tasks(chat_id, feita_em) WHERE feita = 1;
+CREATE INDEX IF NOT EXISTS idx_tasks_texto ON tasks(chat_id, texto COLLATE NOCASE);
+"""),
+    (4, "arquivo de diário, humor, treinos, pomodoros e reflexões", ARCHIVE_SQL),
+    (5, "índices por data para a retenção (archive_batch)", """
+CREATE INDEX IF NOT EXISTS idx_diary_retention_date ON diary_entries(date);
+CREATE INDEX IF NOT EXISTS idx_mood_retention_date ON mood_entries(date);
+CREATE INDEX IF NOT EXISTS idx_workouts_retention_date ON workouts(date);
+CREATE INDEX IF NOT EXISTS idx_pomodoros_retention_date ON pomodoros(date);
+CREATE INDEX IF NOT EXISTS idx_night_thoughts_retention_date ON night_thoughts(date);
+"""),
+    (6, "token do chat no índice de busca (memory_fts.chat_key)", _m0006_fts_chat_key),
+]
+
+LATEST = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Aplica as migrações pendentes numa transação. Retorna as versões aplicadas."""
+    if schema_version(conn) >= LATEST:
+        return []
+    
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        current = schema_version(conn)  # outro processo pode ter migrado antes do lock
+        applied = []
+        for version, description, step in MIGRATIONS:
+            if version <= current:
+                continue
+            print(f"[MIGRACAO] {version:04d} {description}")
+            if callable(step):
+                step(conn)
+            else:
+                for statement in split_statements(step):
+                    conn.execute(statement)
+            applied.append(version)
+        conn.execute(f"PRAGMA user_version = {LATEST}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+IRIS - Tool Router
+Escolhe localmente quais grupos de ferramentas enviar ao LLM em cada rodada,
+em vez de mandar todas as definicoes (milhares de tokens) a cada mensagem
+"""
+
+import json
+import re
+import unicodedata
+from typing import Literal
+
+from context import estimate_tokens
+from tools import TOOLS, tool, get_tool, tool_groups
+
+# ============================================================
+# KEYWORDS POR GRUPO
+# ============================================================
+# Palavras sem acento. Palavras com 4+ letras casam como prefixo
+# ("pesquis" -> pesquisa, pesquisar); curtas so casam exatas; frases
+# com espaco casam inteiras ("o que e" nao casa em "caso que escolhi").
+
+GROUP_KEYWORDS = {
+    "web": [
+        "pesquis", "busca", "buscar", "procur", "google", "internet", "noticia", "news",
+        "reddit", "site", "link", "cotacao", "preco", "dolar", "clima", "previsao",
+        "quem e", "o que e", "atualidade", "manchete",
+    ],
+    "email": [
+        "email", "e-mail", "mail", "gmail", "inbox", "caixa de entrada", "correio",
+    ],
+    "github": [
+        "github", "repo", "repos", "repositorio", "issue", "commit", "pull request", "pr",
+        "prs", "branch", "paide3",
+    ],
+    "image": [
+        "imagem", "imagens", "desenh", "ilustra", "logo", "wallpaper", "arte", "foto de",
+        "gera uma foto", "retrato",
+    ],
+    "code": [
+        "codigo", "script", "python", "programa", "execut", "rodar", "roda", "bash",
+        "comando", "terminal", "funcao", "bug", "api", "flask", "calcul", "workspace",
+    ],
+    "files": [
+        "arquivo", "anexo", "pdf", "planilha", "csv", "documento", "envia", "enviar",
+        "manda", "mandei", "enviei", "foto",
+    ],
+    "productivity": [
+        "tarefa", "todo", "pendente", "preciso", "lembr", "meta", "metas", "diario",
+        "humor", "treino", "academia", "exercicio", "corrida", "dashboard", "resumo",
+        "semana", "review", "briefing", "bom dia", "pomodoro", "conclu", "fiz", "feito",
+        "anota", "registr", "memoria", "conversamos", "falamos",
+        "escrevi", "anotei", "reflexao",
+    ],
+}
+
+# Grupos que costumam ser usados junto (ex.: criar codigo -> enviar_arquivo)
+GROUP_DEPS = {
+    "code": {"files"},
+    "image": {"files"},
+}
+
+# Mensagens so com estas palavras sao conversa casual: nenhuma tool
+CASUAL_WORDS = {
+    "oi", "ola", "opa", "eai", "e", "ai", "hey", "obrigado", "obrigada", "valeu", "vlw",
+    "tchau", "ok", "blz", "beleza", "show", "top", "sim", "nao", "boa", "noite", "tarde",
+    "kk", "kkk", "haha", "tudo", "bem", "certo", "legal", "massa",
+}
+
+EXPAND_TOOL = "mais_ferramentas"
+
+
+# ============================================================
+# META-TOOL DE EXPANSAO
+# ============================================================
+
+@tool(EXPAND_TOOL, group="meta")
+def fn_more_tools(grupo: Literal["web", "email", "github", "image", "code", "files", "productivity"]):
+    """Libera ferramentas de outro grupo quando as disponiveis nao bastam
+    (web, email, github, image, code, files, productivity).
+    """
+    names = tool_groups().get(grupo, [])
+    return f"Ferramentas liberadas ({grupo}): {', '.join(names)}" if names else f"Grupo desconhecido: {grupo}"
+
+
+# ============================================================
+# ROUTING
+# ============================================================
+
+def _normalize(text):
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return text.lower()
+
+
+def _compile(keywords):
+    phrases = [k for k in keywords if " " in k or "-" in k]
+    prefixes = tuple(k for k in keywords if k not in phrases and len(k) >= 4)
+    exact = {k for k in keywords if k not in phrases and len(k) < 4}
+    # Frases so em limite de palavra: uma regex por grupo
+    phrase_re = re.compile(r"\b(?:" + "|".join(map(re.escape, phrases)) + r")\b") if phrases else None
+    return phrase_re, prefixes, exact
+
+
+_COMPILED = {g: _compile(kws) for g, kws in GROUP_KEYWORDS.items()}
+
+
+def match_groups(text):
+    """Grupos cujas palavras-chave aparecem no texto."""
+    norm = _normalize(text)
+    words = re.findall(r"[a-z0-9]+", norm)
+    found = set()
+    for group, (phrase_re, prefixes, exact) in _COMPILED.items():
+        if (phrase_re and phrase_re.search(norm)) \
+                or any(w in exact or w.startswith(prefixes) for w in words):
+            found.add(group)
+    return found
+
+
+def route(text, recent=()):
+    """Grupos relevantes para a mensagem. Se a mensagem nao indica nenhum
+    (ex.: "e o segundo?"), usa as mensagens recentes do usuario."""
+    groups = match_groups(text)
+    words = re.findall(r"[a-z0-9]+", _normalize(text))
+    if not groups and all(w in CASUAL_WORDS for w in words):
+        return set()
+    if not groups:
+        for prev in reversed(list(recent)):
+            groups = match_groups(prev)
+            if groups: break
+    for g in list(groups):
+        groups |= GROUP_DEPS.get(g, set())
+    return groups
+
+
+class ToolRouter:
+    """Subconjunto de tools de uma requisicao. Expande sozinho quando o
+    modelo pede uma tool fora do subconjunto (ou chama mais_ferramentas)."""
+
+    def __init__(self, text, recent=()):
+        self.groups = route(text, recent)
+        self.all_groups = set(tool_groups()) - {"meta"}
+        self.log("rota")
+
+    def names(self):
+        names = [n for n, t in TOOLS.items() if t.group in self.groups]
+        if not self.all_groups <= self.groups:
+            names.append(EXPAND_TOOL)
+        return names
+
+    def schemas(self):
+        return [TOOLS[n].schema() for n in self.names()]
+
+    def expand(self, tool_calls):
+        """Inclui os grupos pedidos pelo modelo. Retorna os grupos novos."""
+        added = set()
+        for tc in tool_calls:
+            name = tc.function.name
+            if name == EXPAND_TOOL:
+                try: added.add(json.loads(tc.function.arguments).get("grupo", ""))
+                except Exception: pass
+            elif get_tool(name) and get_tool(name).group not in self.groups:
+                added.add(get_tool(name).group)
+        added = (added & self.all_groups) - self.groups
+        if added:
+            self.groups |= added
+            self.log(f"expandido +{','.join(sorted(added))}")
+        return added
+
+    def log(self, event):
+        # Mesma medida do ContextBuilder.reserve_tools
+        full = estimate_tokens(json.dumps([t.schema() for n, t in TOOLS.items() if n != EXPAND_TOOL],
+                                          ensure_ascii=False))
+        used = estimate_tokens(json.dumps(self.schemas(), ensure_ascii=False))
+        print(f"[ROUTER] {event}: grupos={','.join(sorted(self.groups)) or '-'} "
+              f"tools={len(self.names())}/{len(TOOLS) - 1} "
+              f"~{used}/{full} tokens (economia ~{full - used})")
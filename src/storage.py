@@ -3,329 +3,998 @@ IRIS - Storage Layer (SQLite)
 Substitui load_data/save_data por persistência estruturada
 """
 
+import re
+import time
+import atexit
 import sqlite3
 import json
-from datetime import datetime
+import zlib
+import queue
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
 from contextlib import contextmanager
 
+import migrations
+from config import DB_DURABILITY, RETENTION_DAYS, MAX_HISTORY, HISTORY_MSG_MAX_CHARS
+
 # Caminho do banco
 DB_PATH = Path(__file__).parent.parent / "data" / "iris.db"
-DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+# Página padrão de query_tasks
+TASK_PAGE_SIZE = 20
+
+# Group commit: escritas enfileiradas juntas viram uma só transação
+WRITE_BATCH_MAX = 64
+WRITE_FLUSH_MS = 2
+
+# Aplicados em cada conexão nova (journal_mode=WAL persiste no arquivo).
+# auto_vacuum só pega em banco vazio, por isso vem antes do WAL; bancos
+# antigos passam para INCREMENTAL com vacuum_full().
+PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=FULL" if DB_DURABILITY == "full" else "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # ~16MB
+)
+
+# Uma conexão por thread, reaproveitada entre chamadas
+_local = threading.local()
+_all_conns = []
+_all_conns_lock = threading.Lock()
+_generation = 0  # incrementado por close_db(); conexões antigas são refeitas
+
+# Importar o módulo não toca no disco: o diretório e as migrações
+# rodam no primeiro get_db() (por DB_PATH) ou no bootstrap
+_ready_path = None
+_init_lock = threading.RLock()  # reentrante: init_db usa get_db na mesma thread
+_initializing = False
+
+
+def ensure_db():
+    """Garante diretório e schema em dia para DB_PATH (uma vez por processo)"""
+    global _ready_path, _initializing
+    if _ready_path == DB_PATH:
+        return
+    with _init_lock:
+        if _ready_path == DB_PATH or _initializing:
+            return
+        _initializing = True
+        try:
+            cache_clear()  # outro banco (ou recém-migrado): nada do cache vale
+            DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+            init_db()
+            _ready_path = DB_PATH
+        finally:
+            _initializing = False
+
+
+def _connect():
+    conn = sqlite3.connect(str(DB_PATH), timeout=5)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    with _all_conns_lock:
+        _all_conns.append(conn)
+    return conn
+
+
+def _thread_conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != DB_PATH or _local.gen != _generation:
+        conn = _local.conn = _connect()
+        _local.path = DB_PATH
+        _local.gen = _generation
+        _local.depth = 0
+    return conn
 
 
 @contextmanager
 def get_db():
-    """Context manager para conexão SQLite"""
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row
+    """Context manager para conexão SQLite (conexão da thread, reaproveitada).
+    Commit/rollback só no bloco mais externo, então chamadas aninhadas
+    participam da mesma transação."""
+    ensure_db()
+    conn = _thread_conn()
+    _local.depth += 1
     try:
         yield conn
-        conn.commit()
+        if _local.depth == 1:
+            conn.commit()
     except Exception:
-        conn.rollback()
+        if _local.depth == 1:
+            conn.rollback()
         raise
     finally:
-        conn.close()
+        _local.depth -= 1
+
+
+# ============================================================
+# WRITER THREAD / READER POOL
+# ============================================================
+# Todas as escritas passam por uma única thread (sem disputa de lock no
+# SQLite); leituras assíncronas usam um pool pequeno. As funções síncronas
+# continuam funcionando: escrever de outra thread espera o writer.
+# O writer junta o que chegar em WRITE_FLUSH_MS (até WRITE_BATCH_MAX) numa
+# única transação; cada escrita tem seu SAVEPOINT, então um erro não
+# derruba as outras do lote.
+
+READ_WORKERS = 3
+
+reader_pool = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix="iris-db-read")
+_writer = None
+_writer_lock = threading.Lock()
+_last_deferred = None  # último Future de escrita que ninguém esperou (modo buffered)
+write_stats = {"batches": 0, "writes": 0, "errors": 0}
+
+
+class _Writer(threading.Thread):
+    def __init__(self):
+        super().__init__(name="iris-db-writer", daemon=True)
+        self.queue = queue.Queue()
+
+    def run(self):
+        stop = False
+        while not stop:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + WRITE_FLUSH_MS / 1000
+            while len(batch) < WRITE_BATCH_MAX:
+                try:
+                    item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch):
+        batch = [b for b in batch if b[3].set_running_or_notify_cancel()]
+        # Jobs exclusivos (VACUUM) rodam sozinhos e fora de transação, entre
+        # os lotes: as escritas que chegarem enquanto isso esperam na fila
+        group = []
+        for item in batch:
+            if getattr(item[0], "exclusive", False):
+                self._commit_group(group)
+                group = []
+                self._run_exclusive(item)
+            else:
+                group.append(item)
+        self._commit_group(group)
+
+    def _run_exclusive(self, item):
+        fn, args, kwargs, fut = item
+        write_stats["batches"] += 1
+        write_stats["writes"] += 1
+        try:
+            value = fn(*args, **kwargs)
+        except Exception as e:
+            write_stats["errors"] += 1
+            fut.set_exception(e)
+            return
+        invalidate(*getattr(fn, "invalidates", ()))
+        fut.set_result(value)
+
+    def _commit_group(self, batch):
+        if not batch:
+            return
+        results = []
+        try:
+            with get_db() as conn:
+                conn.execute("BEGIN")
+                for fn, args, kwargs, fut in batch:
+                    conn.execute("SAVEPOINT write_item")
+                    try:
+                        results.append((fut, True, fn(*args, **kwargs)))
+                        conn.execute("RELEASE write_item")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write_item")
+                        conn.execute("RELEASE write_item")
+                        results.append((fut, False, e))
+        except Exception as e:
+            # Commit falhou: nada do lote foi gravado
+            results = [(fut, False, e) for _, _, _, fut in batch]
+        # Só depois do commit: quem ler a partir daqui já vê o dado novo
+        for (fn, _, _, _), (_, ok, _) in zip(batch, results):
+            if ok:
+                invalidate(*getattr(fn, "invalidates", ()))
+        write_stats["batches"] += 1
+        write_stats["writes"] += len(results)
+        for fut, ok, value in results:
+            if ok:
+                fut.set_result(value)
+            else:
+                write_stats["errors"] += 1
+                fut.set_exception(value)
+
+
+def submit_write(fn, *args, **kwargs) -> Future:
+    """Agenda fn na thread de escrita e retorna um Future"""
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = _Writer()
+            _writer.start()
+        fut = Future()
+        _writer.queue.put((fn, args, kwargs, fut))
+    return fut
+
+
+def stop_writer():
+    """Processa o que estiver na fila e encerra a thread de escrita"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None and writer.is_alive():
+        writer.queue.put(None)
+        writer.join()
+
+
+def flush():
+    """Espera as escritas buffered pendentes serem gravadas"""
+    fut = _last_deferred
+    if fut is not None and not fut.done() and threading.current_thread() is not _writer:
+        try:
+            fut.result()
+        except Exception:
+            pass
+
+
+def writes(fn=None, *, deferrable=False, invalidates=(), exclusive=False):
+    """Marca função de escrita: sempre executa na thread de escrita.
+    deferrable=True: no modo buffered, quem chama não espera o commit
+    (só para inserts cujo retorno ninguém usa).
+    invalidates: tabelas cujo cache de leitura fica velho após o commit.
+    exclusive=True: roda sozinha, sem a transação do lote (ex.: VACUUM)."""
+    if fn is None:
+        return functools.partial(writes, deferrable=deferrable, invalidates=invalidates, exclusive=exclusive)
+    fn.invalidates = tuple(invalidates)  # lidos pelo writer (astorage envia fn.__wrapped__)
+    fn.exclusive = exclusive
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        global _last_deferred
+        if threading.current_thread() is _writer:
+            return fn(*args, **kwargs)
+        fut = submit_write(fn, *args, **kwargs)
+        if wrapper.deferred:
+            _last_deferred = fut
+            return None
+        return fut.result()
+    wrapper.db_kind = "write"
+    wrapper.deferred = deferrable and DB_DURABILITY == "buffered"
+    return wrapper
+
+
+def reads(fn=None, *, cache=None):
+    """Marca função de leitura (roda em qualquer thread). Antes de ler,
+    espera escritas buffered pendentes (lê o que acabou de escrever).
+    cache="tabela": resultado fica em memória até uma escrita nessa tabela."""
+    if fn is None:
+        return functools.partial(reads, cache=cache)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        flush()
+        if cache is None:
+            return fn(*args, **kwargs)
+        return _cached_call(cache, fn, args, kwargs)
+    wrapper.db_kind = "read"
+    return wrapper
+
+
+# ============================================================
+# CACHE DE LEITURA
+# ============================================================
+# Read-through por tabela, versionado: cada tabela tem um contador que o
+# writer incrementa depois do commit de uma escrita marcada com
+# invalidates=(...). A entrada guarda a versão lida ANTES da consulta, então
+# um resultado que corre com uma escrita nunca fica valendo como novo.
+# Só tabelas pequenas e muito relidas (tarefas, metas, lembretes).
+
+CACHE_MAX_ENTRIES = 256  # por tabela
+
+_cache = {}           # tabela -> {(função, args, kwargs): (versão, valor)}
+_cache_versions = {}  # tabela -> versão
+_cache_lock = threading.Lock()
+cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _copy_result(value):
+    # Quem chama pode alterar a lista/dicts devolvidos; o cache não
+    # (tuplas: query_tasks devolve (tarefas, cursor))
+    if isinstance(value, list):
+        return [_copy_result(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_copy_result(v) for v in value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def _cached_call(table, fn, args, kwargs):
+    key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+    with _cache_lock:
+        version = _cache_versions.get(table, 0)
+        entry = _cache.get(table, {}).get(key)
+        if entry is not None and entry[0] == version:
+            cache_stats["hits"] += 1
+            return _copy_result(entry[1])
+        cache_stats["misses"] += 1
+    value = fn(*args, **kwargs)
+    with _cache_lock:
+        entries = _cache.setdefault(table, {})
+        if len(entries) >= CACHE_MAX_ENTRIES:
+            entries.clear()
+        entries[key] = (version, value)
+    return _copy_result(value)
+
+
+def invalidate(*tables):
+    """Descarta o cache das tabelas (chamado pelo writer após o commit)"""
+    if not tables:
+        return
+    with _cache_lock:
+        for table in tables:
+            _cache_versions[table] = _cache_versions.get(table, 0) + 1
+            _cache.pop(table, None)
+        cache_stats["invalidations"] += len(tables)
+
+
+def cache_clear():
+    """Esvazia o cache inteiro (troca de banco, shutdown)"""
+    with _cache_lock:
+        for table in list(_cache_versions) + list(_cache):
+            _cache_versions[table] = _cache_versions.get(table, 0) + 1
+        _cache.clear()
+
+
+def cache_info():
+    """Contadores do cache e número de entradas por tabela"""
+    with _cache_lock:
+        total = cache_stats["hits"] + cache_stats["misses"]
+        return {
+            **cache_stats,
+            "hit_rate": round(cache_stats["hits"] / total, 3) if total else 0.0,
+            "entries": {t: len(e) for t, e in _cache.items()},
+        }
+
+
+def close_db():
+    """Encerra a thread de escrita e fecha todas as conexões (shutdown).
+    A próxima conexão refaz o ensure_db (o arquivo pode ter sido trocado)."""
+    global _generation, _ready_path
+    stop_writer()
+    cache_clear()
+    _ready_path = None
+    with _all_conns_lock:
+        conns, _all_conns[:] = list(_all_conns), []
+        _generation += 1
+    for conn in conns:
+        try:
+            conn.close()
+        except Exception:
+            pass
 
 
 def init_db():
-    """Inicializa o banco de dados com o schema"""
-    schema_path = Path(__file__).parent.parent / "iris_schema.sql"
-    
+    """Aplica as migrações pendentes (ver migrations.py). Com o banco em
+    dia, custa só a leitura de PRAGMA user_version."""
     try:
         with get_db() as conn:
-            if schema_path.exists():
-                schema_sql = schema_path.read_text(encoding="utf-8")
-                # Executar linha por linha para evitar erros com indices já existentes
-                for statement in schema_sql.split(';'):
-                    statement = statement.strip()
-                    if statement:
-                        try:
-                            conn.execute(statement)
-                        except sqlite3.OperationalError as e:
-                            # Ignorar erros de "already exists"
-                            if "already exists" not in str(e):
-                                raise
-            else:
-                # Schema inline caso o arquivo não exista
-                conn.executescript("""
-                CREATE TABLE IF NOT EXISTS conversation_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_conversation_timestamp ON conversation_history(timestamp DESC);
-                
-                CREATE TABLE IF NOT EXISTS diary_entries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    texto TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_diary_date ON diary_entries(date DESC);
-                
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    texto TEXT NOT NULL,
-                    feita BOOLEAN DEFAULT 0,
-                    criada_em DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    feita_em DATETIME
-                );
-                CREATE INDEX IF NOT EXISTS idx_tasks_feita ON tasks(feita, criada_em DESC);
-                
-                CREATE TABLE IF NOT EXISTS mood_entries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    nivel INTEGER NOT NULL,
-                    nota TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_mood_date ON mood_entries(date DESC);
-                
-                CREATE TABLE IF NOT EXISTS workouts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    tipo TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_workouts_date ON workouts(date DESC);
-                
-                CREATE TABLE IF NOT EXISTS pomodoros (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    tarefa TEXT NOT NULL,
-                    minutos INTEGER NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_pomodoros_date ON pomodoros(date DESC);
-                
-                CREATE TABLE IF NOT EXISTS weekly_goals (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    semana TEXT NOT NULL,
-                    texto TEXT NOT NULL,
-                    concluida BOOLEAN DEFAULT 0,
-                    criada_em DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    concluida_em DATETIME
-                );
-                CREATE INDEX IF NOT EXISTS idx_weekly_goals_semana ON weekly_goals(semana DESC);
-                
-                CREATE TABLE IF NOT EXISTS night_thoughts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    texto TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_night_thoughts_date ON night_thoughts(date DESC);
-                
-                CREATE TABLE IF NOT EXISTS reminders (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tipo TEXT NOT NULL,
-                    hora TEXT NOT NULL,
-                    chat_id TEXT NOT NULL,
-                    ativo BOOLEAN DEFAULT 1,
-                    criado_em DATETIME DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_reminders_ativo ON reminders(ativo, hora);
-            """)
+            applied = migrations.migrate(conn)
     except Exception as e:
-        print(f"[STORAGE] Warning during init_db: {e}")
-        # Continuar mesmo com erro - banco pode já estar inicializado
+        print(f"[STORAGE] Erro ao migrar o banco: {e}")
+        raise
+    if applied:
+        print(f"[STORAGE] Schema na versão {migrations.LATEST} (aplicadas: {applied})")
 
 
 # ============================================================
 # CONVERSATION HISTORY
 # ============================================================
+# Ring buffer por chat: mantém as últimas `cap` mensagens (ordem por id).
+# O corte é um DELETE id <= watermark pelo índice (chat_id, id); as
+# mensagens removidas vão comprimidas para conversation_archive.
 
-def add_to_history(role: str, content: str):
+@writes(deferrable=True)
+def add_to_history(role: str, content: str, chat_id: str = ""):
     """Adiciona mensagem ao histórico"""
+    chat_id = str(chat_id)
     with get_db() as conn:
         conn.execute(
-            "INSERT INTO conversation_history (role, content) VALUES (?, ?)",
-            (role, content[:1000])
+            "INSERT INTO conversation_history (chat_id, role, content) VALUES (?, ?, ?)",
+            (chat_id, role, content[:HISTORY_MSG_MAX_CHARS])
         )
-        # Manter apenas últimas 30 mensagens
+        _trim_history(conn, chat_id, _history_cap(conn, chat_id))
+
+
+def _history_cap(conn, chat_id):
+    row = conn.execute("SELECT cap FROM history_settings WHERE chat_id = ?", (chat_id,)).fetchone()
+    return row["cap"] if row else MAX_HISTORY
+
+
+def _trim_history(conn, chat_id, cap):
+    """Move para o arquivo tudo que passou das `cap` mensagens mais recentes"""
+    row = conn.execute(
+        "SELECT id FROM conversation_history WHERE chat_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+        (chat_id, cap)
+    ).fetchone()
+    if not row:
+        return 0
+    watermark = row["id"]
+    evicted = conn.execute(
+        "SELECT id, role, content, timestamp FROM conversation_history WHERE chat_id = ? AND id <= ?",
+        (chat_id, watermark)
+    ).fetchall()
+    conn.executemany(
+        "INSERT OR REPLACE INTO conversation_archive (id, chat_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+        [(r["id"], chat_id, r["role"], zlib.compress(r["content"].encode("utf-8")), r["timestamp"])
+         for r in evicted]
+    )
+    conn.execute("DELETE FROM conversation_history WHERE chat_id = ? AND id <= ?", (chat_id, watermark))
+    return len(evicted)
+
+
+@writes
+def set_history_cap(chat_id: str, cap: int):
+    """Define quantas mensagens o chat mantém no histórico ativo"""
+    chat_id = str(chat_id)
+    with get_db() as conn:
         conn.execute("""
-            DELETE FROM conversation_history 
-            WHERE id NOT IN (
-                SELECT id FROM conversation_history 
-                ORDER BY timestamp DESC LIMIT 30
-            )
-        """)
+            INSERT INTO history_settings (chat_id, cap) VALUES (?, ?)
+            ON CONFLICT(chat_id) DO UPDATE SET cap = excluded.cap
+        """, (chat_id, cap))
+        return _trim_history(conn, chat_id, cap)
 
 
-def get_history(limit=30):
+@reads
+def get_history(limit=30, chat_id: str = ""):
     """Retorna histórico de conversas"""
     with get_db() as conn:
         rows = conn.execute("""
-            SELECT role, content, datetime(timestamp, 'localtime') as time
+            SELECT id, role, content, datetime(timestamp, 'localtime') as time
             FROM conversation_history 
-            ORDER BY timestamp DESC LIMIT ?
-        """, (limit,)).fetchall()
+            WHERE chat_id = ?
+            ORDER BY id DESC LIMIT ?
+        """, (str(chat_id), limit)).fetchall()
+    
+    return [{"id": r["id"], "role": r["role"], "content": r["content"], "time": r["time"]} 
+            for r in reversed(rows)]
+
+
+@reads
+def get_history_to_summarize(after_id: int, keep: int, chat_id: str = "", limit: int = 100):
+    """Mensagens com id > after_id ainda fora do resumo: as que o ring buffer
+    já moveu para o arquivo (com cap pequeno, saem antes de serem resumidas)
+    e as do histórico ativo exceto as `keep` mais recentes. Até `limit`,
+    das mais antigas para as mais novas."""
+    chat_id = str(chat_id)
+    with get_db() as conn:
+        archived = conn.execute("""
+            SELECT id, role, content FROM conversation_archive
+            WHERE chat_id = ? AND id > ? ORDER BY id LIMIT ?
+        """, (chat_id, after_id, limit)).fetchall()
+        rows = conn.execute("""
+            SELECT id, role, content FROM conversation_history
+            WHERE chat_id = ?1 AND id > ?2 AND id <= (
+                SELECT id FROM conversation_history WHERE chat_id = ?1
+                ORDER BY id DESC LIMIT 1 OFFSET ?3
+            )
+            ORDER BY id LIMIT ?4
+        """, (chat_id, after_id, keep, limit - len(archived))).fetchall()
+    
+    # Arquivadas têm ids menores que as do histórico ativo: a ordem se mantém
+    return [{"id": r["id"], "role": r["role"], "content": zlib.decompress(r["content"]).decode("utf-8")}
+            for r in archived] + \
+           [{"id": r["id"], "role": r["role"], "content": r["content"]} for r in rows]
+
+
+@reads
+def get_archived_history(chat_id: str = "", limit=100, before_id: int = None):
+    """Mensagens arquivadas (descomprimidas), mais antigas primeiro"""
+    with get_db() as conn:
+        rows = conn.execute("""
+            SELECT id, role, content, datetime(timestamp, 'localtime') as time
+            FROM conversation_archive
+            WHERE chat_id = ? AND id < ?
+            ORDER BY id DESC LIMIT ?
+        """, (str(chat_id), before_id or 2**63 - 1, limit)).fetchall()
     
-    return [{"role": r["role"], "content": r["content"], "time": r["time"]} 
+    return [{"id": r["id"], "role": r["role"],
+             "content": zlib.decompress(r["content"]).decode("utf-8"), "time": r["time"]}
             for r in reversed(rows)]
 
 
+# ============================================================
+# CONVERSATION SUMMARY
+# ============================================================
+
+@reads
+def get_summary(chat_id: str):
+    """Retorna o resumo acumulado da conversa de um chat"""
+    with get_db() as conn:
+        row = conn.execute(
+            "SELECT summary, last_id FROM conversation_summary WHERE chat_id = ?",
+            (str(chat_id),)
+        ).fetchone()
+    
+    if row:
+        return {"summary": row["summary"], "last_id": row["last_id"]}
+    return {"summary": "", "last_id": 0}
+
+
+@writes
+def save_summary(chat_id: str, summary: str, last_id: int):
+    """Grava (ou substitui) o resumo acumulado de um chat"""
+    with get_db() as conn:
+        conn.execute("""
+            INSERT INTO conversation_summary (chat_id, summary, last_id) VALUES (?, ?, ?)
+            ON CONFLICT(chat_id) DO UPDATE SET
+                summary = excluded.summary,
+                last_id = excluded.last_id,
+                updated_at = CURRENT_TIMESTAMP
+        """, (str(chat_id), summary, last_id))
+
+
 # ============================================================
 # DIARY
 # ============================================================
 
-def add_diary_entry(date: str, texto: str):
+@writes(deferrable=True)
+def add_diary_entry(date: str, texto: str, chat_id: str = ""):
     """Adiciona entrada no diário"""
     with get_db() as conn:
         conn.execute(
-            "INSERT INTO diary_entries (date, texto) VALUES (?, ?)",
-            (date, texto)
+            "INSERT INTO diary_entries (chat_id, date, texto) VALUES (?, ?, ?)",
+            (str(chat_id), date, texto)
         )
 
 
-def get_diary_entries(date: str):
+@reads
+def get_diary_entries(date: str, chat_id: str = ""):
     """Retorna entradas do diário de uma data"""
     with get_db() as conn:
         rows = conn.execute(
-            "SELECT texto, datetime(timestamp, 'localtime') as time FROM diary_entries WHERE date = ? ORDER BY timestamp",
-            (date,)
+            "SELECT texto, datetime(timestamp, 'localtime') as time FROM diary_entries "
+            "WHERE chat_id = ? AND date = ? ORDER BY id",
+            (str(chat_id), date)
         ).fetchall()
     
     return [{"texto": r["texto"], "time": r["time"]} for r in rows]
 
 
+@reads
+def get_diary_between(start: str, end: str, chat_id: str = ""):
+    """Entradas do diário entre duas datas (inclusive)"""
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT date, texto, datetime(timestamp, 'localtime') as time FROM diary_entries "
+            "WHERE chat_id = ? AND date BETWEEN ? AND ? ORDER BY date, id",
+            (str(chat_id), start, end)
+        ).fetchall()
+    
+    return [{"date": r["date"], "texto": r["texto"], "time": r["time"]} for r in rows]
+
+
 # ============================================================
 # TASKS
 # ============================================================
 
-def add_task(texto: str):
+@writes(invalidates=("tasks",))
+def add_task(texto: str, chat_id: str = ""):
     """Adiciona nova tarefa"""
     with get_db() as conn:
         cursor = conn.execute(
-            "INSERT INTO tasks (texto) VALUES (?)",
-            (texto,)
+            "INSERT INTO tasks (chat_id, texto) VALUES (?, ?)",
+            (str(chat_id), texto)
         )
         return cursor.lastrowid
 
 
-def get_tasks(only_pending=False):
+# Linhas por INSERT multi-VALUES (fica abaixo do limite de parâmetros do SQLite)
+_INSERT_CHUNK = 300
+
+
+def _insert_many(conn, table, columns, rows):
+    """INSERT ... VALUES (...), (...) RETURNING id em blocos. Retorna os ids na ordem."""
+    ids = []
+    marks = "(" + ", ".join("?" * len(columns)) + ")"
+    for i in range(0, len(rows), _INSERT_CHUNK):
+        chunk = rows[i:i + _INSERT_CHUNK]
+        cursor = conn.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([marks] * len(chunk))} RETURNING id",
+            [v for row in chunk for v in row]
+        )
+        ids.extend(sorted(r[0] for r in cursor.fetchall()))
+    return ids
+
+
+@writes(invalidates=("tasks",))
+def add_tasks(textos: list, chat_id: str = ""):
+    """Adiciona várias tarefas de uma vez. Retorna os ids."""
+    with get_db() as conn:
+        return _insert_many(conn, "tasks", ("chat_id", "texto"), [(str(chat_id), t) for t in textos])
+
+
+@reads(cache="tasks")
+def get_tasks(only_pending=False, chat_id: str = ""):
     """Retorna lista de tarefas"""
     with get_db() as conn:
-        query = "SELECT * FROM tasks"
+        query = "SELECT * FROM tasks WHERE chat_id = ?"
         if only_pending:
-            query += " WHERE feita = 0"
+            query += " AND feita = 0"
         query += " ORDER BY criada_em DESC"
         
-        rows = conn.execute(query).fetchall()
+        rows = conn.execute(query, (str(chat_id),)).fetchall()
     
-    return [{
+    return [_task_dict(r) for r in rows]
+
+
+def _task_dict(r):
+    return {
         "id": r["id"],
         "texto": r["texto"],
         "feita": bool(r["feita"]),
         "criada_em": r["criada_em"],
         "feita_em": r["feita_em"]
-    } for r in rows]
+    }
 
 
-def complete_task(task_id: int):
-    """Marca tarefa como concluída"""
+@reads(cache="tasks")
+def query_tasks(status: str = "all", start: str = None, end: str = None, prefix: str = None,
+                limit: int = TASK_PAGE_SIZE, cursor: tuple = None, chat_id: str = ""):
+    """Página de tarefas, mais novas primeiro. Retorna (tarefas, próximo_cursor).
+
+    status: "all", "pending" (índice parcial feita = 0) ou "done"
+    start/end: só concluídas com feita_em entre as datas (inclusive; implica "done")
+    prefix: texto começando com (sem diferenciar maiúsculas)
+    cursor: (criada_em, id) da última tarefa da página anterior; None = início
+    """
+    where, params = ["chat_id = ?"], [str(chat_id)]
+    if start or end:
+        status = "done"
+    if status == "pending":
+        where.append("feita = 0")
+    elif status == "done":
+        where.append("feita = 1")
+    if start:
+        where.append("feita_em >= ?")
+        params.append(start)
+    if end:
+        where.append("feita_em < date(?, '+1 day')")
+        params.append(end)
+    if prefix:
+        where.append("texto LIKE ? ESCAPE '\\'")
+        params.append(re.sub(r"([\\%_])", r"\\\1", prefix) + "%")
+    if cursor:
+        where.append("(criada_em, id) < (?, ?)")
+        params.extend(cursor)
+    
     with get_db() as conn:
-        conn.execute(
-            "UPDATE tasks SET feita = 1, feita_em = ? WHERE id = ?",
-            (datetime.now().isoformat(), task_id)
-        )
+        rows = conn.execute(
+            f"SELECT * FROM tasks WHERE {' AND '.join(where)} "
+            "ORDER BY criada_em DESC, id DESC LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+    
+    tasks = [_task_dict(r) for r in rows[:limit]]
+    next_cursor = (tasks[-1]["criada_em"], tasks[-1]["id"]) if len(rows) > limit else None
+    return tasks, next_cursor
+
+
+@reads(cache="tasks")
+def get_tasks_completed_between(start: str, end: str, chat_id: str = ""):
+    """Tarefas concluídas entre duas datas (inclusive)"""
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT id, texto, feita_em FROM tasks WHERE chat_id = ? AND feita = 1 "
+            "AND feita_em >= ? AND feita_em < date(?, '+1 day') ORDER BY feita_em",
+            (str(chat_id), start, end)
+        ).fetchall()
+    
+    return [{"id": r["id"], "texto": r["texto"], "feita_em": r["feita_em"]} for r in rows]
+
+
+@reads(cache="tasks")
+def count_pending_tasks(chat_id: str = ""):
+    """Número de tarefas pendentes"""
+    with get_db() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE chat_id = ? AND feita = 0", (str(chat_id),)
+        ).fetchone()[0]
+
+
+@writes(invalidates=("tasks",))
+def complete_task(task_id: int, chat_id: str = ""):
+    """Marca tarefa como concluída. Retorna o texto, ou None se não existe
+    ou já estava feita (checagem e update no mesmo statement)."""
+    with get_db() as conn:
+        row = conn.execute(
+            "UPDATE tasks SET feita = 1, feita_em = ? WHERE id = ? AND chat_id = ? AND feita = 0 RETURNING texto",
+            (datetime.now().isoformat(), task_id, str(chat_id))
+        ).fetchone()
+    return row["texto"] if row else None
+
+
+@writes(invalidates=("tasks",))
+def complete_tasks(task_ids: list, chat_id: str = ""):
+    """Conclui várias tarefas num UPDATE. Retorna {id: texto} das que
+    estavam pendentes (ids inexistentes ou já feitos ficam de fora)."""
+    with get_db() as conn:
+        rows = conn.execute(
+            "UPDATE tasks SET feita = 1, feita_em = ? "
+            "WHERE chat_id = ? AND feita = 0 AND id IN (SELECT value FROM json_each(?)) RETURNING id, texto",
+            (datetime.now().isoformat(), str(chat_id), json.dumps([int(i) for i in task_ids]))
+        ).fetchall()
+    return {r["id"]: r["texto"] for r in sorted(rows, key=lambda r: r["id"])}
+
+
+@writes(invalidates=("tasks",))
+def reopen_task(task_id: int, chat_id: str = ""):
+    """Volta tarefa concluída para pendente. Retorna o texto, ou None."""
+    with get_db() as conn:
+        row = conn.execute(
+            "UPDATE tasks SET feita = 0, feita_em = NULL WHERE id = ? AND chat_id = ? AND feita = 1 RETURNING texto",
+            (task_id, str(chat_id))
+        ).fetchone()
+    return row["texto"] if row else None
 
 
 # ============================================================
 # MOOD
 # ============================================================
 
-def add_mood(date: str, nivel: int, nota: str = ""):
+@writes(deferrable=True)
+def add_mood(date: str, nivel: int, nota: str = "", chat_id: str = ""):
     """Registra humor"""
     with get_db() as conn:
         conn.execute(
-            "INSERT INTO mood_entries (date, nivel, nota) VALUES (?, ?, ?)",
-            (date, nivel, nota)
+            "INSERT INTO mood_entries (chat_id, date, nivel, nota) VALUES (?, ?, ?, ?)",
+            (str(chat_id), date, nivel, nota)
         )
 
 
-def get_mood(date: str):
+@reads
+def get_mood(date: str, chat_id: str = ""):
     """Retorna registros de humor de uma data"""
     with get_db() as conn:
         rows = conn.execute(
-            "SELECT nivel, nota FROM mood_entries WHERE date = ? ORDER BY timestamp",
-            (date,)
+            "SELECT nivel, nota FROM mood_entries WHERE chat_id = ? AND date = ? ORDER BY id",
+            (str(chat_id), date)
         ).fetchall()
     
     return [{"nivel": r["nivel"], "nota": r["nota"] or ""} for r in rows]
 
 
+@reads
+def get_mood_between(start: str, end: str, chat_id: str = ""):
+    """Registros de humor entre duas datas (inclusive)"""
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT date, nivel, nota FROM mood_entries "
+            "WHERE chat_id = ? AND date BETWEEN ? AND ? ORDER BY date, id",
+            (str(chat_id), start, end)
+        ).fetchall()
+    
+    return [{"date": r["date"], "nivel": r["nivel"], "nota": r["nota"] or ""} for r in rows]
+
+
 # ============================================================
 # WORKOUTS
 # ============================================================
 
-def add_workout(date: str, tipo: str):
+@writes(deferrable=True)
+def add_workout(date: str, tipo: str, chat_id: str = ""):
     """Registra treino"""
     with get_db() as conn:
         conn.execute(
-            "INSERT INTO workouts (date, tipo) VALUES (?, ?)",
-            (date, tipo)
+            "INSERT INTO workouts (chat_id, date, tipo) VALUES (?, ?, ?)",
+            (str(chat_id), date, tipo)
         )
 
 
-def get_workouts(date: str):
+@reads
+def get_workouts(date: str, chat_id: str = ""):
     """Retorna treinos de uma data"""
     with get_db() as conn:
         rows = conn.execute(
-            "SELECT tipo FROM workouts WHERE date = ? ORDER BY timestamp",
-            (date,)
+            "SELECT tipo FROM workouts WHERE chat_id = ? AND date = ? ORDER BY id",
+            (str(chat_id), date)
         ).fetchall()
     
     return [{"tipo": r["tipo"]} for r in rows]
 
 
+@reads
+def get_workouts_between(start: str, end: str, chat_id: str = ""):
+    """Treinos entre duas datas (inclusive)"""
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT date, tipo FROM workouts WHERE chat_id = ? AND date BETWEEN ? AND ? ORDER BY date, id",
+            (str(chat_id), start, end)
+        ).fetchall()
+    
+    return [{"date": r["date"], "tipo": r["tipo"]} for r in rows]
+
+
+@reads
+def count_workouts_between(start: str, end: str, chat_id: str = ""):
+    """Número de treinos entre duas datas (inclusive)"""
+    with get_db() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM workouts WHERE chat_id = ? AND date BETWEEN ? AND ?",
+            (str(chat_id), start, end)
+        ).fetchone()[0]
+
+
 # ============================================================
 # POMODOROS
 # ============================================================
 
-def add_pomodoro(date: str, tarefa: str, minutos: int):
+@writes(deferrable=True)
+def add_pomodoro(date: str, tarefa: str, minutos: int, chat_id: str = ""):
     """Registra pomodoro"""
     with get_db() as conn:
         conn.execute(
-            "INSERT INTO pomodoros (date, tarefa, minutos) VALUES (?, ?, ?)",
-            (date, tarefa, minutos)
+            "INSERT INTO pomodoros (chat_id, date, tarefa, minutos) VALUES (?, ?, ?, ?)",
+            (str(chat_id), date, tarefa, minutos)
         )
 
 
-def get_pomodoros(date: str):
+@reads
+def get_pomodoros(date: str, chat_id: str = ""):
     """Retorna pomodoros de uma data"""
     with get_db() as conn:
         rows = conn.execute(
-            "SELECT tarefa, minutos FROM pomodoros WHERE date = ? ORDER BY timestamp",
-            (date,)
+            "SELECT tarefa, minutos FROM pomodoros WHERE chat_id = ? AND date = ? ORDER BY id",
+            (str(chat_id), date)
         ).fetchall()
     
     return [{"tarefa": r["tarefa"], "minutos": r["minutos"]} for r in rows]
 
 
+@reads
+def get_pomodoros_between(start: str, end: str, chat_id: str = ""):
+    """Pomodoros entre duas datas (inclusive)"""
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT date, tarefa, minutos FROM pomodoros "
+            "WHERE chat_id = ? AND date BETWEEN ? AND ? ORDER BY date, id",
+            (str(chat_id), start, end)
+        ).fetchall()
+    
+    return [{"date": r["date"], "tarefa": r["tarefa"], "minutos": r["minutos"]} for r in rows]
+
+
+# ============================================================
+# DAILY STATS
+# ============================================================
+# daily_stats é mantida pelos triggers do schema (uma linha por dia e chat);
+# rebuild_daily_stats recalcula tudo a partir das tabelas brutas.
+
+_DAILY_STATS_FIELDS = ("diario", "tarefas_criadas", "tarefas_feitas", "pomodoros",
+                       "pomodoro_minutos", "treinos", "ultimo_humor", "ultimo_humor_nota")
+
+
+def _stats_row(date, r=None):
+    stats = {"date": date, **{f: 0 for f in _DAILY_STATS_FIELDS[:6]},
+             "ultimo_humor": None, "ultimo_humor_nota": ""}
+    if r:
+        stats.update({f: r[f] for f in _DAILY_STATS_FIELDS})
+        stats["ultimo_humor_nota"] = r["ultimo_humor_nota"] or ""
+    return stats
+
+
+@reads
+def get_daily_stats(date: str, chat_id: str = ""):
+    """Estatísticas de um dia (zeros se não houver registro)"""
+    with get_db() as conn:
+        r = conn.execute(
+            "SELECT * FROM daily_stats WHERE date = ? AND chat_id = ?", (date, str(chat_id))
+        ).fetchone()
+    return _stats_row(date, r)
+
+
+@reads
+def get_daily_stats_between(start: str, end: str, chat_id: str = ""):
+    """Estatísticas dos dias entre start e end (inclusive) que têm registro"""
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT * FROM daily_stats WHERE chat_id = ? AND date BETWEEN ? AND ? ORDER BY date",
+            (str(chat_id), start, end)
+        ).fetchall()
+    return [_stats_row(r["date"], r) for r in rows]
+
+
+def _with_archive(conn, table, columns):
+    """Tabela quente + seu arquivo (se já existir), para os rebuilds"""
+    archive = ARCHIVES[table][0]
+    if not migrations.has_table(conn, archive):
+        return table
+    return f"(SELECT {columns} FROM {table} UNION ALL SELECT {columns} FROM {archive})"
+
+
+def _rebuild_daily_stats(conn):
+    conn.execute("DELETE FROM daily_stats")
+    diary = _with_archive(conn, "diary_entries", "date, chat_id")
+    workouts = _with_archive(conn, "workouts", "date, chat_id")
+    pomodoros = _with_archive(conn, "pomodoros", "date, chat_id, minutos")
+    mood = _with_archive(conn, "mood_entries", "id, date, chat_id, nivel, nota")
+    sources = [
+        ("diario", f"SELECT date, chat_id, COUNT(*) FROM {diary} GROUP BY date, chat_id"),
+        ("treinos", f"SELECT date, chat_id, COUNT(*) FROM {workouts} GROUP BY date, chat_id"),
+        ("tarefas_criadas", "SELECT date(criada_em, 'localtime') AS d, chat_id, COUNT(*) FROM tasks "
+                            "GROUP BY d, chat_id"),
+        ("tarefas_feitas", "SELECT substr(feita_em, 1, 10) AS d, chat_id, COUNT(*) FROM tasks "
+                           "WHERE feita AND feita_em IS NOT NULL GROUP BY d, chat_id"),
+    ]
+    for field, select in sources:
+        conn.execute(f"""
+            INSERT INTO daily_stats (date, chat_id, {field}) SELECT * FROM ({select}) WHERE true
+            ON CONFLICT(date, chat_id) DO UPDATE SET {field} = excluded.{field}
+        """)
+    conn.execute(f"""
+        INSERT INTO daily_stats (date, chat_id, pomodoros, pomodoro_minutos)
+        SELECT date, chat_id, COUNT(*), SUM(minutos) FROM {pomodoros} GROUP BY date, chat_id
+        ON CONFLICT(date, chat_id) DO UPDATE SET
+            pomodoros = excluded.pomodoros, pomodoro_minutos = excluded.pomodoro_minutos
+    """)
+    conn.execute(f"""
+        INSERT INTO daily_stats (date, chat_id, ultimo_humor, ultimo_humor_nota)
+        SELECT date, chat_id, nivel, nota FROM {mood}
+        WHERE id IN (SELECT MAX(id) FROM {mood} GROUP BY date, chat_id)
+        ON CONFLICT(date, chat_id) DO UPDATE SET
+            ultimo_humor = excluded.ultimo_humor, ultimo_humor_nota = excluded.ultimo_humor_nota
+    """)
+    return conn.execute("SELECT COUNT(*) FROM daily_stats").fetchone()[0]
+
+
+@writes
+def rebuild_daily_stats():
+    """Recalcula daily_stats do zero. Retorna o número de linhas (dia x chat)."""
+    with get_db() as conn:
+        return _rebuild_daily_stats(conn)
+
+
 # ============================================================
 # WEEKLY GOALS
 # ============================================================
 
-def add_weekly_goal(semana: str, texto: str):
+@writes(invalidates=("weekly_goals",))
+def add_weekly_goal(semana: str, texto: str, chat_id: str = ""):
     """Adiciona meta semanal"""
     with get_db() as conn:
         cursor = conn.execute(
-            "INSERT INTO weekly_goals (semana, texto) VALUES (?, ?)",
-            (semana, texto)
+            "INSERT INTO weekly_goals (chat_id, semana, texto) VALUES (?, ?, ?)",
+            (str(chat_id), semana, texto)
         )
         return cursor.lastrowid
 
 
-def get_weekly_goals(semana: str):
+@writes(invalidates=("weekly_goals",))
+def add_weekly_goals(semana: str, textos: list, chat_id: str = ""):
+    """Adiciona várias metas à semana. Retorna os ids."""
+    with get_db() as conn:
+        return _insert_many(conn, "weekly_goals", ("chat_id", "semana", "texto"),
+                            [(str(chat_id), semana, t) for t in textos])
+
+
+@reads(cache="weekly_goals")
+def get_weekly_goals(semana: str, chat_id: str = ""):
     """Retorna metas de uma semana"""
     with get_db() as conn:
         rows = conn.execute(
-            "SELECT id, texto, concluida FROM weekly_goals WHERE semana = ? ORDER BY criada_em",
-            (semana,)
+            "SELECT id, texto, concluida FROM weekly_goals WHERE chat_id = ? AND semana = ? ORDER BY id",
+            (str(chat_id), semana)
         ).fetchall()
     
     return [{
@@ -335,33 +1004,40 @@ def get_weekly_goals(semana: str):
     } for r in rows]
 
 
-def complete_weekly_goal(goal_id: int):
-    """Marca meta como concluída"""
+@writes(invalidates=("weekly_goals",))
+def complete_weekly_goal(goal_id: int, chat_id: str = ""):
+    """Marca meta como concluída. Retorna o texto, ou None se não existe
+    ou já estava concluída."""
     with get_db() as conn:
-        conn.execute(
-            "UPDATE weekly_goals SET concluida = 1, concluida_em = ? WHERE id = ?",
-            (datetime.now().isoformat(), goal_id)
-        )
+        row = conn.execute(
+            "UPDATE weekly_goals SET concluida = 1, concluida_em = ? "
+            "WHERE id = ? AND chat_id = ? AND concluida = 0 RETURNING texto",
+            (datetime.now().isoformat(), goal_id, str(chat_id))
+        ).fetchone()
+    return row["texto"] if row else None
 
 
 # ============================================================
 # NIGHT THOUGHTS
 # ============================================================
 
-def save_night_thought(date: str, texto: str):
+@writes(deferrable=True)
+def save_night_thought(date: str, texto: str, chat_id: str = ""):
     """Salva pensamento noturno"""
     with get_db() as conn:
         conn.execute(
-            "INSERT INTO night_thoughts (date, texto) VALUES (?, ?)",
-            (date, texto)
+            "INSERT INTO night_thoughts (chat_id, date, texto) VALUES (?, ?, ?)",
+            (str(chat_id), date, texto)
         )
 
 
-def get_last_night_thought():
+@reads
+def get_last_night_thought(chat_id: str = ""):
     """Retorna último pensamento noturno"""
     with get_db() as conn:
         row = conn.execute(
-            "SELECT date, texto FROM night_thoughts ORDER BY date DESC LIMIT 1"
+            "SELECT date, texto FROM night_thoughts WHERE chat_id = ? ORDER BY date DESC, id DESC LIMIT 1",
+            (str(chat_id),)
         ).fetchone()
     
     if row:
@@ -369,45 +1045,342 @@ def get_last_night_thought():
     return {"data": None, "ultimo": "Nenhum"}
 
 
-def get_night_thoughts_history(limit=30):
+@reads
+def get_night_thoughts_history(limit=30, chat_id: str = ""):
     """Retorna histórico de pensamentos noturnos"""
     with get_db() as conn:
         rows = conn.execute(
-            "SELECT date, texto FROM night_thoughts ORDER BY date DESC LIMIT ?",
-            (limit,)
+            "SELECT date, texto FROM night_thoughts WHERE chat_id = ? ORDER BY date DESC LIMIT ?",
+            (str(chat_id), limit)
         ).fetchall()
     
     return [{"data": r["date"], "texto": r["texto"][:500]} for r in rows]
 
 
+# ============================================================
+# MEMORY SEARCH
+# ============================================================
+# memory_fts (FTS5) é mantido pelos triggers do schema. O conteúdo
+# arquivado é comprimido, então o rebuild passa por Python.
+
+MEMORY_SOURCES = ("diario", "conversa", "reflexao", "tarefa")
+
+
+def _fts_query(text, op):
+    """Texto livre -> consulta FTS5 segura (termos entre aspas, com prefixo)"""
+    terms = re.findall(r"\w+", text)
+    return f" {op} ".join(f'"{t}"*' for t in terms)
+
+
+def _chat_key(chat_id):
+    """Token do chat em memory_fts.chat_key (mesma regra dos triggers da migração 0006)"""
+    return "c" + str(chat_id).replace("-", "n")
+
+
+@reads
+def search_memory(query: str, fonte: str = None, limit: int = 8, chat_id: str = ""):
+    """Busca no diário, conversas, reflexões e tarefas, por relevância (BM25).
+    Tenta todos os termos (AND); sem resultado, qualquer termo (OR).
+    O chat entra no MATCH (token de chat_key): só os documentos dele são lidos."""
+    # Peso 0 para chat_key: o token do chat não mexe na relevância
+    sql = """
+        SELECT fonte, ref_id, date, bm25(memory_fts, 1, 0, 0, 0, 0, 0) AS score,
+               snippet(memory_fts, 0, '**', '**', '...', 16) AS trecho
+        FROM memory_fts
+        WHERE memory_fts MATCH ?
+    """
+    chat = 'chat_key : "' + _chat_key(chat_id).replace('"', '""') + '"'
+    params = []
+    if fonte:
+        sql += " AND fonte = ?"
+        params.append(fonte)
+    sql += " ORDER BY score LIMIT ?"
+    
+    rows = []
+    with get_db() as conn:
+        for op in ("AND", "OR"):
+            match = _fts_query(query, op)
+            if not match:
+                break
+            rows = conn.execute(sql, [f"{chat} AND texto : ({match})", *params, limit]).fetchall()
+            if rows or len(re.findall(r"\w+", query)) < 2:
+                break
+    
+    return [{"fonte": r["fonte"], "ref_id": r["ref_id"], "date": r["date"],
+             "score": round(-r["score"], 2), "trecho": r["trecho"]} for r in rows]
+
+
+def _rebuild_memory_index(conn):
+    conn.execute("DELETE FROM memory_fts")
+    key = "'c' || replace(chat_id, '-', 'n')"  # _chat_key em SQL
+    insert = "INSERT INTO memory_fts (rowid, texto, fonte, ref_id, date, chat_id, chat_key) "
+    conn.execute(insert + "SELECT id * 4, texto, 'diario', id, date, chat_id, " + key + " FROM diary_entries")
+    conn.execute(insert + f"SELECT id * 4 + 1, content, 'conversa', id, date(timestamp, 'localtime'), chat_id, "
+                          f"{key} FROM conversation_history")
+    conn.execute(insert + f"SELECT id * 4 + 2, texto, 'reflexao', id, date, chat_id, {key} FROM night_thoughts")
+    conn.execute(insert + f"SELECT id * 4 + 3, texto, 'tarefa', id, date(criada_em, 'localtime'), chat_id, "
+                          f"{key} FROM tasks")
+    archived = conn.execute(
+        "SELECT id, chat_id, content, date(timestamp, 'localtime') AS d FROM conversation_archive"
+    ).fetchall()
+    conn.executemany(insert + "VALUES (?, ?, 'conversa', ?, ?, ?, ?)", [
+        (r["id"] * 4 + 1, zlib.decompress(r["content"]).decode("utf-8"), r["id"], r["d"], r["chat_id"],
+         _chat_key(r["chat_id"]))
+        for r in archived
+    ])
+    for table, fonte, offset in (("diary_entries", "diario", 0), ("night_thoughts", "reflexao", 2)):
+        archive = ARCHIVES[table][0]
+        if not migrations.has_table(conn, archive):
+            continue
+        rows = conn.execute(f"SELECT id, chat_id, texto, date FROM {archive}").fetchall()
+        conn.executemany(insert + f"VALUES (?, ?, '{fonte}', ?, ?, ?, ?)", [
+            (r["id"] * 4 + offset, zlib.decompress(r["texto"]).decode("utf-8"), r["id"], r["date"], r["chat_id"],
+             _chat_key(r["chat_id"]))
+            for r in rows
+        ])
+    conn.execute("INSERT INTO memory_fts (memory_fts) VALUES ('optimize')")
+    return conn.execute("SELECT COUNT(*) FROM memory_fts").fetchone()[0]
+
+
+@writes
+def rebuild_memory_index():
+    """Recria o índice de busca do zero. Retorna o número de documentos."""
+    with get_db() as conn:
+        return _rebuild_memory_index(conn)
+
+
 # ============================================================
 # REMINDERS
 # ============================================================
 
+@writes(invalidates=("reminders",))
 def add_reminder(tipo: str, hora: str, chat_id: str):
     """Adiciona lembrete"""
     with get_db() as conn:
         conn.execute(
             "INSERT INTO reminders (tipo, hora, chat_id) VALUES (?, ?, ?)",
-            (tipo, hora, chat_id)
+            (tipo, hora, str(chat_id))
         )
 
 
-def get_active_reminders():
-    """Retorna lembretes ativos"""
+@reads(cache="reminders")
+def get_active_reminders(chat_id: str = None):
+    """Retorna lembretes ativos (de um chat, ou de todos se chat_id=None)"""
     with get_db() as conn:
-        rows = conn.execute(
-            "SELECT tipo, hora, chat_id FROM reminders WHERE ativo = 1 ORDER BY hora"
-        ).fetchall()
+        if chat_id is None:
+            rows = conn.execute(
+                "SELECT tipo, hora, chat_id FROM reminders WHERE ativo = 1 ORDER BY hora"
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT tipo, hora, chat_id FROM reminders WHERE chat_id = ? AND ativo = 1 ORDER BY hora",
+                (str(chat_id),)
+            ).fetchall()
     
     return [{"tipo": r["tipo"], "hora": r["hora"], "chat_id": r["chat_id"]} for r in rows]
 
 
-def clear_reminders():
-    """Desativa todos os lembretes"""
+@writes(invalidates=("reminders",))
+def clear_reminders(chat_id: str):
+    """Desativa os lembretes de um chat"""
+    with get_db() as conn:
+        conn.execute("UPDATE reminders SET ativo = 0 WHERE chat_id = ? AND ativo = 1", (str(chat_id),))
+
+
+# ============================================================
+# MULTI-USUÁRIO
+# ============================================================
+# Bancos anteriores ao chat_id: as linhas antigas ficam com chat_id ''
+# até assign_legacy_rows passá-las para o dono (TELEGRAM_CHAT_ID).
+
+@writes(invalidates=migrations.CHAT_TABLES)
+def assign_legacy_rows(chat_id: str):
+    """Passa as linhas sem chat para `chat_id`. Retorna quantas foram movidas."""
+    chat_id = str(chat_id)
+    moved = 0
+    with get_db() as conn:
+        for table in migrations.CHAT_TABLES:
+            moved += conn.execute(
+                f"UPDATE {table} SET chat_id = ? WHERE chat_id = ''", (chat_id,)
+            ).rowcount
+        if moved:
+            _rebuild_daily_stats(conn)
+            _rebuild_memory_index(conn)
+    return moved
+
+
+# ============================================================
+# RETENÇÃO / MANUTENÇÃO
+# ============================================================
+# Linhas com date anterior a RETENTION_DAYS saem das tabelas quentes para
+# <tabela>_archive (migração 0004). Tudo em lotes pequenos pela thread de
+# escrita, com pausa entre eles, para as escritas do bot não esperarem.
+# Depois: merge incremental do FTS, ANALYZE/optimize (fora da fila) para
+# as estatísticas do planner e incremental_vacuum devolve as páginas livres.
+
+ARCHIVE_BATCH = 500        # linhas por transação
+VACUUM_STEP_PAGES = 1000   # páginas devolvidas por transação
+MAINTENANCE_PAUSE = 0.05   # segundos entre lotes
+FTS_MERGE_PAGES = 64       # páginas do FTS fundidas por transação
+FTS_MERGE_MAX_STEPS = 200  # teto de passos de merge por manutenção
+
+# tabela quente -> (arquivo, colunas, colunas comprimidas com zlib)
+ARCHIVES = {
+    "diary_entries": ("diary_archive", ("id", "chat_id", "date", "texto", "timestamp"), ("texto",)),
+    "mood_entries": ("mood_archive", ("id", "chat_id", "date", "nivel", "nota", "timestamp"), ()),
+    "workouts": ("workouts_archive", ("id", "chat_id", "date", "tipo", "timestamp"), ()),
+    "pomodoros": ("pomodoros_archive", ("id", "chat_id", "date", "tarefa", "minutos", "timestamp"), ()),
+    "night_thoughts": ("night_thoughts_archive", ("id", "chat_id", "date", "texto", "timestamp"), ("texto",)),
+}
+
+
+@writes
+def archive_batch(table: str, before: str, limit: int = ARCHIVE_BATCH):
+    """Move até `limit` linhas de `table` com date < before para o arquivo.
+    Retorna quantas moveu (0 = nada mais a arquivar)."""
+    archive, columns, compressed = ARCHIVES[table]
+    cols = ", ".join(columns)
     with get_db() as conn:
-        conn.execute("UPDATE reminders SET ativo = 0")
+        # Índice (date) da migração 0005: lê só as linhas antigas, em ordem,
+        # e a última passada (nada a arquivar) não varre a tabela
+        rows = conn.execute(
+            f"SELECT {cols} FROM {table} WHERE date < ? ORDER BY date, id LIMIT ?", (before, limit)
+        ).fetchall()
+        if not rows:
+            return 0
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {archive} ({cols}) VALUES ({', '.join('?' * len(columns))})",
+            [tuple(zlib.compress(r[c].encode("utf-8")) if c in compressed else r[c] for c in columns)
+             for r in rows]
+        )
+        # Com a linha já no arquivo, os triggers de DELETE não mexem em daily_stats/memory_fts
+        conn.execute(f"DELETE FROM {table} WHERE id IN (SELECT value FROM json_each(?))",
+                     (json.dumps([r["id"] for r in rows]),))
+    return len(rows)
+
+
+@writes
+def incremental_vacuum(pages: int = VACUUM_STEP_PAGES):
+    """Devolve até `pages` páginas livres ao sistema (auto_vacuum=INCREMENTAL).
+    Retorna quantas páginas livres sobraram."""
+    with get_db() as conn:
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # O módulo sqlite3 dá um único step por execute: uma página por chamada
+        for _ in range(min(free, pages)):
+            conn.execute("PRAGMA incremental_vacuum")
+        return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+@writes
+def fts_merge_step(pages: int = FTS_MERGE_PAGES):
+    """Um passo de merge incremental dos segmentos do memory_fts (até ~`pages`
+    páginas). Retorna True se fez trabalho (False = nada mais a fundir)."""
+    with get_db() as conn:
+        before = conn.total_changes
+        conn.execute("INSERT INTO memory_fts (memory_fts, rank) VALUES ('merge', ?)", (pages,))
+        # Documentação do FTS5: diferença < 2 em total_changes = merge sem trabalho
+        return conn.total_changes - before >= 2
+
+
+def analyze_db(tables=()):
+    """Estatísticas do planner numa conexão própria, fora da fila de escrita.
+    ANALYZE completo só num banco nunca analisado; depois, só das `tables`
+    que mudaram (ex.: as arquivadas) e PRAGMA optimize para o resto."""
+    ensure_db()
+    conn = sqlite3.connect(str(DB_PATH), timeout=30, isolation_level=None)
+    try:
+        conn.execute("PRAGMA analysis_limit=1000")
+        if not migrations.has_table(conn, "sqlite_stat1"):
+            conn.execute("ANALYZE")
+        else:
+            for table in tables:
+                conn.execute(f"ANALYZE {table}")
+            conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+
+def optimize_db(tables=(), max_steps: int = FTS_MERGE_MAX_STEPS):
+    """Merge do FTS em passos curtos pela fila de escrita (com pausa entre
+    eles) e estatísticas do planner. Retorna quantos passos de merge rodaram."""
+    steps = 0
+    while steps < max_steps and fts_merge_step():
+        steps += 1
+        time.sleep(MAINTENANCE_PAUSE)
+    analyze_db(tables)
+    return steps
+
+
+@writes(exclusive=True)
+def vacuum_full():
+    """VACUUM completo, passando o banco para auto_vacuum=INCREMENTAL.
+    Reescreve o arquivo inteiro: roda na thread de escrita, sozinho, e as
+    escritas do bot esperam na fila em vez de dar "database is locked"."""
+    with get_db() as conn:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+
+
+@reads
+def db_stats():
+    """Tamanho do banco (páginas usadas/livres) e do WAL, em bytes"""
+    with get_db() as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    wal = DB_PATH.with_name(DB_PATH.name + "-wal")
+    return {
+        "bytes": page_size * pages,
+        "free_bytes": page_size * free,
+        "wal_bytes": wal.stat().st_size if wal.exists() else 0,
+        "auto_vacuum": ("none", "full", "incremental")[auto_vacuum],
+    }
+
+
+def run_maintenance(days: int = RETENTION_DAYS, full_vacuum: bool = False):
+    """Arquiva, compacta e otimiza o banco. Bloqueante (minutos num banco
+    grande): chame fora do event loop. Retorna o relatório."""
+    t0 = time.monotonic()
+    before = db_stats()
+    cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    
+    archived = {}
+    for table in ARCHIVES:
+        moved = 0
+        while True:
+            n = archive_batch(table, cutoff)
+            if not n:
+                break
+            moved += n
+            time.sleep(MAINTENANCE_PAUSE)
+        if moved:
+            archived[table] = moved
+    
+    # Antes do vacuum: o merge do FTS também libera páginas
+    optimize_db([t for table in archived for t in (table, ARCHIVES[table][0])])
+    if full_vacuum:
+        vacuum_full()
+    elif before["auto_vacuum"] == "incremental":
+        while incremental_vacuum() > 0:
+            time.sleep(MAINTENANCE_PAUSE)
+    
+    with get_db() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    
+    after = db_stats()
+    report = {
+        "cutoff": cutoff,
+        "archived": archived,
+        "bytes_before": before["bytes"] + before["wal_bytes"],
+        "bytes_after": after["bytes"] + after["wal_bytes"],
+        "free_bytes": after["free_bytes"],
+        "auto_vacuum": after["auto_vacuum"],
+        "seconds": round(time.monotonic() - t0, 2),
+    }
+    report["reclaimed_bytes"] = report["bytes_before"] - report["bytes_after"]
+    return report
 
 
-# Inicializa o banco ao importar o módulo
-init_db()
\ No newline at end of file
+# Grava o que estiver na fila antes do processo terminar
+atexit.register(stop_writer)
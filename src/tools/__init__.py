@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 """
 IRIS - Tools Module
-Ferramentas disponíveis para a IRIS executar
+Ferramentas disponíveis para a IRIS executar. Bibliotecas pesadas
+(requests, imaplib, ddgs) são importadas dentro das funções, não no topo
+dos módulos, para não pesar na inicialização do bot.
 """
 
+from .registry import TOOLS, Tool, tool, get_tool, tool_groups, tool_schemas, execute_tool, current_chat
 from .web import fn_web_search, fn_web_news, fn_reddit
 from .email_tool import fn_read_emails
 from .github import (
@@ -12,21 +15,31 @@ from .github import (
     fn_github_get_file, fn_github_create_or_update_file,
     fn_github_list_commits, fn_github_list_prs, fn_github_activity
 )
-from .image import fn_generate_image
+from .image import fn_generate_image, fn_generate_image_tool
 from .code import (
     fn_create_file, fn_read_file, fn_list_workspace,
     fn_run_python, fn_run_bash
 )
-from .files import fn_list_received_files, fn_read_received_file, fn_get_file_path
+from .files import fn_list_received_files, fn_read_received_file, fn_get_file_path, fn_send_file
 from .productivity import (
-    fn_add_task, fn_list_tasks, fn_complete_task,
-    fn_add_goal, fn_list_goals,
+    fn_add_task, fn_add_tasks, fn_list_tasks, fn_complete_task, fn_complete_tasks, fn_reopen_task,
+    fn_add_goal, fn_add_goals, fn_list_goals,
     fn_add_journal, fn_view_journal,
+    fn_search_memory,
     fn_log_exercise, fn_log_mood,
     fn_dashboard, fn_briefing, fn_weekly_review
 )
 
 __all__ = [
+    # Registry
+    'TOOLS',
+    'Tool',
+    'tool',
+    'get_tool',
+    'tool_groups',
+    'tool_schemas',
+    'execute_tool',
+    'current_chat',
     # Web
     'fn_web_search',
     'fn_web_news', 
@@ -45,6 +58,7 @@ __all__ = [
     'fn_github_activity',
     # Image
     'fn_generate_image',
+    'fn_generate_image_tool',
     # Code
     'fn_create_file',
     'fn_read_file',
@@ -55,14 +69,20 @@ __all__ = [
     'fn_list_received_files',
     'fn_read_received_file',
     'fn_get_file_path',
+    'fn_send_file',
     # Productivity
     'fn_add_task',
+    'fn_add_tasks',
     'fn_list_tasks',
     'fn_complete_task',
+    'fn_complete_tasks',
+    'fn_reopen_task',
     'fn_add_goal',
+    'fn_add_goals',
     'fn_list_goals',
     'fn_add_journal',
     'fn_view_journal',
+    'fn_search_memory',
     'fn_log_exercise',
     'fn_log_mood',
     'fn_dashboard',
@@ -5,19 +5,18 @@ Execução de código Python e comandos Bash no workspace
 """
 
 import subprocess
-from pathlib import Path
 
-import sys
-sys.path.append(str(Path(__file__).parent.parent))
 from config import WS_ROBERTO, CODE_TIMEOUT
+from .registry import tool
 
 
 # ============================================================
 # FILE OPERATIONS
 # ============================================================
 
-def fn_create_file(filename, content):
-    """Cria arquivo no workspace."""
+@tool("criar_arquivo_local", readonly=False)
+def fn_create_file(filename: str, content: str):
+    """Cria arquivo de codigo no workspace local."""
     try:
         p = WS_ROBERTO / filename
         p.parent.mkdir(parents=True, exist_ok=True)
@@ -27,8 +26,9 @@ def fn_create_file(filename, content):
         return f"ERRO: {e}"
 
 
-def fn_read_file(filename):
-    """Lê arquivo do workspace."""
+@tool("ler_arquivo_local")
+def fn_read_file(filename: str):
+    """Le arquivo do workspace local."""
     try:
         p = WS_ROBERTO / filename
         if not p.exists():
@@ -38,8 +38,9 @@ def fn_read_file(filename):
         return f"ERRO: {e}"
 
 
+@tool("listar_arquivos_local")
 def fn_list_workspace():
-    """Lista arquivos no workspace."""
+    """Lista arquivos no workspace local."""
     fs = [
         f for f in WS_ROBERTO.rglob("*") 
         if f.is_file() and not f.name.startswith("_")
@@ -55,8 +56,9 @@ def fn_list_workspace():
 # CODE EXECUTION
 # ============================================================
 
-def fn_run_python(code):
-    """Executa código Python."""
+@tool("executar_codigo", timeout=CODE_TIMEOUT + 5, readonly=False)
+def fn_run_python(code: str):
+    """Executa codigo Python."""
     try:
         tmp = WS_ROBERTO / "_run.py"
         tmp.write_text(code, encoding="utf-8")
@@ -78,8 +80,9 @@ def fn_run_python(code):
         return f"ERRO: {e}"
 
 
-def fn_run_bash(command):
-    """Executa comando bash/shell."""
+@tool("executar_comando", timeout=CODE_TIMEOUT + 5, readonly=False)
+def fn_run_bash(command: str):
+    """Executa comando shell/bash."""
     # Security checks
     if any(x in command for x in ["rm -rf /", "mkfs", ":(){ "]):
         return "Bloqueado"
@@ -5,14 +5,10 @@ Leitura de emails via IMAP (Gmail e corporativo)
 """
 
 import re
-import imaplib
-import email as email_lib
-from email.header import decode_header
+from typing import Literal
 
-import sys
-from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent))
 from config import GMAIL_EMAIL, GMAIL_APP_PASSWORD, CORP_EMAIL, CORP_PASSWORD, CORP_IMAP_SERVER
+from .registry import tool
 
 
 # ============================================================
@@ -24,6 +20,7 @@ def decode_mime_header(raw):
     if not raw:
         return ""
     
+    from email.header import decode_header
     parts = decode_header(raw)
     decoded = []
     
@@ -76,8 +73,9 @@ def get_email_body(msg):
 # EMAIL READING
 # ============================================================
 
-def fn_read_emails(conta="gmail", n=5):
-    """Lê emails recentes (gmail ou corp)."""
+@tool("ler_emails")
+def fn_read_emails(conta: Literal["gmail", "corp"] = "gmail", n: int = 5):
+    """Le emails recentes (gmail ou corp)."""
     if conta == "gmail":
         if not GMAIL_EMAIL or not GMAIL_APP_PASSWORD:
             return "Gmail nao configurado. Configure GMAIL_EMAIL e GMAIL_APP_PASSWORD no Render."
@@ -87,6 +85,8 @@ def fn_read_emails(conta="gmail", n=5):
             return "Email corporativo nao configurado."
         addr, pwd, srv = CORP_EMAIL, CORP_PASSWORD, CORP_IMAP_SERVER or "imap.gmail.com"
     
+    import imaplib
+    import email as email_lib
     try:
         mail = imaplib.IMAP4_SSL(srv)
         mail.login(addr, pwd)
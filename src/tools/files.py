@@ -4,18 +4,17 @@ IRIS - File Management Tools
 Upload, download e gerenciamento de arquivos do Telegram
 """
 
-import sys
-from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent))
 from config import WS_UPLOADS, WS_ROBERTO, WS_MARLEY
+from .registry import tool
 
 
 # ============================================================
 # FILE LISTING
 # ============================================================
 
+@tool("listar_arquivos_recebidos")
 def fn_list_received_files():
-    """Lista arquivos recebidos via Telegram."""
+    """Lista arquivos que o usuario enviou via Telegram."""
     fs = [f for f in WS_UPLOADS.rglob("*") if f.is_file()]
     
     if not fs:
@@ -28,8 +27,13 @@ def fn_list_received_files():
 # FILE READING
 # ============================================================
 
-def fn_read_received_file(filename):
-    """Lê arquivo recebido via Telegram."""
+@tool("ler_arquivo_recebido")
+def fn_read_received_file(filename: str):
+    """Le conteudo de um arquivo recebido via Telegram.
+
+    Args:
+        filename: Nome do arquivo
+    """
     p = WS_UPLOADS / filename
     
     if not p.exists():
@@ -52,3 +56,16 @@ def fn_get_file_path(filename):
         if p.exists():
             return str(p)
     return None
+
+
+@tool("enviar_arquivo")
+def fn_send_file(filename: str):
+    """Envia um arquivo do workspace para o usuario no Telegram. Use apos criar ou processar arquivos.
+
+    Args:
+        filename: Nome do arquivo para enviar
+    """
+    path = fn_get_file_path(filename)
+    if path:
+        return f"SEND_FILE={path}"
+    return f"Arquivo nao encontrado: {filename}"
@@ -4,13 +4,11 @@ IRIS - GitHub Tools
 Integração completa com GitHub API
 """
 
-import requests
 import base64
+from typing import Literal, Optional
 
-import sys
-from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent))
 from config import GITHUB_TOKEN, GITHUB_USER, GH_API, GH_HEADERS
+from .registry import tool
 
 
 # ============================================================
@@ -23,6 +21,7 @@ def gh_request(method, endpoint, data=None):
         return {"error": "GITHUB_TOKEN nao configurado no Render."}
     
     url = f"{GH_API}{endpoint}"
+    import requests
     
     try:
         if method == "GET":
@@ -51,8 +50,13 @@ def gh_request(method, endpoint, data=None):
 # REPOSITORIES
 # ============================================================
 
-def fn_github_list_repos(user=None):
-    """Lista repositórios do usuário."""
+@tool("github_repos")
+def fn_github_list_repos(user: Optional[str] = None):
+    """Lista repositorios do GitHub.
+
+    Args:
+        user: Username (opcional, default: seu usuario)
+    """
     u = user or GITHUB_USER
     if not u:
         return "GITHUB_USER nao configurado."
@@ -76,8 +80,13 @@ def fn_github_list_repos(user=None):
     return "\n".join(repos) if repos else "Nenhum repositorio."
 
 
-def fn_github_repo_info(repo):
-    """Informações detalhadas de um repositório."""
+@tool("github_repo_info")
+def fn_github_repo_info(repo: str):
+    """Informacoes detalhadas de um repositorio.
+
+    Args:
+        repo: Nome do repo (ex: paide3 ou user/repo)
+    """
     owner = GITHUB_USER
     if "/" in repo:
         parts = repo.split("/", 1)
@@ -106,8 +115,9 @@ def fn_github_repo_info(repo):
 # ISSUES
 # ============================================================
 
-def fn_github_list_issues(repo, state="open"):
-    """Lista issues de um repositório."""
+@tool("github_issues")
+def fn_github_list_issues(repo: str, state: Literal["open", "closed", "all"] = "open"):
+    """Lista issues de um repositorio."""
     owner = GITHUB_USER
     if "/" in repo:
         parts = repo.split("/", 1)
@@ -135,8 +145,9 @@ def fn_github_list_issues(repo, state="open"):
     return "\n".join(issues) if issues else f"Nenhuma issue {state}."
 
 
-def fn_github_create_issue(repo, title, body=""):
-    """Cria nova issue."""
+@tool("github_criar_issue", readonly=False)
+def fn_github_create_issue(repo: str, title: str, body: str = ""):
+    """Cria nova issue em um repositorio."""
     owner = GITHUB_USER
     if "/" in repo:
         parts = repo.split("/", 1)
@@ -154,8 +165,13 @@ def fn_github_create_issue(repo, title, body=""):
 # FILES
 # ============================================================
 
-def fn_github_get_file(repo, path):
-    """Lê arquivo ou lista diretório."""
+@tool("github_ler_arquivo")
+def fn_github_get_file(repo: str, path: str):
+    """Le arquivo ou lista diretorio de um repo GitHub.
+
+    Args:
+        path: Caminho do arquivo (ex: src/bot.py ou . para raiz)
+    """
     owner = GITHUB_USER
     if "/" in repo:
         parts = repo.split("/", 1)
@@ -191,8 +207,13 @@ def fn_github_get_file(repo, path):
     return content[:4000]
 
 
-def fn_github_create_or_update_file(repo, path, content, message="Update via IRIS"):
-    """Cria ou atualiza arquivo no repositório."""
+@tool("github_editar_arquivo", readonly=False)
+def fn_github_create_or_update_file(repo: str, path: str, content: str, message: str = "Update via IRIS"):
+    """Cria ou atualiza arquivo em repositorio GitHub.
+
+    Args:
+        message: Mensagem de commit
+    """
     owner = GITHUB_USER
     if "/" in repo:
         parts = repo.split("/", 1)
@@ -224,8 +245,9 @@ def fn_github_create_or_update_file(repo, path, content, message="Update via IRI
 # COMMITS
 # ============================================================
 
-def fn_github_list_commits(repo, n=10):
-    """Lista commits recentes."""
+@tool("github_commits")
+def fn_github_list_commits(repo: str, n: int = 10):
+    """Lista commits recentes de um repositorio."""
     owner = GITHUB_USER
     if "/" in repo:
         parts = repo.split("/", 1)
@@ -254,8 +276,9 @@ def fn_github_list_commits(repo, n=10):
 # PULL REQUESTS
 # ============================================================
 
-def fn_github_list_prs(repo, state="open"):
-    """Lista pull requests."""
+@tool("github_pull_requests")
+def fn_github_list_prs(repo: str, state: Literal["open", "closed", "all"] = "open"):
+    """Lista pull requests de um repositorio."""
     owner = GITHUB_USER
     if "/" in repo:
         parts = repo.split("/", 1)
@@ -283,8 +306,9 @@ def fn_github_list_prs(repo, state="open"):
 # ACTIVITY
 # ============================================================
 
+@tool("github_atividade")
 def fn_github_activity():
-    """Atividade recente no GitHub."""
+    """Atividade recente no GitHub (pushes, issues, PRs)."""
     if not GITHUB_USER:
         return "GITHUB_USER nao configurado."
     
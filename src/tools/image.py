@@ -4,13 +4,10 @@ IRIS - Image Generation
 Geração de imagens com FLUX via Pollinations
 """
 
-import requests
 from datetime import datetime
 
-import sys
-from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent))
 from config import WS_MARLEY, IMAGE_TIMEOUT
+from .registry import tool
 
 
 # ============================================================
@@ -19,6 +16,7 @@ from config import WS_MARLEY, IMAGE_TIMEOUT
 
 def fn_generate_image(prompt):
     """Gera imagem usando FLUX via Pollinations (free, high quality)."""
+    import requests
     try:
         encoded = requests.utils.quote(prompt)
         seed = int(datetime.now().timestamp()) % 999999
@@ -53,3 +51,14 @@ def fn_generate_image(prompt):
     
     except Exception as e:
         return None, f"ERRO: {e}"
+
+
+@tool("gerar_imagem", timeout=IMAGE_TIMEOUT + 10, readonly=False, concurrent=True)
+def fn_generate_image_tool(prompt: str):
+    """Gera imagem com IA. Crie prompt detalhado em INGLES.
+
+    Args:
+        prompt: Prompt em INGLES detalhado
+    """
+    path, url = fn_generate_image(prompt)
+    return f"IMAGE_PATH={path} IMAGE_URL={url}" if path else f"ERRO: {url}"
@@ -4,14 +4,15 @@ IRIS - Productivity Tools
 Tarefas, metas, diário, humor, exercícios, dashboard
 """
 
-import sys
-from pathlib import Path
 from datetime import datetime, timedelta
+from typing import Literal, Optional
 
-# Adicionar src ao path para importar storage
-sys.path.append(str(Path(__file__).parent.parent))
 import storage
 from config import BRT
+from .registry import tool, current_chat
+
+# Máximo de tarefas por seção em ver_tarefas
+TASK_LIST_LIMIT = 30
 
 # ============================================================
 # HELPERS
@@ -32,52 +33,116 @@ def week_key():
 # TASKS
 # ============================================================
 
-def fn_add_task(texto):
+@tool("adicionar_tarefa", readonly=False)
+def fn_add_task(texto: str):
     """Adiciona nova tarefa."""
-    task_id = storage.add_task(texto)
+    task_id = storage.add_task(texto, chat_id=current_chat())
     return f"Tarefa #{task_id}: {texto}"
 
 
-def fn_list_tasks():
-    """Lista tarefas pendentes e concluídas hoje."""
-    tasks = storage.get_tasks()
-    pend = [t for t in tasks if not t["feita"]]
-    feitas = [t for t in tasks if t["feita"] and (t.get("feita_em") or "").startswith(today_str())]
+@tool("adicionar_tarefas", readonly=False)
+def fn_add_tasks(textos: list[str]):
+    """Adiciona varias tarefas de uma vez.
+
+    Args:
+        textos: Lista com o texto de cada tarefa
+    """
+    textos = [t.strip() for t in textos if t.strip()]
+    if not textos:
+        return "Nenhuma tarefa informada."
+    ids = storage.add_tasks(textos, chat_id=current_chat())
+    return f"{len(ids)} tarefas:\n" + "\n".join(f"  #{i} {t}" for i, t in zip(ids, textos))
+
+
+@tool("ver_tarefas")
+def fn_list_tasks(prefixo: str = ""):
+    """Lista tarefas pendentes e concluidas hoje.
+
+    Args:
+        prefixo: So tarefas cujo texto comeca com isso (opcional)
+    """
+    hoje = today_str()
+    pend, mais = storage.query_tasks("pending", prefix=prefixo or None, limit=TASK_LIST_LIMIT,
+                                     chat_id=current_chat())
+    feitas, _ = storage.query_tasks(start=hoje, end=hoje, prefix=prefixo or None,
+                                    limit=TASK_LIST_LIMIT, chat_id=current_chat())
     
     msg = ""
     if pend:
         msg += "PENDENTES:\n" + "\n".join(f"  #{t['id']} {t['texto']}" for t in pend)
+        if mais:
+            msg += f"\n  (+{storage.count_pending_tasks(chat_id=current_chat()) - len(pend)} pendentes antigas)"
     if feitas:
         msg += f"\nHOJE ({len(feitas)}):\n" + "\n".join(f"  #{t['id']} {t['texto']}" for t in feitas)
     
     return msg or "Nenhuma tarefa."
 
 
-def fn_complete_task(task_id):
+@tool("completar_tarefa", readonly=False)
+def fn_complete_task(task_id: int):
     """Marca tarefa como concluída."""
-    tasks = storage.get_tasks()
-    for t in tasks:
-        if t["id"] == task_id and not t["feita"]:
-            storage.complete_task(task_id)
-            return f"#{task_id} concluida: {t['texto']}"
-    return f"#{task_id} nao encontrada."
+    texto = storage.complete_task(task_id, chat_id=current_chat())
+    if texto is None:
+        return f"#{task_id} nao encontrada."
+    return f"#{task_id} concluida: {texto}"
+
+
+@tool("completar_tarefas", readonly=False)
+def fn_complete_tasks(ids: list[int]):
+    """Marca varias tarefas como concluidas de uma vez.
+
+    Args:
+        ids: Numeros das tarefas (ex.: [3, 7, 12])
+    """
+    ids = [int(i) for i in ids]  # o LLM as vezes manda "3" em vez de 3
+    feitas = storage.complete_tasks(ids, chat_id=current_chat())
+    msg = "\n".join(f"#{i} concluida: {t}" for i, t in feitas.items())
+    faltando = [i for i in dict.fromkeys(ids) if i not in feitas]
+    if faltando:
+        msg += ("\n" if msg else "") + "Nao encontradas: " + ", ".join(f"#{i}" for i in faltando)
+    return msg
+
+
+@tool("reabrir_tarefa", readonly=False)
+def fn_reopen_task(task_id: int):
+    """Volta uma tarefa concluida para pendente."""
+    texto = storage.reopen_task(task_id, chat_id=current_chat())
+    if texto is None:
+        return f"#{task_id} nao encontrada entre as concluidas."
+    return f"#{task_id} reaberta: {texto}"
 
 
 # ============================================================
 # GOALS
 # ============================================================
 
-def fn_add_goal(texto):
+@tool("adicionar_meta", readonly=False)
+def fn_add_goal(texto: str):
     """Adiciona meta semanal."""
     wk = week_key()
-    storage.add_weekly_goal(wk, texto)
+    storage.add_weekly_goal(wk, texto, chat_id=current_chat())
     return f"Meta semanal: {texto}"
 
 
+@tool("adicionar_metas", readonly=False)
+def fn_add_goals(textos: list[str]):
+    """Adiciona varias metas semanais de uma vez.
+
+    Args:
+        textos: Lista com o texto de cada meta
+    """
+    textos = [t.strip() for t in textos if t.strip()]
+    if not textos:
+        return "Nenhuma meta informada."
+    storage.add_weekly_goals(week_key(), textos, chat_id=current_chat())
+    return "Metas semanais:\n" + "\n".join(f"  - {t}" for t in textos)
+
+
+@tool("ver_metas")
 def fn_list_goals():
     """Lista metas da semana."""
     wk = week_key()
-    metas = storage.get_weekly_goals(wk)
+    metas = storage.get_weekly_goals(wk, chat_id=current_chat())
     
     if not metas:
         return "Sem metas esta semana."
@@ -92,18 +157,20 @@ def fn_list_goals():
 # JOURNAL
 # ============================================================
 
-def fn_add_journal(texto):
-    """Adiciona entrada no diário."""
+@tool("registrar_diario", readonly=False)
+def fn_add_journal(texto: str):
+    """Adiciona entrada no diario."""
     hoje = today_str()
-    storage.add_diary_entry(hoje, texto)
-    entries = storage.get_diary_entries(hoje)
+    storage.add_diary_entry(hoje, texto, chat_id=current_chat())
+    entries = storage.get_diary_entries(hoje, chat_id=current_chat())
     return f"Diario registrado ({len(entries)}a entrada)"
 
 
+@tool("ver_diario")
 def fn_view_journal():
-    """Mostra diário de hoje."""
+    """Mostra diario de hoje."""
     hoje = today_str()
-    entries = storage.get_diary_entries(hoje)
+    entries = storage.get_diary_entries(hoje, chat_id=current_chat())
     
     if not entries:
         return "Diario vazio hoje."
@@ -114,28 +181,49 @@ def fn_view_journal():
     )
 
 
+# ============================================================
+# MEMORIA
+# ============================================================
+
+@tool("buscar_memoria")
+def fn_search_memory(consulta: str,
+                     fonte: Optional[Literal["diario", "conversa", "reflexao", "tarefa"]] = None,
+                     limite: int = 8):
+    """Busca no diario, conversas antigas, reflexoes noturnas e tarefas.
+
+    Args:
+        consulta: Palavras a buscar (ex.: "viagem praia", "entrevista")
+        fonte: Restringe a uma fonte
+        limite: Maximo de resultados
+    """
+    hits = storage.search_memory(consulta, fonte, max(1, min(limite, 20)), chat_id=current_chat())
+    if not hits:
+        return f"Nada encontrado para: {consulta}"
+    return "\n".join(f"[{h['fonte']} {h['date'] or ''}] {h['trecho']}" for h in hits)
+
+
 # ============================================================
 # HEALTH
 # ============================================================
 
-def fn_log_exercise(tipo):
-    """Registra exercício/treino."""
+@tool("registrar_treino", readonly=False)
+def fn_log_exercise(tipo: str):
+    """Registra exercicio/treino."""
     hoje = today_str()
-    storage.add_workout(hoje, tipo)
+    storage.add_workout(hoje, tipo, chat_id=current_chat())
     
     # Contar treinos da semana
-    wk = 0
-    for i in range(7):
-        data_dia = (datetime.now(BRT) - timedelta(days=i)).strftime("%Y-%m-%d")
-        wk += len(storage.get_workouts(data_dia))
+    inicio = (datetime.now(BRT) - timedelta(days=6)).strftime("%Y-%m-%d")
+    wk = storage.count_workouts_between(inicio, hoje, chat_id=current_chat())
     
     return f"Treino: {tipo}. Semana: {wk} sessao(es)"
 
 
-def fn_log_mood(nivel, nota=""):
-    """Registra humor de 1 (péssimo) a 5 (ótimo)."""
+@tool("registrar_humor", readonly=False)
+def fn_log_mood(nivel: int, nota: str = ""):
+    """Registra humor de 1 (pessimo) a 5 (otimo)."""
     hoje = today_str()
-    storage.add_mood(hoje, nivel, nota)
+    storage.add_mood(hoje, nivel, nota, chat_id=current_chat())
     
     labels = ["", "pessimo", "ruim", "neutro", "bom", "otimo"]
     return f"Humor: {nivel}/5 ({labels[nivel]}) {nota}"
@@ -145,31 +233,28 @@ def fn_log_mood(nivel, nota=""):
 # DASHBOARD
 # ============================================================
 
+@tool("ver_dashboard")
 def fn_dashboard():
     """Dashboard completo do dia."""
     hoje = today_str()
     
-    diario = storage.get_diary_entries(hoje)
-    tarefas = storage.get_tasks()
-    pend = [t for t in tarefas if not t["feita"]]
-    feitas = [t for t in tarefas if t["feita"] and (t.get("feita_em") or "").startswith(hoje)]
-    pomos = storage.get_pomodoros(hoje)
-    treinos = storage.get_workouts(hoje)
-    humor = storage.get_mood(hoje)
-    metas = storage.get_weekly_goals(week_key())
+    stats = storage.get_daily_stats(hoje, chat_id=current_chat())
+    pend, _ = storage.query_tasks("pending", limit=5, chat_id=current_chat())
+    n_pend = storage.count_pending_tasks(chat_id=current_chat())
+    metas = storage.get_weekly_goals(week_key(), chat_id=current_chat())
     
     msg = f"DASHBOARD {hoje}\n"
-    msg += f"Diario: {len(diario)} entradas\n"
-    msg += f"Tarefas: {len(feitas)} feitas / {len(pend)} pendentes\n"
+    msg += f"Diario: {stats['diario']} entradas\n"
+    msg += f"Tarefas: {stats['tarefas_feitas']} feitas / {n_pend} pendentes\n"
     
     if pend:
-        msg += "".join(f"  #{t['id']} {t['texto'][:40]}\n" for t in pend[:5])
+        msg += "".join(f"  #{t['id']} {t['texto'][:40]}\n" for t in pend)
     
-    msg += f"Pomodoros: {len(pomos)}\n"
-    msg += f"Treino: {len(treinos)}\n"
+    msg += f"Pomodoros: {stats['pomodoros']} ({stats['pomodoro_minutos']}min)\n"
+    msg += f"Treino: {stats['treinos']}\n"
     
-    if humor:
-        msg += f"Humor: {humor[-1]['nivel']}/5 {humor[-1].get('nota','')}\n"
+    if stats["ultimo_humor"]:
+        msg += f"Humor: {stats['ultimo_humor']}/5 {stats['ultimo_humor_nota']}\n"
     
     if metas:
         ok = sum(1 for m in metas if m["concluida"])
@@ -178,8 +263,9 @@ def fn_dashboard():
     return msg
 
 
+@tool("briefing_matinal", timeout=120)
 def fn_briefing():
-    """Briefing matinal completo."""
+    """Briefing completo (noticias, emails, reddit, github, tarefas)."""
     from .web import fn_web_news, fn_reddit
     from .email_tool import fn_read_emails
     from .github import fn_github_activity
@@ -200,8 +286,14 @@ def fn_briefing():
     tasks = fn_list_tasks()
     goals = fn_list_goals()
     
+    # Ontem
+    ontem = (datetime.now(BRT) - timedelta(days=1)).strftime("%Y-%m-%d")
+    st = storage.get_daily_stats(ontem, chat_id=current_chat())
+    resumo_ontem = (f"{st['tarefas_feitas']} tarefas, {st['pomodoros']} pomodoros, "
+                    f"{st['treinos']} treinos, humor {st['ultimo_humor'] or '-'}/5")
+    
     # Pensamento noturno
-    pensamentos = storage.get_last_night_thought()
+    pensamentos = storage.get_last_night_thought(chat_id=current_chat())
     ultimo = pensamentos.get("ultimo", "")
     
     # GitHub
@@ -214,44 +306,43 @@ def fn_briefing():
         f"GITHUB:\n{gh_activity}\n\n"
         f"TAREFAS:\n{tasks}\n\n"
         f"METAS:\n{goals}\n\n"
+        f"ONTEM: {resumo_ontem}\n\n"
         f"REFLEXAO NOTURNA:\n{ultimo or '(nenhuma ainda)'}"
     )
 
 
+@tool("review_semanal")
 def fn_weekly_review():
     """Review da semana com análise."""
-    days = [
-        (datetime.now(BRT) - timedelta(days=i)).strftime("%Y-%m-%d")
-        for i in range(7)
-    ]
+    fim = today_str()
+    inicio = (datetime.now(BRT) - timedelta(days=6)).strftime("%Y-%m-%d")
     
-    tarefas = storage.get_tasks()
-    metas = storage.get_weekly_goals(week_key())
+    metas = storage.get_weekly_goals(week_key(), chat_id=current_chat())
     
     ctx = ""
     
     # Diário
-    for d in days:
-        for e in storage.get_diary_entries(d):
-            ctx += f"DIARIO {d}: {e['texto'][:150]}\n"
+    for e in storage.get_diary_between(inicio, fim, chat_id=current_chat()):
+        ctx += f"DIARIO {e['date']}: {e['texto'][:150]}\n"
     
     # Tarefas concluídas
-    for t in tarefas:
-        if t["feita"] and (t.get("feita_em") or "")[:10] in days:
-            ctx += f"TAREFA OK: {t['texto']}\n"
+    for t in storage.get_tasks_completed_between(inicio, fim, chat_id=current_chat()):
+        ctx += f"TAREFA OK: {t['texto']}\n"
     
-    ctx += f"PENDENTES: {len([t for t in tarefas if not t['feita']])}\n"
+    ctx += f"PENDENTES: {storage.count_pending_tasks(chat_id=current_chat())}\n"
     
-    # Pomodoros
-    total_pomos = sum(len(storage.get_pomodoros(d)) for d in days)
-    ctx += f"POMODOROS: {total_pomos}\n"
+    # Resumo por dia
+    dias = storage.get_daily_stats_between(inicio, fim, chat_id=current_chat())
+    for d in dias:
+        ctx += (f"DIA {d['date']}: {d['tarefas_feitas']} tarefas, {d['pomodoros']} pomodoros "
+                f"({d['pomodoro_minutos']}min), {d['treinos']} treinos, {d['diario']} diario\n")
+    ctx += f"POMODOROS: {sum(d['pomodoros'] for d in dias)}\n"
     
     # Treinos e humor
-    for d in days:
-        for t in storage.get_workouts(d):
-            ctx += f"TREINO {d}: {t['tipo']}\n"
-        for h in storage.get_mood(d):
-            ctx += f"HUMOR {d}: {h['nivel']}/5 {h.get('nota','')}\n"
+    for t in storage.get_workouts_between(inicio, fim, chat_id=current_chat()):
+        ctx += f"TREINO {t['date']}: {t['tipo']}\n"
+    for h in storage.get_mood_between(inicio, fim, chat_id=current_chat()):
+        ctx += f"HUMOR {h['date']}: {h['nivel']}/5 {h.get('nota','')}\n"
     
     # Metas
     for m in metas:
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+IRIS - Tool Registry
+Registro das ferramentas via decorator: schema JSON gerado a partir da
+assinatura + docstring, dispatch O(1) por nome e metadados por ferramenta
+"""
+
+import contextvars
+import inspect
+import typing
+from dataclasses import dataclass, field
+from typing import Callable, Literal
+
+# ============================================================
+# REGISTRY
+# ============================================================
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean",
+               list: "array", dict: "object"}
+
+
+@dataclass
+class Tool:
+    """Ferramenta registrada + metadados usados pelo executor."""
+    name: str
+    fn: Callable
+    description: str
+    parameters: dict
+    group: str                  # web, email, github, image, code, files, productivity
+    timeout: float = None       # None = TOOL_TIMEOUT padrao
+    readonly: bool = True       # nao altera estado (dados, arquivos, GitHub)
+    concurrent: bool = True     # pode rodar em paralelo com outras tools da mesma rodada
+    arg_names: frozenset = field(default_factory=frozenset)
+
+    def schema(self):
+        return {"type": "function", "function": {
+            "name": self.name,
+            "description": self.description,
+            "parameters": self.parameters,
+        }}
+
+
+TOOLS: dict = {}
+
+# Chat da requisicao em andamento (as tools de dados gravam/leem so dele)
+_current_chat = contextvars.ContextVar("iris_chat_id", default="")
+
+
+def current_chat():
+    """chat_id de quem chamou a tool ("" fora de uma requisicao)."""
+    return _current_chat.get()
+
+
+def tool(name, *, group=None, timeout=None, readonly=True, concurrent=None):
+    """Registra uma funcao como ferramenta da IRIS.
+    O grupo padrao e o nome do modulo (tools/web.py -> "web", email_tool.py -> "email").
+    Por padrao, ferramentas que alteram estado (readonly=False) nao sao concorrentes."""
+    def decorator(fn):
+        if name in TOOLS:
+            raise ValueError(f"Tool duplicada: {name}")
+        description, params = _build_schema(fn)
+        TOOLS[name] = Tool(
+            name=name, fn=fn, description=description, parameters=params,
+            group=group or _module_group(fn),
+            timeout=timeout, readonly=readonly,
+            concurrent=readonly if concurrent is None else concurrent,
+            arg_names=frozenset(params["properties"]),
+        )
+        return fn
+    return decorator
+
+
+def get_tool(name):
+    return TOOLS.get(name)
+
+
+def tool_groups():
+    """{grupo: [nomes das tools]} na ordem de registro."""
+    groups = {}
+    for t in TOOLS.values():
+        groups.setdefault(t.group, []).append(t.name)
+    return groups
+
+
+def tool_schemas(names=None):
+    """Lista de schemas no formato da API (todas ou so as indicadas)."""
+    if names is None:
+        return [t.schema() for t in TOOLS.values()]
+    return [TOOLS[n].schema() for n in names if n in TOOLS]
+
+
+def execute_tool(name, args, chat_id=""):
+    """Executa a ferramenta pelo nome em nome de `chat_id`.
+    Sempre retorna texto (erros inclusive)."""
+    t = TOOLS.get(name)
+    if t is None:
+        return f"Funcao desconhecida: {name}"
+    kwargs = {k: v for k, v in (args or {}).items() if k in t.arg_names}
+    token = _current_chat.set(str(chat_id))
+    try:
+        # A ordem das nao concorrentes e garantida por quem chama (uma rodada
+        # por chat, em sequencia): sem lock global, um chat nao espera o outro
+        return t.fn(**kwargs)
+    except Exception as e:
+        return f"ERRO em {name}: {e}"
+    finally:
+        _current_chat.reset(token)
+
+
+# ============================================================
+# SCHEMA (assinatura + docstring)
+# ============================================================
+
+def _module_group(fn):
+    module = fn.__module__.rsplit(".", 1)[-1]
+    return module[:-len("_tool")] if module.endswith("_tool") else module
+
+
+def _parse_docstring(doc):
+    """Separa descricao (primeiro paragrafo) e descricoes da secao 'Args:'."""
+    desc, args, section = [], {}, "desc"
+    for line in inspect.cleandoc(doc or "").splitlines():
+        stripped = line.strip()
+        if stripped == "Args:":
+            section = "args"
+        elif section == "desc":
+            if not stripped and desc:
+                section = "other"
+            elif stripped:
+                desc.append(stripped)
+        elif section == "args" and ":" in stripped:
+            arg, text = stripped.split(":", 1)
+            args[arg.strip()] = text.strip()
+    return " ".join(desc), args
+
+
+def _json_type(annotation, default):
+    """Converte anotacao (ou tipo do default) em JSON schema."""
+    if annotation is inspect.Parameter.empty:
+        if default is inspect.Parameter.empty or default is None:
+            return {"type": "string"}
+        return {"type": _JSON_TYPES.get(type(default), "string")}
+
+    origin = typing.get_origin(annotation)
+    if origin is Literal:
+        values = list(typing.get_args(annotation))
+        return {"type": _JSON_TYPES.get(type(values[0]), "string"), "enum": values}
+    if origin is typing.Union:
+        inner = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _json_type(inner[0], default) if inner else {"type": "string"}
+    if origin is list:
+        args = typing.get_args(annotation)
+        return {"type": "array", "items": _json_type(args[0], None) if args else {"type": "string"}}
+    return {"type": _JSON_TYPES.get(annotation, "string")}
+
+
+def _build_schema(fn):
+    description, arg_docs = _parse_docstring(fn.__doc__)
+    hints = typing.get_type_hints(fn)
+    properties, required = {}, []
+    for pname, p in inspect.signature(fn).parameters.items():
+        if p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD):
+            continue
+        prop = _json_type(hints.get(pname, p.annotation), p.default)
+        if pname in arg_docs:
+            prop["description"] = arg_docs[pname]
+        properties[pname] = prop
+        if p.default is inspect.Parameter.empty:
+            required.append(pname)
+    params = {"type": "object", "properties": properties}
+    if required:
+        params["required"] = required
+    return description, params
@@ -4,14 +4,15 @@ IRIS - Web Tools
 Ferramentas de busca na internet: search, news, reddit
 """
 
-import requests
+from .registry import tool
 
 # ============================================================
 # WEB SEARCH
 # ============================================================
 
-def fn_web_search(query, max_results=5):
-    """Busca na web usando DuckDuckGo."""
+@tool("pesquisar_web")
+def fn_web_search(query: str, max_results: int = 5):
+    """Pesquisa na internet (DuckDuckGo)."""
     try:
         try:
             from ddgs import DDGS
@@ -28,8 +29,9 @@ def fn_web_search(query, max_results=5):
         return f"ERRO busca: {e}"
 
 
-def fn_web_news(query, max_results=5):
-    """Busca notícias usando DuckDuckGo."""
+@tool("buscar_noticias")
+def fn_web_news(query: str, max_results: int = 5):
+    """Busca noticias recentes (DuckDuckGo)."""
     try:
         try:
             from ddgs import DDGS
@@ -53,8 +55,9 @@ def fn_web_news(query, max_results=5):
 # REDDIT
 # ============================================================
 
-def fn_reddit(subreddit="technology", limit=8):
-    """Busca posts populares em um subreddit."""
+@tool("ver_reddit")
+def fn_reddit(subreddit: str = "technology", limit: int = 8):
+    """Posts populares de um subreddit."""
     aliases = {
         "tech": "technology",
         "ia": "artificial", 
@@ -68,6 +71,7 @@ def fn_reddit(subreddit="technology", limit=8):
     
     sub = aliases.get(subreddit.lower(), subreddit)
     
+    import requests
     try:
         url = f"https://www.reddit.com/r/{sub}/hot.json?limit={limit}"
         resp = requests.get(url, headers={"User-Agent": "IRIS/1.0"}, timeout=15)
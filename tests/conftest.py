@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Testes rodam a partir da raiz: `python -m pytest -q`"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
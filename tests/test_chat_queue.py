@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Fila por chat: ordem das requisições nos modos queue, cancel e merge"""
+
+import asyncio
+
+from chat_queue import ChatQueue
+
+
+class Handler:
+    """Registra os textos processados; a primeira requisição espera `liberar`"""
+
+    def __init__(self):
+        self.iniciados = []
+        self.concluidos = []
+        self.cancelados = []
+        self.liberar = asyncio.Event()
+
+    async def __call__(self, update, context, text):
+        self.iniciados.append(text)
+        try:
+            if len(self.iniciados) == 1:
+                await self.liberar.wait()
+            await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            self.cancelados.append(text)
+            raise
+        self.concluidos.append(text)
+
+
+async def _rodar(mode):
+    """Manda "a", espera ela começar, manda "b" e "c" e só então libera "a"."""
+    handler = Handler()
+    fila = ChatQueue(handler, mode=mode)
+    fila.submit("c1", None, None, "a")
+    while not handler.iniciados:
+        await asyncio.sleep(0)
+    fila.submit("c1", None, None, "b")
+    fila.submit("c1", None, None, "c")
+    handler.liberar.set()
+    while fila._workers:
+        await asyncio.gather(*fila._workers.values())
+    return handler
+
+
+def test_queue_processa_todas_em_ordem():
+    handler = asyncio.run(_rodar("queue"))
+    assert handler.concluidos == ["a", "b", "c"]
+
+
+def test_cancel_responde_so_a_ultima():
+    handler = asyncio.run(_rodar("cancel"))
+    assert handler.cancelados == ["a"]
+    assert handler.concluidos == ["c"]
+
+
+def test_merge_une_as_que_chegaram_durante_a_atual():
+    handler = asyncio.run(_rodar("merge"))
+    assert handler.concluidos == ["a", "b\nc"]
+
+
+def test_chats_diferentes_rodam_em_paralelo():
+    async def rodar():
+        handler = Handler()
+        fila = ChatQueue(handler, mode="queue")
+        fila.submit("c1", None, None, "a")  # fica esperando `liberar`
+        fila.submit("c2", None, None, "x")
+        while "x" not in handler.concluidos:
+            await asyncio.sleep(0)
+        concluidos = list(handler.concluidos)
+        handler.liberar.set()
+        while fila._workers:
+            await asyncio.gather(*fila._workers.values())
+        return concluidos
+
+    assert asyncio.run(asyncio.wait_for(rodar(), timeout=5)) == ["x"]
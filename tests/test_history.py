@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Histórico por chat: ring buffer e mensagens pendentes de resumo"""
+
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "iris.db")
+    yield
+    storage.close_db()
+
+
+def test_resumo_inclui_mensagens_ja_arquivadas_pelo_ring_buffer(db):
+    # cap menor que SUMMARY_KEEP: as mensagens saem do histórico ativo antes
+    # de entrarem na janela de resumo, e mesmo assim precisam ser resumidas
+    storage.set_history_cap("c1", 10)
+    for i in range(25):
+        storage.add_to_history("user", f"mensagem {i}", "c1")
+
+    rows = storage.get_history_to_summarize(0, 16, "c1")
+    assert [r["content"] for r in rows] == [f"mensagem {i}" for i in range(15)]
+
+    # Depois de resumir até a última, só as novas arquivadas voltam
+    storage.save_summary("c1", "resumo", rows[-1]["id"])
+    for i in range(25, 28):
+        storage.add_to_history("user", f"mensagem {i}", "c1")
+    rows = storage.get_history_to_summarize(rows[-1]["id"], 16, "c1")
+    assert [r["content"] for r in rows] == [f"mensagem {i}" for i in range(15, 18)]
+
+
+def test_resumo_respeita_keep_no_historico_ativo(db):
+    for i in range(20):
+        storage.add_to_history("user", f"m{i}", "c2")
+    rows = storage.get_history_to_summarize(0, 16, "c2", limit=3)
+    assert [r["content"] for r in rows] == ["m0", "m1", "m2"]
+    assert len(storage.get_history_to_summarize(0, 16, "c2")) == 4
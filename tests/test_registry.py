@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Tools do registry: execução em nome de chats diferentes"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.registry import TOOLS, tool, execute_tool, current_chat
+
+
+def test_chats_diferentes_nao_bloqueiam_tool_nao_concorrente():
+    # Cada chamada só termina quando a outra também entrou na tool: se uma
+    # esperasse a outra (lock global), a barreira estouraria o timeout
+    barreira = threading.Barrier(2, timeout=5)
+
+    @tool("teste_escrita_lenta", readonly=False)
+    def lenta():
+        """Tool de escrita lenta (teste)"""
+        barreira.wait()
+        return f"ok {current_chat()}"
+
+    try:
+        assert not TOOLS["teste_escrita_lenta"].concurrent
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            a = pool.submit(execute_tool, "teste_escrita_lenta", {}, "chat-a")
+            b = pool.submit(execute_tool, "teste_escrita_lenta", {}, "chat-b")
+            assert a.result(timeout=10) == "ok chat-a"
+            assert b.result(timeout=10) == "ok chat-b"
+    finally:
+        TOOLS.pop("teste_escrita_lenta", None)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""Busca na memória: cada chat só enxerga os próprios documentos"""
+
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "iris.db")
+    yield
+    storage.close_db()
+
+
+def test_busca_separa_chats_de_ids_parecidos(db):
+    # "-100123" (grupo) e "100123" viram o mesmo token sem o prefixo do chat_key
+    for chat in ("-100123", "100123"):
+        storage.add_task(f"deploy do projeto {chat}", chat_id=chat)
+        storage.add_to_history("user", f"falamos do deploy {chat}", chat)
+
+    for chat in ("-100123", "100123"):
+        rows = storage.search_memory("deploy", chat_id=chat)
+        assert {r["fonte"] for r in rows} == {"tarefa", "conversa"}
+        assert all(r["trecho"].endswith(f" {chat}") for r in rows)
+
+    assert storage.search_memory("deploy", chat_id="outro") == []
+    assert [r["fonte"] for r in storage.search_memory("deploy", fonte="tarefa", chat_id="100123")] == ["tarefa"]
+
+
+def test_rebuild_mantem_o_token_do_chat(db):
+    storage.add_task("revisar contrato", chat_id="c1")
+    storage.rebuild_memory_index()
+    assert [r["ref_id"] for r in storage.search_memory("contrato", chat_id="c1")] == [1]
+    assert storage.search_memory("contrato", chat_id="c2") == []
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Cache de leitura do storage: resultados devolvidos são cópias"""
+
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "iris.db")
+    yield
+    storage.close_db()
+
+
+def test_query_tasks_em_cache_nao_e_alterado_por_quem_chama(db):
+    storage.add_task("escrever relatorio", chat_id="c1")
+    storage.add_task("revisar PR", chat_id="c1")
+
+    tasks, cursor = storage.query_tasks(chat_id="c1")
+    textos = [t["texto"] for t in tasks]
+    tasks[0]["texto"] = "alterado"
+    tasks.append({"id": 999, "texto": "intrusa"})
+
+    hits = storage.cache_stats["hits"]
+    again, again_cursor = storage.query_tasks(chat_id="c1")
+    assert storage.cache_stats["hits"] == hits + 1  # veio do cache
+    assert [t["texto"] for t in again] == textos
+    assert again_cursor == cursor